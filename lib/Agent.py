@@ -4,12 +4,12 @@
 # Logging is also handled automatically for each command that creates a corresponding trace.
 # ==============================================================================================
 import MalmoPython
-import json
 import math
-import time
 from Utils import *
 from Logger import *
 from AgentInventory import *
+from ObservationFrame import *
+from CommandChannel import *
 
 class Agent:
     """
@@ -18,17 +18,19 @@ class Agent:
     """
     agentList = []  # A list of all agents that have been created
 
-    def __init__(self, name, agentType):
+    def __init__(self, name, agentType, logger = None):
         self.host = MalmoPython.AgentHost()     # A reference to a Malmo AgentHost object
+        self.commands = CommandChannel(self.host)   # The channel that all commands to the AgentHost are sent through
         self.agentType = agentType              # The AgentType for this agent
         self.inventory = AgentInventory(self)   # This agent's inventory
         self.performance = None                 # This agent's performance data (not collected unless this agent is manually passed to the Performance class)
         self.id = "{}1".format(name)            # The ID of this agent
         self.actionOverride = None              # An function pointer that, if present, is ran instead of any called actions
+        self.logger = logger if logger != None else Logger.default  # The TraceLogger that this agent's actions are logged to
         Agent.agentList.append(self)            # Add this agent to the global list of all agents
 
         # Recorded information for previous state/action observations used for checking state changes and logging
-        self.lastWorldState = None
+        self.observationFrame = None
         self.lastStartedLookingAt = ""
         self.lastFinishedLookingAt = "None"
         self.lastStartedMovingTo = ""
@@ -41,6 +43,16 @@ class Agent:
         self.lastEquippedItem = "None"
         self.lastItemAmount = 0
 
+    @staticmethod
+    def reset():
+        """
+        Forget all agents that have been created, so that another mission can be ran in the same process. The last value
+        recorded for each continuous command of these agents is forgotten too, since a new mission starts with none held.
+        """
+        for agent in Agent.agentList:
+            agent.commands.reset()
+        Agent.agentList = []
+
     @staticmethod
     def findAgentById(agentId):
         """
@@ -62,20 +74,70 @@ class Agent:
         self.lastClosestFoodMob = ""
         self.lastClosestFoodItem = ""
 
+    def __wait__(self, seconds):
+        """
+        Internal method that sends any commands waiting in this agent's command channel, and then pauses for the number of seconds given.
+        """
+        self.commands.flush()
+        Clock.sleep(seconds)
+
+    def __runSteps__(self, steps):
+        """
+        Internal method that runs an action generator to completion, pausing for each number of seconds it yields, and returns the result of the action.
+        """
+        try:
+            while True:
+                self.__wait__(next(steps))
+        except StopIteration as stop:
+            return stop.value
+
+    def __immediateSteps__(self, function, args):
+        """
+        Internal generator for an action that never pauses, which simply calls the function given and returns its result.
+        """
+        result = function(*args)
+        yield from ()   # Never yields a delay, but must still be a generator
+        return result
+
+    def getActionSteps(self, function, args):
+        """
+        Returns a generator that performs an action of this agent when iterated, yielding the number of seconds to wait each
+        time the action must pause, and returning the result of the action. This allows the action to be driven without blocking,
+        such as by an AgentController. Actions that never pause are performed in full on the first iteration.
+        """
+        if function == self.craft:
+            return self.__craftSteps__(*args)
+        if function == self.attackMob:
+            return self.__attackMobSteps__(*args)
+        if function == self.giveItemToAgent:
+            return self.__giveItemToAgentSteps__(*args)
+        return self.__immediateSteps__(function, args)
+
     def isMissionActive(self):
         """
         Returns true if this agent's mission is still running.
         """
         return self.host.peekWorldState().is_mission_running
 
-    def getObservationJson(self):
+    def getObservationFrame(self):
         """
-        Returns the entire world state containing the most recent observations as a JSON object.
+        Returns the ObservationFrame for the most recent observation received by this agent. An observation is only parsed
+        when it is new since the last call, otherwise the current frame is shared. If no observations have occurred, returns None.
         """
         agentState = self.host.getWorldState()
         if len(agentState.observations) > 0:
-            self.lastWorldState = json.loads(agentState.observations[-1].text)
-        return self.lastWorldState
+            sequence = 0 if self.observationFrame == None else self.observationFrame.sequence + 1
+            self.observationFrame = ObservationFrame(agentState.observations[-1].text, sequence)
+        return self.observationFrame
+
+    def getObservationJson(self):
+        """
+        Returns the entire world state containing the most recent observations as a JSON object.
+        """
+        frame = self.getObservationFrame()
+        if frame == None:
+            return None
+        return frame.json
 
     def getBlockGrid(self):
         """
@@ -104,10 +166,10 @@ class Agent:
         Returns the Vector position of this agent.
         If no observations have occurred, returns None.
         """
-        agentState = self.getObservationJson()
-        if agentState == None:
+        frame = self.getObservationFrame()
+        if frame == None:
             return None
-        return Vector(agentState["XPos"], agentState["YPos"] + 1, agentState["ZPos"])   # Agent's head is above the agent's location
+        return frame.getPosition()
 
     def getDamageDealt(self):
         """
@@ -258,49 +320,49 @@ class Agent:
         """
         Start moving backwards or forwards at a specific speed. Accepted values range from -1 to 1.
         """
-        self.host.sendCommand("move {}".format(speed))
+        self.commands.send("move {}".format(speed))
 
     def stopMoving(self):
         """
         Stop moving forwards/backwards.
         """
-        self.host.sendCommand("move 0")
+        self.commands.send("move 0")
 
     def __startStrafing__(self, speed):
         """
         Start moving left or right continuously at a specific speed. Accepted values range from -1 to 1.
         """
-        self.host.sendCommand("strafe {}".format(speed))
+        self.commands.send("strafe {}".format(speed))
 
     def __stopStrafing__(self, speed):
         """
         Stop moving left/right.
         """
-        self.host.sendCommand("strafe 0")
+        self.commands.send("strafe 0")
 
     def __startChangingPitch__(self, speed):
         """
         Start tilting the agent's head up or down continuously at a specific speed. Accepted values range from -1 to 1.
         """
-        self.host.sendCommand("pitch {}".format(speed))
+        self.commands.send("pitch {}".format(speed))
 
     def __stopChangingPitch__(self):
         """
         Stop tilting the agent's head up/down.
         """
-        self.host.sendCommand("pitch 0")
+        self.commands.send("pitch 0")
 
     def __startChangingYaw__(self, speed):
         """
         Start turning continuously to the left or right at a specific speed. Accepted values range from -1 to 1.
         """
-        self.host.sendCommand("turn {}".format(speed))
+        self.commands.send("turn {}".format(speed))
 
     def __stopChangingYaw__(self):
         """
         Stop turning left/right.
         """
-        self.host.sendCommand("turn 0")
+        self.commands.send("turn 0")
     
     def stopTurning(self):
         """
@@ -313,55 +375,55 @@ class Agent:
         """
         Start jumping continuously.
         """
-        self.host.sendCommand("jump 1")
+        self.commands.send("jump 1")
 
     def __stopJumping__(self):
         """
         Stop jumping.
         """
-        self.host.sendCommand("jump 0")
+        self.commands.send("jump 0")
 
     def __startCrouching__(self):
         """
         Start crouching continuously.
         """
-        self.host.sendCommand("crouch 1")
+        self.commands.send("crouch 1")
 
     def __stopCrouching__(self):
         """
         Stop crouching.
         """
-        self.host.sendCommand("crouch 0")
+        self.commands.send("crouch 0")
 
     def __startAttacking__(self):
         """
         Start attacking continuously.
         """
-        self.host.sendCommand("attack 1")
+        self.commands.send("attack 1")
 
     def stopAttacking(self):
         """
         Stop attacking.
         """
-        self.host.sendCommand("attack 0")
+        self.commands.send("attack 0")
 
     def __startUsingItem__(self):
         """
         Begin continuously using the item in the currently selected hotbar slot.
         """
-        self.host.sendCommand("use 1")
+        self.commands.send("use 1")
 
     def __stopUsingItem__(self):
         """
         Stop using the item in the currently selected hotbar slot.
         """
-        self.host.sendCommand("use 0")
+        self.commands.send("use 0")
 
     def __throwItem__(self):
         """
         Throws item currently equipped.
         """
-        self.host.sendCommand("discardCurrentItem")
+        self.commands.send("discardCurrentItem")
 
     def stopAllMovement(self):
         """
@@ -388,46 +450,46 @@ class Agent:
         Returns a list of named EntityInfo tuples of all entities within a 20x20 area around this agent.
         Returns None on error.
         """
-        worldState = self.getObservationJson()
-        if worldState == None:
+        frame = self.getObservationFrame()
+        if frame == None:
             return None
-        entities = [EntityInfo("{}{}".format(k["name"], numerifyId(k["id"]).replace("-", "")), k["name"], Vector(k["x"], k["y"], k["z"]), k.get("quantity")) for k in worldState["nearby_entities"]]
-        return entities
+        return frame.getNearbyEntities()
 
     def getNearbyEntityById(self, entityId):
         """
         Returns a named EntityInfo tuple describing an entity near this agent, using its id. If an entity with that id is not found, returns None.
         """
-        entities = self.getNearbyEntities()
-        for entity in entities:
-            if entity.id == entityId:
-                return entity
-        return None
+        frame = self.getObservationFrame()
+        if frame == None:
+            return None
+        return frame.getEntityIndex().get(entityId)
+
+    def resolveIds(self, entityIds):
+        """
+        Returns a list of named EntityInfo tuples describing the entities near this agent with each of the ids given, all taken from
+        the same observation. The entry for an id that is not found is None.
+        """
+        frame = self.getObservationFrame()
+        if frame == None:
+            return [None] * len(entityIds)
+        return frame.resolveIds(entityIds)
 
     def getClosestMob(self):
         """
         Returns a named EntityInfo tuple of the nearest mob within a 20x20 area of this agent.
         Returns none if no such mob exists.
         """
-        agentPos = self.getPosition()
-        entities = self.getNearbyEntities()
-        if agentPos == None or entities == None:
+        frame = self.getObservationFrame()
+        if frame == None:
             return None
-        nearestDistance = 1000000
-        nearestEntity = None
-        for entity in entities:   # First entity is always the agent itself
-            if isMob(entity.type):
-                entityPos = entity.position
-                distanceToEntity = MathExt.distanceBetweenPoints(agentPos, entityPos)
-                if distanceToEntity < nearestDistance:
-                    nearestDistance = distanceToEntity
-                    nearestEntity = entity
+        nearest = nearestByCategory(frame).get(EntityCategory.Mob)
+        nearestEntity = None if nearest == None else nearest.entity
         if nearestEntity == None:
-            Logger.logClosestMob(self, None)
+            self.logger.logClosestMob(self, None)
             self.lastClosestMob = "None"
             return None
-        Logger.logMobDefinition(nearestEntity)    # In case we never saw this entity before
-        Logger.logClosestMob(self, nearestEntity)
+        self.logger.logMobDefinition(nearestEntity)    # In case we never saw this entity before
+        self.logger.logClosestMob(self, nearestEntity)
         self.lastClosestMob = nearestEntity.id
         return nearestEntity
 
@@ -436,25 +498,17 @@ class Agent:
         Returns a named EntityInfo tuple of the nearest peaceful mob within a 20x20 area of this agent.
         Returns None if no such mob exists.
         """
-        agentPos = self.getPosition()
-        entities = self.getNearbyEntities()
-        if agentPos == None or entities == None:
+        frame = self.getObservationFrame()
+        if frame == None:
             return None
-        nearestDistance = 1000000
-        nearestEntity = None
-        for entity in entities:
-            if isPeacefulMob(entity.type):
-                entityPos = entity.position
-                distanceToEntity = MathExt.distanceBetweenPoints(agentPos, entityPos)
-                if distanceToEntity < nearestDistance:
-                    nearestDistance = distanceToEntity
-                    nearestEntity = entity
+        nearest = nearestByCategory(frame).get(EntityCategory.PeacefulMob)
+        nearestEntity = None if nearest == None else nearest.entity
         if nearestEntity == None:
-            Logger.logClosestPeacefulMob(self, None)
+            self.logger.logClosestPeacefulMob(self, None)
             self.lastClosestPeacefulMob = "None"
             return None
-        Logger.logMobDefinition(nearestEntity)    # In case we never saw this entity before
-        Logger.logClosestPeacefulMob(self, nearestEntity)
+        self.logger.logMobDefinition(nearestEntity)    # In case we never saw this entity before
+        self.logger.logClosestPeacefulMob(self, nearestEntity)
         self.lastClosestPeacefulMob = nearestEntity.id
         return nearestEntity
 
@@ -463,25 +517,17 @@ class Agent:
         Returns a named EntityInfo tuple of the nearest harmful mob within a 20x20 area of this agent.
         Returns None if no such mob exists.
         """
-        agentPos = self.getPosition()
-        entities = self.getNearbyEntities()
-        if agentPos == None or entities == None:
+        frame = self.getObservationFrame()
+        if frame == None:
             return None
-        nearestDistance = 1000000
-        nearestEntity = None
-        for entity in entities:
-            if isHostileMob(entity.type):
-                entityPos = entity.position
-                distanceToEntity = MathExt.distanceBetweenPoints(agentPos, entityPos)
-                if distanceToEntity < nearestDistance:
-                    nearestDistance = distanceToEntity
-                    nearestEntity = entity
+        nearest = nearestByCategory(frame).get(EntityCategory.HostileMob)
+        nearestEntity = None if nearest == None else nearest.entity
         if nearestEntity == None:
-            Logger.logClosestHostileMob(self, None)
+            self.logger.logClosestHostileMob(self, None)
             self.lastClosestHostileMob = "None"
             return None
-        Logger.logMobDefinition(nearestEntity)    # In case we never saw this entity before
-        Logger.logClosestHostileMob(self, nearestEntity)
+        self.logger.logMobDefinition(nearestEntity)    # In case we never saw this entity before
+        self.logger.logClosestHostileMob(self, nearestEntity)
         self.lastClosestHostileMob = nearestEntity.id
         return nearestEntity
 
@@ -490,25 +536,17 @@ class Agent:
         Returns a named EntityInfo tuple of the nearest food mob within a 20x20 area of this agent.
         Returns None if no such mob exists.
         """
-        agentPos = self.getPosition()
-        entities = self.getNearbyEntities()
-        if agentPos == None or entities == None:
+        frame = self.getObservationFrame()
+        if frame == None:
             return None
-        nearestDistance = 1000000
-        nearestEntity = None
-        for entity in entities:
-            if isFoodMob(entity.type):
-                entityPos = entity.position
-                distanceToEntity = MathExt.distanceBetweenPoints(agentPos, entityPos)
-                if distanceToEntity < nearestDistance:
-                    nearestDistance = distanceToEntity
-                    nearestEntity = entity
+        nearest = nearestByCategory(frame).get(EntityCategory.FoodMob)
+        nearestEntity = None if nearest == None else nearest.entity
         if nearestEntity == None:
-            Logger.logClosestFoodMob(self, None)
+            self.logger.logClosestFoodMob(self, None)
             self.lastClosestFoodMob = "None"
             return None
-        Logger.logMobDefinition(nearestEntity)    # In case we never saw this entity before
-        Logger.logClosestFoodMob(self, nearestEntity)
+        self.logger.logMobDefinition(nearestEntity)    # In case we never saw this entity before
+        self.logger.logClosestFoodMob(self, nearestEntity)
         self.lastClosestFoodMob = nearestEntity.id
         return nearestEntity
 
@@ -517,25 +555,17 @@ class Agent:
         Returns a named EntityInfo tuple of the nearest food item within a 20x20 area of this agent.
         Returns None if no such item exists.
         """
-        agentPos = self.getPosition()
-        entities = self.getNearbyEntities()
-        if agentPos == None or entities == None:
+        frame = self.getObservationFrame()
+        if frame == None:
             return None
-        nearestDistance = 1000000
-        nearestEntity = None
-        for entity in entities:
-            if isFoodItem(entity.type):
-                entityPos = entity.position
-                distanceToEntity = MathExt.distanceBetweenPoints(agentPos, entityPos)
-                if distanceToEntity < nearestDistance:
-                    nearestDistance = distanceToEntity
-                    nearestEntity = entity
+        nearest = nearestByCategory(frame).get(EntityCategory.FoodItem)
+        nearestEntity = None if nearest == None else nearest.entity
         if nearestEntity == None:
-            #Logger.logClosestFoodItem(self, None)
+            #self.logger.logClosestFoodItem(self, None)
             self.lastClosestFoodItem = "None"
             return None
 
-        #Logger.logClosestFoodItem(self, nearestEntity)
+        #self.logger.logClosestFoodItem(self, nearestEntity)
         self.lastClosestFoodItem = nearestEntity.id
         return nearestEntity
 
@@ -552,48 +582,56 @@ class Agent:
                 itemList.append(entity)
         return itemList
 
+    def getDecodedBlockGrid(self):
+        """
+        Returns the grid of block types surrounding this agent as a BlockGrid, which is decoded once per observation. Returns None on error.
+        """
+        frame = self.getObservationFrame()
+        if frame == None:
+            return None
+        return frame.getBlockGrid()
+
     def getClosestBlockByType(self, blockType):
         """
         Returns the nearest block of a given type as an entity. If no such block is found, returns None.
         """
-        currentPos = self.getPosition()
-        grid = self.getBlockGrid()
-        if grid == None or currentPos == None:
+        grid = self.getDecodedBlockGrid()
+        if grid == None:
             return None
 
-        # Find the block type in the observation grid of nearby blocks
-        index = 0
-        for y in range(0, GRID_OBSERVATION_Y_LEN):
-            for z in range(0, GRID_OBSERVATION_Z_LEN):
-                for x in range(0, GRID_OBSERVATION_X_LEN):
-                    if grid[index] == blockType.value:
-                        xDiff = x - GRID_OBSERVATION_X_HALF_LEN
-                        yDiff = y - GRID_OBSERVATION_Y_HALF_LEN
-                        zDiff = z - GRID_OBSERVATION_Z_HALF_LEN
-                        return EntityInfo("someBlock...", blockType.value, Vector(currentPos.x + xDiff, currentPos.y + yDiff, currentPos.z + zDiff), 1)
-                    index += 1
-        return None
+        nearest = grid.nearestBlockOfType(blockType)
+        if nearest == None:
+            return None
+        position, _ = nearest
+        return EntityInfo("someBlock...", blockType.value, position, 1)
+
+    def getAllBlocksByTypes(self, blockTypes):
+        """
+        Returns a list of all nearby blocks matching any of the given block types as entities. Returns None on error.
+        """
+        grid = self.getDecodedBlockGrid()
+        if grid == None:
+            return None
+        return [EntityInfo("someBlock...", blockType.value, position, 1) for position, blockType in grid.allBlocksOfTypes(blockTypes)]
 
     def getBlockTypeAtLocation(self, loc):
         """
         Get the block type at the position given. This position must be within observable distance to this agent. Returns None on error.
         """
-        currentPos = self.getPosition()
-        grid = self.getBlockGrid()
-        if grid == None or currentPos == None:
+        blockTypes = self.getBlockTypesAtLocations([loc])
+        if blockTypes == None:
             return None
+        return blockTypes[0]
 
-        # Convert the x, y, z position to a location in the grid
-        xIdx = GRID_OBSERVATION_X_HALF_LEN + (loc.x - currentPos.x)
-        yIdx = GRID_OBSERVATION_Y_HALF_LEN + (loc.y - currentPos.y)
-        zIdx = GRID_OBSERVATION_Z_HALF_LEN + (loc.z - currentPos.z)
-        idx = int(yIdx * GRID_OBSERVATION_Z_LEN * GRID_OBSERVATION_X_LEN + zIdx * GRID_OBSERVATION_X_LEN + xIdx)
-
-        if idx < 0 or idx >= len(grid):
+    def getBlockTypesAtLocations(self, locs):
+        """
+        Get the block type at each of the positions given, as a list. Positions outside of observable distance to this agent
+        have a block type of None. Returns None on error.
+        """
+        grid = self.getDecodedBlockGrid()
+        if grid == None:
             return None
-
-        # We want to return the actual enum.. not just the string
-        return stringToBlockEnum(grid[idx])
+        return grid.blockTypesAtLocations(locs)
 
     def __getYawRateToFacePosition__(self, targetPosition):
         """
@@ -754,7 +792,7 @@ class Agent:
             return self.actionOverride.function(*self.actionOverride.args)
 
         if not isItem(entity.type):
-            Logger.logLookAtStart(self, entity)
+            self.logger.logLookAtStart(self, entity)
             self.lastStartedLookingAt = entity.id
 
         # Look at the target
@@ -763,7 +801,7 @@ class Agent:
             self.__stopChangingPitch__()
             self.__stopChangingYaw__()
             if not isItem(entity.type):
-                Logger.logLookAtFinish(self, entity)
+                self.logger.logLookAtFinish(self, entity)
                 self.lastFinishedLookingAt = entity.id
             return True
         return False
@@ -785,7 +823,7 @@ class Agent:
         # Represent the agent as an EntityInfo tuple
         agentEntity = EntityInfo(agentId, "agent", agentPos, 1)
 
-        Logger.logLookAtStart(self, agentEntity)
+        self.logger.logLookAtStart(self, agentEntity)
         self.lastStartedLookingAt = agentId
 
         # Look at the target
@@ -794,7 +832,7 @@ class Agent:
             self.__stopChangingPitch__()
             self.__stopChangingYaw__()
             self.lastFinishedLookingAt = agent.id
-            Logger.logLookAtFinish(self, agentEntity)
+            self.logger.logLookAtFinish(self, agentEntity)
             return True
         return False
 
@@ -855,7 +893,7 @@ class Agent:
                 return False
 
         if not isItem(entity.type):
-            Logger.logMoveToStart(self, entity)
+            self.logger.logMoveToStart(self, entity)
             self.lastStartedMovingTo = entity.id
         
         # Move to the target
@@ -863,7 +901,7 @@ class Agent:
         if isAt:
             if not isItem(entity.type):
                 self.lastFinishedMovingTo = entity.id
-                Logger.logMoveToFinish(self, entity)
+                self.logger.logMoveToFinish(self, entity)
             self.stopMoving()
             return True
         return False
@@ -927,14 +965,14 @@ class Agent:
                 self.stopAllMovement()
                 return False
 
-        Logger.logMoveToStart(self, agentEntity)
+        self.logger.logMoveToStart(self, agentEntity)
         self.lastStartedMovingTo = agentId
 
         # Move to the target
         isAt = self.__moveToPosition__(agentPos, GIVING_DISTANCE, 2)
         if isAt:
             self.lastFinishedMovingTo = agent.id
-            Logger.logMoveToFinish(self, agentEntity)
+            self.logger.logMoveToFinish(self, agentEntity)
             return True
         return False
 
@@ -962,7 +1000,7 @@ class Agent:
         if pickedUpItems != None:
             self.actionOverride = None  # Release lock
             for item in pickedUpItems:
-                Logger.logPickUpItem(self, item)
+                self.logger.logPickUpItem(self, item)
             return True
         else:
             return False
@@ -972,9 +1010,15 @@ class Agent:
         Craft an item from other items in this agent's inventory. This requires providing a list of RecipeItems.
         Returns true if the item was successfully crafted and is in the agent's inventory. Returns false otherwise.
         """
+        return self.__runSteps__(self.__craftSteps__(item, recipeItems))
+
+    def __craftSteps__(self, item, recipeItems):
+        """
+        Internal generator that performs the craft action, yielding the number of seconds to wait each time the action must pause.
+        """
         # Check action override
         if self.actionOverride != None and self.actionOverride.function != self.craft:
-            return self.actionOverride.function(*self.actionOverride.args)
+            return (yield from self.getActionSteps(self.actionOverride.function, self.actionOverride.args))
 
         # PRECONDITIONS
         if self.actionOverride == None:
@@ -991,11 +1035,11 @@ class Agent:
                 itemsUsed.append(items[i])
 
         # Craft the item and add it to our inventory, recording its id
-        self.host.sendCommand("craft {}".format(item.value))
-        time.sleep(0.5)
+        self.commands.send("craft {}".format(item.value))
+        yield 0.5
 
         # Log the successful crafting of the item
-        Logger.logCraft(self, item, itemsUsed)
+        self.logger.logCraft(self, item, itemsUsed)
         return True
     
     def attackMob(self, mob):
@@ -1003,9 +1047,15 @@ class Agent:
         Attack a mob using the currently equipped item, provided that it is within striking distance. This method
         calls LookAt if it is necessary for the agent to turn to face the mob. Returns true if successful, and false otherwise.
         """
+        return self.__runSteps__(self.__attackMobSteps__(mob))
+
+    def __attackMobSteps__(self, mob):
+        """
+        Internal generator that performs the attackMob action, yielding the number of seconds to wait each time the action must pause.
+        """
         # Check action override
         if self.actionOverride != None and self.actionOverride.function != self.attackMob:
-            return self.actionOverride.function(*self.actionOverride.args)
+            return (yield from self.getActionSteps(self.actionOverride.function, self.actionOverride.args))
 
         oldMobsKilled = self.getMobsKilled()
         if oldMobsKilled == None:
@@ -1031,13 +1081,14 @@ class Agent:
 
         self.__startAttacking__()
         self.stopAllMovement()  # Momentarily stop all movement to check if we killed the entity
-        time.sleep(0.5)         # Prevents possible spamming of the attack action
+        yield 0.5  # Prevents possible spamming of the attack action
         newMobsKilled = self.getMobsKilled()
 
         if newMobsKilled > oldMobsKilled:
-            Logger.logAttack(self, mob, True)
+            yield 0.5  # Give time for an item to appear in our inventory if one was immediately picked up
+            self.logger.logAttack(self, mob, True)
         else:
-            Logger.logAttack(self, mob, False)
+            self.logger.logAttack(self, mob, False)
 
         return True
 
@@ -1064,29 +1115,29 @@ class Agent:
 
         # Check if item is already in hotbar (note: key commands are 1-indexed)
         if itemIdx < 9:
-            self.host.sendCommand("hotbar.{} 1".format(itemIdx + 1))
-            self.host.sendCommand("hotbar.{} 0".format(itemIdx + 1))
-            Logger.logEquipItem(self, inventoryItem)
+            self.commands.send("hotbar.{} 1".format(itemIdx + 1))
+            self.commands.send("hotbar.{} 0".format(itemIdx + 1))
+            self.logger.logEquipItem(self, inventoryItem)
             self.lastEquippedItem = inventoryItem.id
             return True
         
         # Try to swap the item into the hotbar where there currently exists no item
         swapIndex = self.__getNextAvailableHotbarIndex__()
         if swapIndex != -1:
-            self.host.sendCommand("swapInventoryItems {} {}".format(swapIndex, itemIdx))
-            self.host.sendCommand("hotbar.{} 1".format(swapIndex + 1))
-            self.host.sendCommand("hotbar.{} 0".format(swapIndex + 1))
-            Logger.logEquipItem(self, inventoryItem)
+            self.commands.send("swapInventoryItems {} {}".format(swapIndex, itemIdx))
+            self.commands.send("hotbar.{} 1".format(swapIndex + 1))
+            self.commands.send("hotbar.{} 0".format(swapIndex + 1))
+            self.logger.logEquipItem(self, inventoryItem)
             self.lastEquippedItem = inventoryItem.id
             return True
 
         # Try to swap the item into the index currently in use
         swapIndex = self.getCurrentHotbarIndex()
         if swapIndex != -1:
-            self.host.sendCommand("swapInventoryItems {} {}".format(swapIndex, itemIdx))
-            self.host.sendCommand("hotbar.{} 1".format(swapIndex + 1))
-            self.host.sendCommand("hotbar.{} 0".format(swapIndex + 1))
-            Logger.logEquipItem(self, inventoryItem)
+            self.commands.send("swapInventoryItems {} {}".format(swapIndex, itemIdx))
+            self.commands.send("hotbar.{} 1".format(swapIndex + 1))
+            self.commands.send("hotbar.{} 0".format(swapIndex + 1))
+            self.logger.logEquipItem(self, inventoryItem)
             self.lastEquippedItem = inventoryItem.id
             return True
         
@@ -1112,9 +1163,15 @@ class Agent:
         Give an item in this agent's inventory to another agent.
         Returns true if successful, and false otherwise.
         """
+        return self.__runSteps__(self.__giveItemToAgentSteps__(item, agent))
+
+    def __giveItemToAgentSteps__(self, item, agent):
+        """
+        Internal generator that performs the giveItemToAgent action, yielding the number of seconds to wait each time the action must pause.
+        """
         # Check action override
         if self.actionOverride != None and self.actionOverride.function != self.giveItemToAgent:
-            return self.actionOverride.function(*self.actionOverride.args)
+            return (yield from self.getActionSteps(self.actionOverride.function, self.actionOverride.args))
 
         self.stopMoving()  # Make sure we are stopped before checking our direction and position
         agentPos = agent.getPosition()
@@ -1147,10 +1204,10 @@ class Agent:
         agent.inventory.addItem(item.value, inventoryItem.id)   # We must preserve the id of the item
 
         # Log the results
-        Logger.logGiveItemToAgent(self, inventoryItem, agent)
+        self.logger.logGiveItemToAgent(self, inventoryItem, agent)
 
         self.equip(item)
-        time.sleep(0.5) # There is a small delay in equipping an item
+        yield 0.5  # There is a small delay in equipping an item
         self.__throwItem__()
-        time.sleep(3)   # Wait for agent to pick up item
+        yield 3    # Wait for agent to pick up item
         return True
\ No newline at end of file
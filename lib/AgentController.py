@@ -0,0 +1,122 @@
+# ==============================================================================================
+# This file contains the AgentController class, an asyncio-based driver that allows several agents
+# to perform their actions concurrently in a single process, so that an action that must pause
+# (ie. attacking, or giving an item) does not stall every other agent.
+# ==============================================================================================
+import asyncio
+import heapq
+import itertools
+from Utils import *
+
+class AgentController:
+    """
+    Asyncio-based driver for the main loop of a mission. Each registered callback runs in its own task once per tick, for as
+    long as the mission of its agent (or of any agent, if none was given) is still running. Callbacks may be plain functions
+    or coroutine functions, and coroutines can await the actions of any agent through perform(), which pauses only the task
+    performing the action instead of the whole process. Pauses are measured by the mission Clock, which is only waited on once
+    every task is paused, so that missions ran by the offline MalmoSimulator do not wait in real time.
+    """
+
+    def __init__(self, agents, tickRate = 20):
+        self.agents = agents            # The list of agents taking part in this mission
+        self.tickRate = tickRate        # The number of ticks to run per second, for each callback
+        self.callbacks = []             # A list of (Action, Agent) tuples to run each tick, where the agent may be None
+        self.sleepers = []              # A heap of (wake time, id, future) tuples for each paused task
+        self.sleeperIds = itertools.count()
+
+    def addCallback(self, function, args = None, agent = None):
+        """
+        Register a function or coroutine function to be ran once per tick, along with an optional list of arguments. If an
+        agent is given, the callback is only ran while that agent's mission is still running.
+        """
+        self.callbacks.append((Action(function, args if args != None else []), agent))
+
+    async def wait(self, agent, seconds):
+        """
+        Send any commands waiting in the command channel of the agent given, and then pause the current task for the number of seconds given.
+        """
+        agent.commands.flush()
+        await self.__sleep__(seconds)
+
+    async def __sleep__(self, seconds):
+        """
+        Internal method that pauses the current task until the mission Clock has advanced by the number of seconds given.
+        """
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.sleepers, (Clock.now() + max(seconds, 0.0), next(self.sleeperIds), future))
+        await future
+
+    async def perform(self, function, *args):
+        """
+        Perform an action method of an agent (ie. agent.attackMob) with the arguments given, and return its result. Whenever
+        the action must pause, only the current task is paused, allowing the actions of other agents to continue in the meantime.
+        """
+        agent = function.__self__
+        steps = agent.getActionSteps(function, list(args))
+        try:
+            while True:
+                await self.wait(agent, next(steps))
+        except StopIteration as stop:
+            return stop.value
+
+    def __isActive__(self, agent):
+        """
+        Internal method that returns true if the mission of the agent given is still running, or if no agent is given, if the
+        mission of any agent is still running.
+        """
+        if agent != None:
+            return agent.isMissionActive()
+        return any(a.isMissionActive() for a in self.agents)
+
+    async def __runCallback__(self, callback, agent):
+        """
+        Internal method that runs a single callback once per tick until the mission has ended for its agent.
+        """
+        tickLength = 1.0 / self.tickRate
+        agentsToFlush = [agent] if agent != None else self.agents
+        while self.__isActive__(agent):
+            result = callback.function(*callback.args)
+            if asyncio.iscoroutine(result):
+                await result
+            for a in agentsToFlush:
+                a.commands.flush()
+            await self.__sleep__(tickLength)
+
+    async def __runAll__(self):
+        """
+        Internal method that runs every registered callback concurrently until the mission has ended for all agents.
+        """
+        tasks = [asyncio.ensure_future(self.__runCallback__(callback, agent)) for callback, agent in self.callbacks]
+        while not all(task.done() for task in tasks):
+            await asyncio.sleep(0)  # Let every task run until it pauses or finishes
+            activeCount = sum(1 for task in tasks if not task.done())
+            if activeCount == 0 or len(self.sleepers) < activeCount:
+                continue
+
+            # Every task is paused, so wait for the earliest of them, and then resume each task that is due
+            wakeTime = self.sleepers[0][0]
+            Clock.sleep(max(wakeTime - Clock.now(), 0.0))
+            now = max(Clock.now(), wakeTime)
+            while len(self.sleepers) > 0 and self.sleepers[0][0] <= now:
+                _, _, future = heapq.heappop(self.sleepers)
+                future.set_result(None)
+        await asyncio.gather(*tasks)
+
+    def run(self):
+        """
+        Run every registered callback until the mission has ended for all agents.
+        """
+        for agent in self.agents:
+            agent.commands.reset()  # The mission has just started, so no continuous command holds a value yet
+            agent.commands.batching = True
+
+        self.sleepers = []
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self.__runAll__())
+        finally:
+            loop.close()
+
+        for agent in self.agents:
+            agent.commands.flush()
+            agent.commands.batching = False
@@ -4,14 +4,56 @@
 # ==============================================================================================
 from Utils import *
 
+class ItemIds:
+    """
+    The ids of the items identified during a single mission, which are shared by the inventories of every agent logged to the
+    same TraceLogger. Each TraceLogger holds its own, so that the item ids of one mission never affect those of another.
+    """
+
+    def __init__(self):
+        self.idCounter = 0  # Used to uniquely identify items in a mission
+        self.idQueue = {}   # Map of item types to a list of ids of items that have been discovered but not yet picked up (the first item is the most recently identified "closest")
+
+    def getId(self):
+        """
+        Returns a unique number that can be used to identify a new item.
+        """
+        self.idCounter += 1
+        return self.idCounter
+
+    def enqueueItem(self, item):
+        """
+        Places the id of an item that is closest to an agent in a queue such that when an item of that type is
+        randomly added to the agent's inventory from a pick-up, we first select that id.
+        """
+        if item.type not in self.idQueue:
+            self.idQueue[item.type] = []
+
+        # If item id is already in queue, move it to front. Otherwise, just prepend it
+        if item.id in self.idQueue[item.type]:
+            idx = self.idQueue[item.type].index(item.id)
+            del self.idQueue[item.type][idx]
+            self.idQueue[item.type].insert(0, item.id)
+        else:
+            self.idQueue[item.type].insert(0, item.id)
+
+    def dequeueItem(self, itemTypeStr):
+        """
+        Removes and returns the first item id of a specific type from the queue, or returns None if there is none.
+        """
+        if itemTypeStr not in self.idQueue:
+            return None
+        if len(self.idQueue[itemTypeStr]) <= 0:
+            return None
+        return self.idQueue[itemTypeStr].pop(0)
+
 class AgentInventory:
     """
     Class containing all of the inventory items an Agent is currently in possession of.
     This inventory object must be updated at regular intervals when new JSON observations come in from the AgentHost.
-    Item IDs at the FRONT of each array are the next to be used for items where the agent has more than one.
+    Item IDs at the FRONT of each array are the next to be used for items where the agent has more than one. New ids are
+    taken from the ItemIds of the TraceLogger that the agent is logged to.
     """
-    __idCounter__ = 0   # Used to uniquely identify items in a mission
-    __idQueue__ = {}    # Map of item types to a list of ids of items that have been discovered but not yet picked up (the first item is the most recently identified "closest")
 
     def __init__(self, agent):
         self.__agent__ = agent      # A reference to the agent whose inventory this is
@@ -21,8 +63,7 @@ class AgentInventory:
         """
         Returns a unique number that can be used to identify a new item in the inventory
         """
-        AgentInventory.__idCounter__ += 1
-        return AgentInventory.__idCounter__
+        return self.__agent__.logger.itemIds.getId()
 
     def update(self):
         """
@@ -71,34 +112,6 @@ class AgentInventory:
 
         return (itemsAdded, itemsDeleted)
 
-    @staticmethod
-    def enqueueItem(item):
-        """
-        Places the id of an item that is closest to an agent in a queue such that when an item of that type is
-        randomly added to the agent's inventory from a pick-up, we first select that id.
-        """
-        if item.type not in AgentInventory.__idQueue__:
-            AgentInventory.__idQueue__[item.type] = []
-
-        # If item id is already in queue, move it to front. Otherwise, just prepend it
-        if item.id in AgentInventory.__idQueue__[item.type]:
-            idx = AgentInventory.__idQueue__[item.type].index(item.id)
-            del AgentInventory.__idQueue__[item.type][idx]
-            AgentInventory.__idQueue__[item.type].insert(0, item.id)
-        else:
-            AgentInventory.__idQueue__[item.type].insert(0, item.id)
-
-    @staticmethod
-    def dequeueItem(itemTypeStr):
-        """
-        Removes the first item id of a specific type from the queue.
-        """
-        if itemTypeStr not in AgentInventory.__idQueue__:
-            return
-        if len(AgentInventory.__idQueue__[itemTypeStr]) <= 0:
-            return
-        AgentInventory.__idQueue__[itemTypeStr].pop(0)
-
     def addItem(self, itemTypeStr, itemId = None):
         """
         Add an item of a specific type to this inventory, given the type as a string.
@@ -107,10 +120,8 @@ class AgentInventory:
         if itemTypeStr not in self.__inventory__:
             self.__inventory__[itemTypeStr] = []
         if itemId == None:
-            if itemTypeStr in AgentInventory.__idQueue__ and len(AgentInventory.__idQueue__[itemTypeStr]) > 0:
-                itemId = AgentInventory.__idQueue__[itemTypeStr][0]
-                self.dequeueItem(itemTypeStr)
-            else:
+            itemId = self.__agent__.logger.itemIds.dequeueItem(itemTypeStr)
+            if itemId == None:
                 itemId = "{}{}".format(itemTypeStr, self.getId())
         item = Item(itemId, itemTypeStr)
         self.__inventory__[itemTypeStr].append(item)
@@ -0,0 +1,95 @@
+# ==============================================================================================
+# This file holds the BlockGrid class, a decoded form of the grid of blocks surrounding an agent
+# in an observation, along with a codec for converting between block types and integer codes.
+# ==============================================================================================
+import numpy
+from Utils import *
+
+# Block type codec. Each BlockType is represented in a grid by its position in the enumeration, and any block string
+# that is not part of BlockType is given the unknown code.
+BLOCK_TYPES = list(BlockType)                                                       # A list of BlockTypes, indexed by code
+BLOCK_TYPE_CODES = {blockType.value: code for code, blockType in enumerate(BLOCK_TYPES)}  # A mapping of block strings to codes
+UNKNOWN_BLOCK_CODE = len(BLOCK_TYPES)                                               # The code for a block string not found in BlockType
+
+def encodeBlockType(blockType):
+    """
+    Returns the integer code for a BlockType, or for its string value.
+    """
+    if isinstance(blockType, BlockType):
+        blockType = blockType.value
+    return BLOCK_TYPE_CODES.get(blockType, UNKNOWN_BLOCK_CODE)
+
+def decodeBlockType(code):
+    """
+    Returns the BlockType for an integer code. Returns None if the code does not represent a known BlockType.
+    """
+    code = int(code)
+    if code < 0 or code >= len(BLOCK_TYPES):
+        return None
+    return BLOCK_TYPES[code]
+
+class BlockGrid:
+    """
+    The grid of blocks observed around an agent, decoded into a (Y, Z, X) array of block type codes. The agent is
+    located at the center cell of the grid, and each query is answered with vectorized operations over the whole grid.
+    """
+
+    def __init__(self, blocks, center, shape = None):
+        """
+        Decode a flat list of block strings from a 'blockgrid' observation, given the Vector position of the observing agent.
+        Optionally specify the (Y, Z, X) shape of the grid, otherwise it is taken from the GRID_OBSERVATION_XXX globals.
+        """
+        if shape == None:
+            shape = (GRID_OBSERVATION_Y_LEN, GRID_OBSERVATION_Z_LEN, GRID_OBSERVATION_X_LEN)
+        self.center = center                                    # The Vector position that the center cell of the grid corresponds to
+        self.halfLengths = numpy.array(shape) // 2              # The (Y, Z, X) index of the center cell of the grid
+        self.codes = numpy.fromiter((BLOCK_TYPE_CODES.get(block, UNKNOWN_BLOCK_CODE) for block in blocks), dtype=numpy.uint16, count=len(blocks)).reshape(shape)
+
+    def __indicesToPositions__(self, indices):
+        """
+        Internal method that converts an (N, 3) array of (Y, Z, X) grid indices to a list of world Vector positions.
+        """
+        offsets = indices - self.halfLengths
+        return [Vector(self.center.x + int(x), self.center.y + int(y), self.center.z + int(z)) for y, z, x in offsets]
+
+    def __typeMask__(self, blockTypes):
+        """
+        Internal method that returns a boolean array the shape of the grid, which is true wherever a block matches one of the given BlockTypes.
+        """
+        return numpy.isin(self.codes, [encodeBlockType(blockType) for blockType in blockTypes])
+
+    def nearestBlockOfType(self, blockType):
+        """
+        Returns the Vector position of the block of the given type nearest to the center of this grid, along with its distance
+        from the center. Returns None if there is no such block in the grid.
+        """
+        indices = numpy.argwhere(self.codes == encodeBlockType(blockType))
+        if len(indices) == 0:
+            return None
+        distances = numpy.sqrt(numpy.sum(numpy.square(indices - self.halfLengths), axis=1))
+        nearestIdx = numpy.argmin(distances)
+        return self.__indicesToPositions__(indices[nearestIdx:nearestIdx + 1])[0], float(distances[nearestIdx])
+
+    def allBlocksOfTypes(self, blockTypes):
+        """
+        Returns a list of tuples containing the Vector position and BlockType of every block in this grid that matches
+        one of the given BlockTypes.
+        """
+        indices = numpy.argwhere(self.__typeMask__(blockTypes))
+        codes = self.codes[indices[:, 0], indices[:, 1], indices[:, 2]]
+        return list(zip(self.__indicesToPositions__(indices), [decodeBlockType(code) for code in codes]))
+
+    def blockTypesAtLocations(self, locations):
+        """
+        Returns a list containing the BlockType at each of the given Vector locations. The entry for a location outside of
+        this grid, or for a block that is not a known BlockType, is None.
+        """
+        if len(locations) == 0:
+            return []
+        points = numpy.array([(loc.y - self.center.y, loc.z - self.center.z, loc.x - self.center.x) for loc in locations], dtype=float)
+        indices = numpy.floor(points + 0.5).astype(int) + self.halfLengths
+        inBounds = numpy.all((indices >= 0) & (indices < self.codes.shape), axis=1)
+        codes = numpy.full(len(locations), UNKNOWN_BLOCK_CODE, dtype=numpy.uint16)
+        validIndices = indices[inBounds]
+        codes[inBounds] = self.codes[validIndices[:, 0], validIndices[:, 1], validIndices[:, 2]]
+        return [decodeBlockType(code) for code in codes]
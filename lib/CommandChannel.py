@@ -0,0 +1,83 @@
+# ==============================================================================================
+# This file holds the CommandChannel class, which sits between an Agent and its Malmo AgentHost
+# to avoid re-sending continuous commands whose value has not changed.
+# ==============================================================================================
+
+# Continuous commands hold their value in Malmo until changed, so sending the same value again has no effect
+CONTINUOUS_COMMANDS = ["move", "strafe", "turn", "pitch", "jump", "crouch", "attack", "use"]
+
+class CommandChannel:
+    """
+    Channel for sending commands to a Malmo AgentHost. The last value sent for each continuous command is recorded, and
+    any send that would not change that value is suppressed. When batching is turned on, commands are held until the
+    next call to flush() (normally once per tick of the mission loop), and are then sent in the order they were given.
+    Only the last value given for each continuous command during a batch is sent, and not at all if it is the value
+    already sent, so a command that changes and changes back within a single tick is never sent.
+    """
+
+    def __init__(self, host):
+        self.host = host                # A reference to the Malmo AgentHost that commands are sent to
+        self.batching = False           # Whether commands are held until flush() is called, rather than sent immediately
+        self.sentCount = 0              # The number of commands that have been sent to the AgentHost
+        self.suppressedCount = 0        # The number of commands that were dropped for not changing a continuous command's value
+        self.__lastValues = {}          # A mapping of continuous command names to the last value sent for each
+        self.__pending = []             # A list of (continuous command name or None, command string) tuples waiting to be sent on the next flush
+        self.__pendingValues = {}       # A mapping of continuous command names to the value waiting to be sent for each on the next flush
+
+    def send(self, command):
+        """
+        Send a command string to the AgentHost, unless it is a continuous command that already holds the value given.
+        Returns true if the command was sent or queued, and false if it was suppressed.
+        """
+        parts = command.split(" ")
+        name = None
+        if len(parts) == 2 and parts[0] in CONTINUOUS_COMMANDS:
+            name = parts[0]
+            try:
+                value = float(parts[1])
+            except ValueError:
+                value = parts[1]
+            if name in self.__pendingValues:
+                if self.__pendingValues[name] == value:
+                    self.suppressedCount += 1
+                    return False
+
+                # Replace the value waiting to be sent, which no longer needs to be sent
+                self.__pending = [entry for entry in self.__pending if entry[0] != name]
+                del self.__pendingValues[name]
+                self.suppressedCount += 1
+            if self.__lastValues.get(name) == value:
+                self.suppressedCount += 1
+                return False
+
+        if self.batching:
+            self.__pending.append((name, command))
+            if name != None:
+                self.__pendingValues[name] = value
+        else:
+            self.host.sendCommand(command)
+            self.sentCount += 1
+            if name != None:
+                self.__lastValues[name] = value
+        return True
+
+    def flush(self):
+        """
+        Send all commands that are waiting to be sent, in the order they were given.
+        """
+        pending = self.__pending
+        self.__pending = []
+        self.__lastValues.update(self.__pendingValues)
+        self.__pendingValues = {}
+        for _, command in pending:
+            self.host.sendCommand(command)
+        self.sentCount += len(pending)
+
+    def reset(self):
+        """
+        Forget the last value sent for each continuous command, so that the next send of each is never suppressed.
+        This should be called whenever the AgentHost may have changed those values itself (ie. at the start of a new mission).
+        """
+        self.__lastValues = {}
+        self.__pending = []
+        self.__pendingValues = {}
@@ -9,25 +9,28 @@ class HTNAgent(Agent):
     Wrapper class for a Malmo agent that interfaces with a trained hierarchical task network
     in order to select actions based on the current state.
     """
-    PLAN_UPDATE_COUNTER = 5000
+    PLAN_UPDATE_INTERVAL = 1.0  # The number of seconds of mission time between each automatic re-generation of the plan
 
-    def __init__(self, name, generate_new_plan):
-        super(HTNAgent, self).__init__(name, AgentType.Trained)
+    def __init__(self, name, generate_new_plan, logger = None):
+        super(HTNAgent, self).__init__(name, AgentType.Trained, logger)
         self.generate_new_plan = generate_new_plan     # A function pointer to the plan generator for this mission in particular
         self.plan = []                                 # A list of string actions returned by each call to the HTN
-        self.__planCounter__ = 1                       # A counter that is incremented in each iteration of the mission loop, determining when to generate a new plan
+        self.__nextPlanTime__ = None                   # The mission time at which to next generate a new plan, or None if no action has been performed yet
+        self.__planTuples__ = None                     # The plan tuples last returned by the HTN
+        self.__planStateVersion__ = None               # The version of the logger's current state that the last plan was generated from
 
-    def __mapPlanTupleToAction__(self, planTuple):
+    def __mapPlanTupleToAction__(self, planTuple, entities):
         """
         Given an action to perform as a string, select the appropriate agent function to perform and return it
-        along with any parameters in a tuple object. Returns None if the action could not be resolved.
+        along with any parameters in a tuple object. Nearby entities referenced by the action are looked up in the given
+        dictionary of entity ids to EntityInfo tuples. Returns None if the action could not be resolved.
         """
         if len(planTuple) == 3:    # COMMANDS LOGGED W/ 2 ARGUMENTS ==================================================
             if planTuple[0] == "ATTACK":
                 entityType = "".join([i for i in planTuple[2] if not i.isdigit()]).capitalize()
                 if isMob(entityType):
                     mobId = planTuple[2].capitalize()
-                    mob = self.getNearbyEntityById(mobId)
+                    mob = entities.get(mobId)
                     if mob != None:
                         return Action(self.attackMob, [mob])
                 return None
@@ -41,12 +44,12 @@ class HTNAgent(Agent):
                 entityType = "".join([i for i in planTuple[3] if not i.isdigit()]).capitalize()
                 if isMob(entityType) or isItem(entityType):
                     entityId = planTuple[3].capitalize()
-                    entity = self.getNearbyEntityById(entityId)
+                    entity = entities.get(entityId)
                     if entity != None:
                         return Action(self.lookAtEntity, [entity])
                 else:
                     agentId = planTuple[3].capitalize()
-                    agent = self.getNearbyEntityById(agentId)
+                    agent = entities.get(agentId)
                     if agent != None:
                         return Action(self.lookAtAgent, [agent])
                 return None
@@ -55,12 +58,12 @@ class HTNAgent(Agent):
                 entityType = "".join([i for i in planTuple[3] if not i.isdigit()]).capitalize()
                 if isMob(entityType):
                     mobId = planTuple[3].capitalize()
-                    mob = self.getNearbyEntityById(mobId)
+                    mob = entities.get(mobId)
                     if mob != None:
                         return Action(self.moveToEntity, [mob])
                 elif isItem(entityType):
                     itemId = planTuple[3].capitalize()
-                    item = self.getNearbyEntityById(itemId)
+                    item = entities.get(itemId)
                     if item != None:
                         return Action(self.__moveToItem__, [item])
                 else:
@@ -81,34 +84,62 @@ class HTNAgent(Agent):
 
     def __updatePlan__(self):
         """
-        Update the action plan for this agent by feeding the current state of this environment to the trained HTN.
+        Update the action plan for this agent by feeding the current state of this environment to the trained HTN. If the state
+        has not changed since the last plan was generated, the HTN is skipped and the last plan is used again.
         """
-        currentState = Logger.getCurrentState(HTNAgent.agentList)
-        print("========================= CURRENT STATE =========================")
-        print(currentState)
-        newPlanTuples = self.generate_new_plan(currentState)
-        print("========================= PLAN =========================")
-        print(newPlanTuples)
+        agents = [agent for agent in HTNAgent.agentList if agent.logger == self.logger]
+        stateDelta = self.logger.getStateSince(agents, self.__planStateVersion__) if self.__planStateVersion__ != None else None
+        if stateDelta != None and len(stateDelta.added) == 0 and len(stateDelta.removed) == 0 and len(stateDelta.changed) == 0:
+            newPlanTuples = self.__planTuples__
+        else:
+            currentState = self.logger.getCurrentState(agents)
+            print("========================= CURRENT STATE =========================")
+            print(currentState)
+            newPlanTuples = self.generate_new_plan(currentState)
+            print("========================= PLAN =========================")
+            print(newPlanTuples)
+            self.__planTuples__ = newPlanTuples
+        self.__planStateVersion__ = self.logger.getStateVersion()
 
         if newPlanTuples == None:
             return
 
+        # Resolve every entity the plan could refer to against the same observation
+        entityIds = [str(arg).capitalize() for planTuple in newPlanTuples for arg in planTuple[1:]]
+        entities = dict(zip(entityIds, self.resolveIds(entityIds)))
+
         self.plan = []
         for planTuple in newPlanTuples:
-            action = self.__mapPlanTupleToAction__(planTuple)
+            action = self.__mapPlanTupleToAction__(planTuple, entities)
             if action != None:
                 self.plan.append(action)
 
+    def getActionSteps(self, function, args):
+        """
+        Returns a generator that performs an action of this agent when iterated. See Agent.getActionSteps().
+        """
+        if function == self.performNextAction:
+            return self.__performNextActionSteps__(*args)
+        return super(HTNAgent, self).getActionSteps(function, args)
+
     def performNextAction(self):
         """
         Given the current environment and the trained HTN, perform the next action in the plan.
         """
-        # If we have made 100 iterations of the mission loop, re-generate the plan automatically using the HTN
+        return self.__runSteps__(self.__performNextActionSteps__())
+
+    def __performNextActionSteps__(self):
+        """
+        Internal generator that performs the next action in the plan, yielding the number of seconds to wait each time the action must pause.
+        """
+        # Every PLAN_UPDATE_INTERVAL seconds, re-generate the plan automatically using the HTN
         # This is so that if we need to repeat an action that was previously deleted from the plan, it will reappear during a reoccurring refresh
-        if self.__planCounter__ >= HTNAgent.PLAN_UPDATE_COUNTER:
+        now = Clock.now()
+        if self.__nextPlanTime__ == None:
+            self.__nextPlanTime__ = now + HTNAgent.PLAN_UPDATE_INTERVAL
+        elif now >= self.__nextPlanTime__:
             self.__updatePlan__()
-            self.__planCounter__ = 0
-        self.__planCounter__ += 1
+            self.__nextPlanTime__ = now + HTNAgent.PLAN_UPDATE_INTERVAL
 
         # If there are no actions to perform, do nothing
         if len(self.plan) == 0:
@@ -118,14 +149,14 @@ class HTNAgent(Agent):
         # If the action returns false, it either failed or is not finished. Return and wait until the next iteration to try again.
         for action in self.plan:
             # Update the arguments of this function (particularly if they include entities with x,y,z positions)
-            for i in range(0, len(action.args)):
-                if isEntityInfoNamedTuple(action.args[i]):
-                    updatedEntity = self.getNearbyEntityById(action.args[i].id)
-                    if updatedEntity != None:
-                        action.args[i] = updatedEntity
-                    else:
-                        self.__planCounter__ = HTNAgent.PLAN_UPDATE_COUNTER
-                        return
+            entityArgIdxs = [i for i in range(0, len(action.args)) if isEntityInfoNamedTuple(action.args[i])]
+            updatedEntities = self.resolveIds([action.args[i].id for i in entityArgIdxs])
+            for i, updatedEntity in zip(entityArgIdxs, updatedEntities):
+                if updatedEntity != None:
+                    action.args[i] = updatedEntity
+                else:
+                    self.__nextPlanTime__ = Clock.now()    # An entity in the plan is gone, so re-generate the plan next time
+                    return
             
-            if not action.function(*action.args):
+            if not (yield from self.getActionSteps(action.function, action.args)):
                 return
\ No newline at end of file
@@ -3,6 +3,7 @@
 # information of a particular agent at regular intervals.
 # ==============================================================================================
 from datetime import datetime
+import atexit
 import os
 import time
 from Utils import *
@@ -19,225 +20,458 @@ class StateFlags(Enum):
     ClosestFoodItem     = 0x10
     Inventory           = 0x20
 
-class Logger:
+class TraceWriter:
     """
-    Purely static class containing functionality for logging traces containing state and action information
-    as a result of actions performed by a companion agent. All of the methods in this class should be called
-    from a corresponding action method, such that the trace output is produced as a direct result of performing
-    an action.
+    Append-only writer that streams the statements of a trace log to disk as they are logged. Statements are buffered and
+    written out every few statements, or every few milliseconds, to a partial file next to the log. Once the trace is finished,
+    the partial file is atomically renamed to the log, so a log only ever appears once it is complete. Partial files left
+    behind by missions that crashed can be turned into logs with recover(). While a partial file is being written, a lock
+    file is kept next to it, so that the partial file of a mission that is still running is not recovered.
     """
-    __contents = []                 # The string containing the entire log
-    __currentState = []             # A list of atom strings defining the current environment state as a whole
-    __declaredEntityIds = []        # A list of entity ids for entities that have already been declared in the log
-    __stateFlags = [0] * 5          # A list of flag values for determining what information to write out to the initial and final state for EACH AGENT (maximum of 5)
+    PARTIAL_EXTENSION = ".partial"  # The extension appended to the path of a log while it is being written
+    LOCK_EXTENSION = ".lock"        # The extension appended to the path of a partial file while it is being written
+    LOCK_TIMEOUT = 3600             # The number of seconds after the last write to a locked partial file that its writer is assumed to have been killed
+
+    def __init__(self, path, flushCount = 100, flushInterval = 500):
+        self.path = path                                        # The path of the log, once it is finished
+        self.partialPath = path + TraceWriter.PARTIAL_EXTENSION # The path of the log while it is being written
+        self.lockPath = self.partialPath + TraceWriter.LOCK_EXTENSION # The path of the lock file kept while the log is being written
+        self.flushCount = flushCount                            # The number of buffered statements at which they are written out
+        self.flushInterval = flushInterval                      # The number of milliseconds after which buffered statements are written out
+        self.statementCount = 0                                 # The number of statements written so far
+        self.__buffer = []                                      # The statements waiting to be written, each preceded by its newline
+        self.__lastFlushTime = time.time()                      # The time buffered statements were last written out
+        directory = os.path.dirname(path)
+        if directory != "" and not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok = True)
+        with open(self.lockPath, "w") as lockFile:
+            lockFile.write(str(os.getpid()))
+        self.__file = open(self.partialPath, "w")
+        atexit.register(self.close)     # Write out anything buffered if the mission dies with an exception
+
+    def write(self, statement):
+        """
+        Append a statement to the log, writing out the buffered statements if enough have been buffered, or enough time has passed.
+        """
+        self.__buffer.append(statement if self.statementCount == 0 else "\n" + statement)
+        self.statementCount += 1
+        if len(self.__buffer) >= self.flushCount or (time.time() - self.__lastFlushTime) * 1000 >= self.flushInterval:
+            self.flush()
+
+    def flush(self):
+        """
+        Write out every buffered statement to the partial file.
+        """
+        if self.__file.closed:
+            return
+        self.__file.write("".join(self.__buffer))
+        self.__file.flush()
+        self.__buffer = []
+        self.__lastFlushTime = time.time()
+
+    def finish(self):
+        """
+        Write out every buffered statement and complete the log, by atomically renaming the partial file to the log.
+        """
+        self.flush()
+        os.fsync(self.__file.fileno())
+        self.__file.close()
+        try:
+            os.replace(self.partialPath, self.path)
+        except FileNotFoundError:
+            print("Warning - the partial log '{}' was removed before the mission finished, so the log may be incomplete".format(self.partialPath))
+        self.__removeLock__()
+        atexit.unregister(self.close)
+
+    def close(self):
+        """
+        Write out every buffered statement and stop writing, leaving the partial file behind so it can be recovered.
+        """
+        if not self.__file.closed:
+            self.flush()
+            self.__file.close()
+        self.__removeLock__()
+        atexit.unregister(self.close)
+
+    def __removeLock__(self):
+        """
+        Internal method that removes the lock file kept while the log is being written.
+        """
+        if os.path.isfile(self.lockPath):
+            os.remove(self.lockPath)
 
     @staticmethod
-    def clearTrackingFlags():
+    def isBeingWritten(partialPath):
         """
-        Clears the flags denoting what state information to track in the initial and final states for all agents.
+        Returns true if the partial file given is still being written by a running mission, meaning that it is locked and
+        has been written to within the last LOCK_TIMEOUT seconds.
         """
-        for i in range(0, len(Logger.__stateFlags)):
-            Logger.__stateFlags[i] = 0
+        if not os.path.isfile(partialPath + TraceWriter.LOCK_EXTENSION):
+            return False
+        try:
+            return time.time() - os.path.getmtime(partialPath) < TraceWriter.LOCK_TIMEOUT
+        except OSError:
+            return False
+
+    def discard(self):
+        """
+        Stop writing and delete the partial file.
+        """
+        self.close()
+        if os.path.isfile(self.partialPath):
+            os.remove(self.partialPath)
 
     @staticmethod
-    def trackClosestMob(agent):
+    def recover(partialPath):
+        """
+        Turn the partial file of a mission that never finished into a log. Everything from an unfinished END marker onwards is
+        removed, as is the trailing action block if it was never terminated. A final state is then rebuilt from the last value
+        logged for each predicate and subject. Returns the path of the recovered log, or None if the partial file did not
+        reach the START marker (in which case it is left as it is). Partial files still being written should not be recovered
+        (see isBeingWritten).
+        """
+        with open(partialPath) as file:
+            statements = file.read().split("\n")
+        if "START" not in statements:
+            return None
+        if "END" in statements:
+            statements = statements[:statements.index("END")]
+
+        # Remove the trailing action block if it was never terminated by an empty statement
+        lastEmptyIdx = len(statements) - 1 - statements[::-1].index("") if "" in statements else statements.index("START")
+        if any(statement.startswith("!") for statement in statements[lastEmptyIdx + 1:]):
+            statements = statements[:lastEmptyIdx + 1]
+        if statements[-1] != "":
+            statements.append("")
+
+        # Rebuild the final state from the last value logged for each predicate and subject
+        finalState = {}
+        for statement in statements:
+            strings = statement.split("-")
+            if len(strings) >= 3 and not statement.startswith("!"):
+                finalState[(strings[0], strings[1])] = statement
+        statements.append("END")
+        statements.extend(finalState.values())
+
+        path = partialPath[:-len(TraceWriter.PARTIAL_EXTENSION)]
+        with open(partialPath, "w") as file:
+            file.write("\n".join(statements))
+        os.replace(partialPath, path)
+        lockPath = partialPath + TraceWriter.LOCK_EXTENSION
+        if os.path.isfile(lockPath):    # Left behind by a writer that was killed
+            os.remove(lockPath)
+        return path
+
+# The changes made to the current state of a TraceLogger since some earlier version of it. Added and removed are lists of
+# atoms, while changed is a list of (previous atom, current atom) tuples. Version is the version of the state now.
+StateDelta = namedtuple("StateDelta", "version added removed changed")
+
+class TraceLogger:
+    """
+    Logger for a single mission, containing functionality for logging traces containing state and action information
+    as a result of actions performed by a companion agent. All of the methods in this class should be called
+    from a corresponding action method, such that the trace output is produced as a direct result of performing
+    an action. Each agent logs to the TraceLogger it was given when created, which defaults to Logger.default.
+    """
+    MAX_STATE_CHANGES = 10000   # The most changes to the current state to remember for finding the changes since an earlier version
+
+    def __init__(self, runId = None, flushCount = 100, flushInterval = 500):
+        self.runId = runId                      # The id of the mission run this logger is bound to, appended to the name of the file exported (if None, the id given by Run.py is used)
+        self.flushCount = flushCount            # The number of statements to buffer before writing them out to the log file
+        self.flushInterval = flushInterval      # The number of milliseconds after which buffered statements are written out to the log file
+        self.__writer = None                    # The TraceWriter streaming this log to disk, created once the first statement is logged
+        self.__lastStatement = None             # The last statement logged, or None if the log is empty
+        self.__currentState = {}                # A mapping of (predicate, subject) to the atom string defining that part of the current environment state, in the order first set
+        self.__stateVersion = 0                 # The version of the current state, which is incremented each time an atom in it changes
+        self.__stateChanges = []                # A list of (key, previous atom) tuples for each of the latest changes to the current state, oldest first
+        self.__oldestStateVersion = 0           # The oldest version of the current state that the changes since can still be found for
+        self.__declaredEntityIds = set()        # A set of entity ids for entities that have already been declared in the log
+        self.__stateFlags = {}                  # A mapping of each agent to the flag values determining what information to write out to the initial and final state for that agent
+        self.__lastLookAtDidFinish = False      # Keep track of whether or not lookAt has finished to log post-conditions ONCE
+        self.__lastMoveToDidFinish = False      # Keep track of whether or not moveTo has finished to log post-conditions ONCE
+        self.__lastAttack = None                # Keep track of the last entity we attacked to avoid unnecessary repeat logs
+        self.itemIds = ItemIds()                # The ids of the items identified in this mission, shared by the inventories of agents logged here
+
+    def clearTrackingFlags(self):
+        """
+        Clears the flags denoting what state information to track in the initial and final states for all agents.
+        """
+        self.__stateFlags = {}
+
+    def trackClosestMob(self, agent):
         """
         Set the flag to track the closest mob of an agent in the initial and final states.
         """
-        Logger.__stateFlags[agent.getIndex()] |= StateFlags.ClosestMob.value
+        self.__stateFlags[agent] = self.__stateFlags.get(agent, 0) | StateFlags.ClosestMob.value
 
-    @staticmethod
-    def trackClosestPeacefulMob(agent):
+    def trackClosestPeacefulMob(self, agent):
         """
         Set the flag to track the closest peaceful mob of an agent in the initial and final states.
         """
-        Logger.__stateFlags[agent.getIndex()] |= StateFlags.ClosestPeacefulMob.value
+        self.__stateFlags[agent] = self.__stateFlags.get(agent, 0) | StateFlags.ClosestPeacefulMob.value
 
-    @staticmethod
-    def trackClosestHostileMob(agent):
+    def trackClosestHostileMob(self, agent):
         """
         Set the flag to track the closest hostile mob of an agent in the initial and final states.
         """
-        Logger.__stateFlags[agent.getIndex()] |= StateFlags.ClosestHostileMob.value
+        self.__stateFlags[agent] = self.__stateFlags.get(agent, 0) | StateFlags.ClosestHostileMob.value
 
-    @staticmethod
-    def trackClosestFoodMob(agent):
+    def trackClosestFoodMob(self, agent):
         """
         Set the flag to track the closest food mob of an agent in the initial and final states.
         """
-        Logger.__stateFlags[agent.getIndex()] |= StateFlags.ClosestFoodMob.value
+        self.__stateFlags[agent] = self.__stateFlags.get(agent, 0) | StateFlags.ClosestFoodMob.value
 
-    @staticmethod
-    def trackClosestFoodItem(agent):
+    def trackClosestFoodItem(self, agent):
         """
         Set the flag to track the closest food item of an agent in the initial and final states.
         """
-        Logger.__stateFlags[agent.getIndex()] |= StateFlags.ClosestFoodItem.value
+        self.__stateFlags[agent] = self.__stateFlags.get(agent, 0) | StateFlags.ClosestFoodItem.value
 
-    @staticmethod
-    def trackInventory(agent):
+    def trackInventory(self, agent):
         """
         Set the flag to track the inventory of an agent in the initial and final states.
         """
-        Logger.__stateFlags[agent.getIndex()] |= StateFlags.Inventory.value
+        self.__stateFlags[agent] = self.__stateFlags.get(agent, 0) | StateFlags.Inventory.value
 
-    @staticmethod
-    def isTrackingClosestMob(agent):
+    def isTrackingClosestMob(self, agent):
         """
         Returns true if the Logger is set to track the closest mob of an agent in the initial and final states.
         """
-        return (Logger.__stateFlags[agent.getIndex()] & StateFlags.ClosestMob.value) != 0
+        return (self.__stateFlags.get(agent, 0) & StateFlags.ClosestMob.value) != 0
 
-    @staticmethod
-    def isTrackingClosestPeacefulMob(agent):
+    def isTrackingClosestPeacefulMob(self, agent):
         """
         Returns true if the Logger is set to track the closest peaceful mob of an agent in the initial and final states.
         """
-        return (Logger.__stateFlags[agent.getIndex()] & StateFlags.ClosestPeacefulMob.value) != 0
+        return (self.__stateFlags.get(agent, 0) & StateFlags.ClosestPeacefulMob.value) != 0
 
-    @staticmethod
-    def isTrackingClosestHostileMob(agent):
+    def isTrackingClosestHostileMob(self, agent):
         """
         Returns true if the Logger is set to track the closest hostile mob of an agent in the initial and final states.
         """
-        return (Logger.__stateFlags[agent.getIndex()] & StateFlags.ClosestHostileMob.value) != 0
+        return (self.__stateFlags.get(agent, 0) & StateFlags.ClosestHostileMob.value) != 0
 
-    @staticmethod
-    def isTrackingClosestFoodMob(agent):
+    def isTrackingClosestFoodMob(self, agent):
         """
         Returns true if the Logger is set to track the closest food mob of an agent in the initial and final states.
         """
-        return (Logger.__stateFlags[agent.getIndex()] & StateFlags.ClosestFoodMob.value) != 0
+        return (self.__stateFlags.get(agent, 0) & StateFlags.ClosestFoodMob.value) != 0
 
-    @staticmethod
-    def isTrackingClosestFoodItem(agent):
+    def isTrackingClosestFoodItem(self, agent):
         """
         Returns true if the Logger is set to track the closest food item of an agent in the initial and final states.
         """
-        return (Logger.__stateFlags[agent.getIndex()] & StateFlags.ClosestFoodItem.value) != 0
+        return (self.__stateFlags.get(agent, 0) & StateFlags.ClosestFoodItem.value) != 0
 
-    @staticmethod
-    def isTrackingInventory(agent):
+    def isTrackingInventory(self, agent):
         """
         Returns true if the Logger is set to track the inventory of an agent in the initial and final states.
         """
-        return (Logger.__stateFlags[agent.getIndex()] & StateFlags.Inventory.value) != 0
+        return (self.__stateFlags.get(agent, 0) & StateFlags.Inventory.value) != 0
 
-    @staticmethod
-    def getCurrentState(agents):
+    def getCurrentState(self, agents):
         """
         Returns a list of string atoms that define the current environment state from all agent perspectives.
         """
         # For each agent, update any information we are tracking that could potentially change on each function call
         for agent in agents:
-            if Logger.isTrackingClosestMob(agent):
-                agent.getClosestMob()
-            if Logger.isTrackingClosestPeacefulMob(agent):
-                agent.getClosestPeacefulMob()
-            if Logger.isTrackingClosestHostileMob(agent):
-                agent.getClosestHostileMob()
-            if Logger.isTrackingClosestFoodMob(agent):
-                agent.getClosestFoodMob()
-            if Logger.isTrackingClosestFoodItem(agent):
-                agent.getClosestFoodItem()
-        return Logger.__currentState
+            self.__updateClosestEntities__(agent)
+        return list(self.__currentState.values())
 
-    @staticmethod
-    def clearLog():
+    def getStateVersion(self):
         """
-        Clear the contents of this log.
+        Returns the version of the current state, which is incremented each time an atom in it changes.
         """
-        Logger.__contents = ""
+        return self.__stateVersion
 
-    @staticmethod
-    def __getTime__():
+    def getStateSince(self, agents, version):
+        """
+        Returns a StateDelta of the atoms added, removed and changed in the current environment state since the version given
+        (as returned by getStateVersion). Any information being tracked for the agents is updated first, as in getCurrentState.
+        Returns None if the version is too old for its changes to be known, in which case the whole current state should be used.
+        """
+        for agent in agents:
+            self.__updateClosestEntities__(agent)
+        if version < self.__oldestStateVersion or version > self.__stateVersion:
+            return None
+
+        # Find the atom each changed key held as of the version given
+        previousAtoms = {}
+        for key, previousAtom in self.__stateChanges[len(self.__stateChanges) - (self.__stateVersion - version):]:
+            if key not in previousAtoms:
+                previousAtoms[key] = previousAtom
+
+        added, removed, changed = [], [], []
+        for key, previousAtom in previousAtoms.items():
+            currentAtom = self.__currentState.get(key)
+            if previousAtom == None and currentAtom != None:
+                added.append(currentAtom)
+            elif previousAtom != None and currentAtom == None:
+                removed.append(previousAtom)
+            elif previousAtom != currentAtom:
+                changed.append((previousAtom, currentAtom))
+        return StateDelta(self.__stateVersion, added, removed, changed)
+
+    def __setState__(self, predicate, subject, atom):
+        """
+        Internal method that sets the atom for a predicate and subject in the current state, replacing any atom previously set for them.
+        """
+        key = (predicate, subject)
+        previousAtom = self.__currentState.get(key)
+        if previousAtom == atom:
+            return
+        self.__currentState[key] = atom
+
+        # Record the change, only keeping a bounded number of the latest changes
+        self.__stateVersion += 1
+        self.__stateChanges.append((key, previousAtom))
+        if len(self.__stateChanges) > TraceLogger.MAX_STATE_CHANGES:
+            del self.__stateChanges[:TraceLogger.MAX_STATE_CHANGES // 2]
+            self.__oldestStateVersion = self.__stateVersion - len(self.__stateChanges)
+
+    def __replaceState__(self, predicate, subject, atom):
+        """
+        Internal method that replaces the atom for a predicate and subject in the current state, only if one has already been set for them.
+        """
+        if (predicate, subject) in self.__currentState:
+            self.__setState__(predicate, subject, atom)
+
+    def __updateClosestEntities__(self, agent):
+        """
+        Internal method that refreshes each closest entity being tracked for an agent (calling getClosestXXX automatically logs).
+        All of these read from a single nearest entity pass over the agent's current observation.
+        """
+        if self.isTrackingClosestMob(agent):
+            agent.getClosestMob()
+        if self.isTrackingClosestPeacefulMob(agent):
+            agent.getClosestPeacefulMob()
+        if self.isTrackingClosestHostileMob(agent):
+            agent.getClosestHostileMob()
+        if self.isTrackingClosestFoodMob(agent):
+            agent.getClosestFoodMob()
+        if self.isTrackingClosestFoodItem(agent):
+            agent.getClosestFoodItem()
+
+    def clearLog(self):
+        """
+        Clear the contents of this log, deleting anything already written out.
+        """
+        if self.__writer != None:
+            self.__writer.discard()
+        self.__writer = None
+        self.__lastStatement = None
+
+    def reset(self):
+        """
+        Clear the log, the current state, the declared entities and all tracking flags, so that another mission can be ran in the same process.
+        A log that was never exported is left behind as a partial file, so that it can be recovered.
+        """
+        if self.__writer != None:
+            self.__writer.close()
+        self.__writer = None
+        self.__lastStatement = None
+        self.__currentState = {}
+        self.__stateVersion += 1    # Changes from before the reset can no longer be found
+        self.__stateChanges = []
+        self.__oldestStateVersion = self.__stateVersion
+        self.__declaredEntityIds = set()
+        self.__lastLookAtDidFinish = False
+        self.__lastMoveToDidFinish = False
+        self.__lastAttack = None
+        self.itemIds = ItemIds()
+        self.clearTrackingFlags()
+
+    def __getTime__(self):
         """
         Internal method for getting a string containing the current time and date.
         """
         return datetime.fromtimestamp(time.time()).strftime('%m-%d-%Y %H:%M:%S.%f')
 
-    @staticmethod
-    def __pushStatement__(value):
+    def __openWriter__(self):
+        """
+        Internal method that starts streaming this log to a new file in the 'logs' directory, named by the current date and time.
+        """
+        self.__writer = TraceWriter(os.path.join("logs", getOutputFileSuffix(self.runId) + ".log"), self.flushCount, self.flushInterval)
+
+    def __pushStatement__(self, value):
         """
         Internal method for pushing a new statement onto the trace log.
         """
-        Logger.__contents.append(value)
+        if self.__writer == None:
+            self.__openWriter__()
+        self.__writer.write(value)
+        self.__lastStatement = value
 
-    @staticmethod
-    def __pushNewline__():
+    def __pushNewline__(self):
         """
         Ensures that the previous statement is a newline, otherwise, appends one.
         """
-        if len(Logger.__contents) == 0:
+        if self.__lastStatement == None:
             return
-        if Logger.__contents[len(Logger.__contents) - 1] != "":
-            Logger.__pushStatement__("")
+        if self.__lastStatement != "":
+            self.__pushStatement__("")
 
-    @staticmethod
-    def __logAgentDefinition__(agent):
+    def __logAgentDefinition__(self, agent):
         """
         Internal method that logs the definition of a new agentm and adds its id information to the list of declared entities.
         """
         agentId = agent.getId()
-        if agentId in Logger.__declaredEntityIds:   # We already logged this agent
+        if agentId in self.__declaredEntityIds:   # We already logged this agent
             return
 
         # Log the definition of the agent
         agentLog = "agents-{}-{}".format(agentId, agentId[:-1])
-        Logger.__pushStatement__(agentLog)
-        Logger.__currentState.append(agentLog)
-        Logger.__declaredEntityIds.append(agentId)
+        self.__pushStatement__(agentLog)
+        self.__setState__("agents", agentId, agentLog)
+        self.__declaredEntityIds.add(agentId)
 
         # Assume that when defining a new agent, it starts out as alive
-        Logger.logEntityIsAlive(agent, True)
+        self.logEntityIsAlive(agent, True)
 
-    @staticmethod
-    def logItemDefinition(item):
+    def logItemDefinition(self, item):
         """
         Internal method that logs the definition of a new item, and adds its id to the list of declared entities.
         """
-        if item.id in Logger.__declaredEntityIds:   # We already logged this item
+        if item.id in self.__declaredEntityIds:   # We already logged this item
             return
 
         if isItem(item.type):
             itemLog = "items-{}-{}".format(item.id, item.type)
-            Logger.__pushStatement__(itemLog)
-            Logger.__currentState.append(itemLog)
-            Logger.__declaredEntityIds.append(item.id)
+            self.__pushStatement__(itemLog)
+            self.__setState__("items", item.id, itemLog)
+            self.__declaredEntityIds.add(item.id)
 
-    @staticmethod
-    def logMobDefinition(mob):
+    def logMobDefinition(self, mob):
         """
         Internal method that logs the definition of a new mob, and adds its id to the list of declared entities.
         """
-        if mob.id in Logger.__declaredEntityIds:    # We already logged this mob
+        if mob.id in self.__declaredEntityIds:    # We already logged this mob
             return
         
         if isMob(mob.type):
             # Log mob definition
             mobLog = "mobs-{}-{}".format(mob.id, mob.type)
-            Logger.__pushStatement__(mobLog)
-            Logger.__currentState.append(mobLog)
-            Logger.__declaredEntityIds.append(mob.id)
+            self.__pushStatement__(mobLog)
+            self.__setState__("mobs", mob.id, mobLog)
+            self.__declaredEntityIds.add(mob.id)
 
             # Assume that when defining a new mob, it starts out as alive
-            Logger.logEntityIsAlive(mob, True)
+            self.logEntityIsAlive(mob, True)
 
-    @staticmethod
-    def logEntityDefinition(entity):
+    def logEntityDefinition(self, entity):
         """
         Internal method that logs the definition of any entity, be it item, block, or mob. This adds its id to the list of declared entities.
         """
-        if entity.id in Logger.__declaredEntityIds:  # We already logged this entity
+        if entity.id in self.__declaredEntityIds:  # We already logged this entity
             return
 
         if isMob(entity.type):  # Mob entity
-            Logger.logMobDefinition(entity)
+            self.logMobDefinition(entity)
         elif isItem(entity.type):   # Item entity
-            Logger.logItemDefinition(entity)
+            self.logItemDefinition(entity)
 
-    @staticmethod
-    def logEntityIsAlive(entity, isAlive):
+    def logEntityIsAlive(self, entity, isAlive):
         """
         Updates the status of the entity given to isAlive if given True, and isDead otherwise.
         """
@@ -246,128 +480,91 @@ class Logger:
         else:
             logString = "status-{}-dead".format(entity.id)
         
-        Logger.__pushStatement__(logString)
+        self.__pushStatement__(logString)
 
         # Update the current state
-        didModifyCurrentState = False
-        for i in range(0, len(Logger.__currentState)):  # Fix-up current state
-            if Logger.__currentState[i].startswith("status-{}".format(entity.id)):
-                Logger.__currentState[i] = logString
-                didModifyCurrentState = True
-                break
-        if not didModifyCurrentState:
-            Logger.__currentState.append(logString)
+        self.__setState__("status", entity.id, logString)
 
-    @staticmethod
-    def isEntityDefined(entity):
+    def isEntityDefined(self, entity):
         """
         Returns true if this entity was already previously defined in the log. Returns false otherwise.
         """
-        if entity.id in Logger.__declaredEntityIds:
+        if entity.id in self.__declaredEntityIds:
             return True
         return False
 
-    @staticmethod
-    def __logAt__(entity, landmark):
+    def __logAt__(self, entity, landmark):
         """
         Logs that an entity is located at a specific landmark (which is another entity in the world).
         """
-        Logger.__pushStatement__("at-{}-{}".format(entity.id, landmark.id))
+        self.__pushStatement__("at-{}-{}".format(entity.id, landmark.id))
 
         # Fix up current state
-        didChangeCurrentState = False
-        for i in range(0, len(Logger.__currentState)):
-            if Logger.__currentState[i].startswith("at-{}".format(entity.id)):
-                Logger.__currentState[i] = "at-{}-{}".format(entity.id, landmark.id)
-                didChangeCurrentState = True
-                break
-        if not didChangeCurrentState:
-            Logger.__currentState.append("at-{}-{}".format(entity.id, landmark.id))
+        self.__setState__("at", entity.id, "at-{}-{}".format(entity.id, landmark.id))
 
-    @staticmethod
-    def logInitialState(agents):
+    def logInitialState(self, agents):
         """
         Given the list of agents for a mission, log the starting state for the environment in the log.
         """
         # Log the None entity to define a placeholder for anything not yet set in the trace file (we shove this into the mobs section)
         # TODO: This should really be some kind of universal thing, and not just a mob (what if we have closest_food_item-None?...)
-        Logger.__pushStatement__("none-None-NoneType")
-        Logger.__currentState.append("none-None-NoneType")
+        self.__pushStatement__("none-None-NoneType")
+        self.__setState__("none", "None", "none-None-NoneType")
 
         for agent in agents:
             agentId = agent.getId()
 
             # Log the definition of this agent
-            Logger.__logAgentDefinition__(agent)
+            self.__logAgentDefinition__(agent)
 
             # Log all entities that the agent has identified nearby
             entities = agent.getNearbyEntities()
             if entities != None:
                 for entity in entities:
-                    Logger.logEntityDefinition(entity)
+                    self.logEntityDefinition(entity)
                     
             # Log starting inventory and equipped item
-            if Logger.isTrackingInventory(agent):
+            if self.isTrackingInventory(agent):
                 agent.inventory.update()
                 inventoryItems = agent.inventory.allItems()
                 for item in inventoryItems:
-                    Logger.logItemDefinition(item)
-                    Logger.__logAt__(item, agent)
+                    self.logItemDefinition(item)
+                    self.__logAt__(item, agent)
                 equippedItem = agent.currentlyEquipped()
                 equippedItemId = "None" if equippedItem == None else equippedItem.id
-                Logger.__pushStatement__("equipped_item-{}-{}".format(agentId, equippedItemId))
+                self.__pushStatement__("equipped_item-{}-{}".format(agentId, equippedItemId))
                 agent.lastEquippedItem = equippedItemId     # Hacky way of making sure we don't re-log equipping the item after the START symbol
 
             # Log additional starting data dependent on the Logger flags set (getClosestXXX automatically logs)
-            Logger.__pushStatement__("looking_at-{}-None".format(agentId))
-            Logger.__currentState.append("looking_at-{}-None".format(agentId))
-            Logger.__pushStatement__("at-{}-None".format(agentId))
-            Logger.__currentState.append("at-{}-None".format(agentId))
-            if Logger.isTrackingClosestMob(agent):
-                agent.getClosestMob()
-            if Logger.isTrackingClosestPeacefulMob(agent):
-                agent.getClosestPeacefulMob()
-            if Logger.isTrackingClosestHostileMob(agent):
-                agent.getClosestHostileMob()
-            if Logger.isTrackingClosestFoodMob(agent):
-                agent.getClosestFoodMob()
-            if Logger.isTrackingClosestFoodItem(agent):
-                agent.getClosestFoodItem()
-
-        Logger.__pushStatement__("START")
-        Logger.__pushNewline__()
+            self.__pushStatement__("looking_at-{}-None".format(agentId))
+            self.__setState__("looking_at", agentId, "looking_at-{}-None".format(agentId))
+            self.__pushStatement__("at-{}-None".format(agentId))
+            self.__setState__("at", agentId, "at-{}-None".format(agentId))
+            self.__updateClosestEntities__(agent)
 
-    @staticmethod
-    def logFinalState(agents):
+        self.__pushStatement__("START")
+        self.__pushNewline__()
+
+    def logFinalState(self, agents):
         """
         Log the end state for the environment in the log.
         """
-        Logger.__pushNewline__()
-        Logger.__pushStatement__("END")
+        self.__pushNewline__()
+        self.__pushStatement__("END")
 
         # Log the current state (ignore closestXXX information, as we will manually refresh and print out each)
-        for statement in Logger.__currentState:
+        for statement in self.__currentState.values():
             if not statement.startswith("closest_"):
-                Logger.__pushStatement__(statement)
+                self.__pushStatement__(statement)
 
         # Refresh and log closest entity information (calling getClosestXXX automatically logs)
         # TODO: It might be better to pull this from the _currentState instead for better accuracy...
         for agent in agents:
             agent.resetClosestEntityRecords()
-            if Logger.isTrackingClosestMob(agent):
-                agent.getClosestMob()
-            if Logger.isTrackingClosestPeacefulMob(agent):
-                agent.getClosestPeacefulMob()
-            if Logger.isTrackingClosestHostileMob(agent):
-                agent.getClosestHostileMob()
-            if Logger.isTrackingClosestFoodMob(agent):
-                agent.getClosestFoodMob()
-            if Logger.isTrackingClosestFoodItem(agent):
-                agent.getClosestFoodItem()
+            self.__updateClosestEntities__(agent)
 
 
-    @staticmethod
-    def logClosestMob(agent, mob):
+    def logClosestMob(self, agent, mob):
         """
         Log the closest mob to the agent given.
         """
@@ -377,38 +574,23 @@ class Logger:
         if mob == None:
             if "None" != agent.lastClosestMob:
                 closestLog = "closest_mob-{}-None".format(agentId)
-                Logger.__pushStatement__(closestLog)
-                didModifyCurrentState = False
-                for i in range(0, len(Logger.__currentState)):  # Fix-up current state
-                    if Logger.__currentState[i].startswith("closest_mob-{}".format(agentId)):
-                        Logger.__currentState[i] = closestLog
-                        didModifyCurrentState = True
-                        break
-                if not didModifyCurrentState:
-                    Logger.__currentState.append(closestLog)
+                self.__pushStatement__(closestLog)
+                self.__setState__("closest_mob", agentId, closestLog)
             return
 
         if not isMob(mob.type):
             return
 
         # This might be an entity not previously declared in the log. Log its definition if so.
-        Logger.logMobDefinition(mob)
+        self.logMobDefinition(mob)
 
         if mob.id != agent.lastClosestMob:
             closestLog = "closest_mob-{}-{}".format(agentId, mob.id)
-            Logger.__pushStatement__(closestLog)
-            didModifyCurrentState = False
-            for i in range(0, len(Logger.__currentState)):  # Fix-up current state
-                if Logger.__currentState[i].startswith("closest_mob-{}".format(agentId)):
-                    Logger.__currentState[i] = closestLog
-                    didModifyCurrentState = True
-                    break
-            if not didModifyCurrentState:
-                Logger.__currentState.append(closestLog)
+            self.__pushStatement__(closestLog)
+            self.__setState__("closest_mob", agentId, closestLog)
 
 
-    @staticmethod
-    def logClosestPeacefulMob(agent, mob):
+    def logClosestPeacefulMob(self, agent, mob):
         """
         Log the closest peaceful entity to the agent given.
         """
@@ -418,37 +600,22 @@ class Logger:
         if mob == None:
             if "None" != agent.lastClosestPeacefulMob:
                 closestLog = "closest_peaceful_mob-{}-None".format(agentId)
-                Logger.__pushStatement__(closestLog)
-                didModifyCurrentState = False
-                for i in range(0, len(Logger.__currentState)):  # Fix-up current state
-                    if Logger.__currentState[i].startswith("closest_peaceful_mob-{}".format(agentId)):
-                        Logger.__currentState[i] = closestLog
-                        didModifyCurrentState = True
-                        break
-                if not didModifyCurrentState:
-                    Logger.__currentState.append(closestLog)
+                self.__pushStatement__(closestLog)
+                self.__setState__("closest_peaceful_mob", agentId, closestLog)
             return
 
         if not isPeacefulMob(mob.type):
             return
 
         # This might be an entity not previously declared in the log. Log its definition if so.
-        Logger.logMobDefinition(mob)
+        self.logMobDefinition(mob)
 
         if mob.id != agent.lastClosestPeacefulMob:
             closestLog = "closest_peaceful_mob-{}-{}".format(agentId, mob.id)
-            Logger.__pushStatement__(closestLog)
-            didModifyCurrentState = False
-            for i in range(0, len(Logger.__currentState)):  # Fix-up current state
-                if Logger.__currentState[i].startswith("closest_peaceful_mob-{}".format(agentId)):
-                    Logger.__currentState[i] = closestLog
-                    didModifyCurrentState = True
-                    break
-            if not didModifyCurrentState:
-                Logger.__currentState.append(closestLog)
+            self.__pushStatement__(closestLog)
+            self.__setState__("closest_peaceful_mob", agentId, closestLog)
 
-    @staticmethod
-    def logClosestHostileMob(agent, mob):
+    def logClosestHostileMob(self, agent, mob):
         """
         Log the closest hostile entity to the agent given.
         """
@@ -458,37 +625,22 @@ class Logger:
         if mob == None:
             if "None" != agent.lastClosestHostileMob:
                 closestLog = "closest_hostile_mob-{}-None".format(agentId)
-                Logger.__pushStatement__(closestLog)
-                didModifyCurrentState = False
-                for i in range(0, len(Logger.__currentState)):  # Fix-up current state
-                    if Logger.__currentState[i].startswith("closest_hostile_mob-{}".format(agentId)):
-                        Logger.__currentState[i] = closestLog
-                        didModifyCurrentState = True
-                        break
-                if not didModifyCurrentState:
-                    Logger.__currentState.append(closestLog)
+                self.__pushStatement__(closestLog)
+                self.__setState__("closest_hostile_mob", agentId, closestLog)
             return
 
         if not isHostileMob(mob.type):
             return
 
         # This might be an entity not previously declared in the log. Log its definition if so.
-        Logger.logMobDefinition(mob)
+        self.logMobDefinition(mob)
 
         if mob.id != agent.lastClosestHostileMob:
             closestLog = "closest_hostile_mob-{}-{}".format(agentId, mob.id)
-            Logger.__pushStatement__(closestLog)
-            didModifyCurrentState = False
-            for i in range(0, len(Logger.__currentState)):  # Fix-up current state
-                if Logger.__currentState[i].startswith("closest_hostile_mob-{}".format(agentId)):
-                    Logger.__currentState[i] = closestLog
-                    didModifyCurrentState = True
-                    break
-            if not didModifyCurrentState:
-                Logger.__currentState.append(closestLog)
+            self.__pushStatement__(closestLog)
+            self.__setState__("closest_hostile_mob", agentId, closestLog)
 
-    @staticmethod
-    def logClosestFoodMob(agent, mob):
+    def logClosestFoodMob(self, agent, mob):
         """
         Log the closest food mob to the agent given.
         """
@@ -498,37 +650,22 @@ class Logger:
         if mob == None:
             if "None" != agent.lastClosestFoodMob:
                 closestLog = "closest_food_mob-{}-None".format(agentId)
-                Logger.__pushStatement__(closestLog)
-                didModifyCurrentState = False
-                for i in range(0, len(Logger.__currentState)):  # Fix-up current state
-                    if Logger.__currentState[i].startswith("closest_food_mob-{}".format(agentId)):
-                        Logger.__currentState[i] = closestLog
-                        didModifyCurrentState = True
-                        break
-                if not didModifyCurrentState:
-                    Logger.__currentState.append(closestLog)
+                self.__pushStatement__(closestLog)
+                self.__setState__("closest_food_mob", agentId, closestLog)
             return
 
         if not isMob(mob.type):
             return
         
         # This might be an entity not previously declared in the log. Log its definition if so.
-        Logger.logMobDefinition(mob)
+        self.logMobDefinition(mob)
 
         if mob.id != agent.lastClosestFoodMob:
             closestLog = "closest_food_mob-{}-{}".format(agentId, mob.id)
-            Logger.__pushStatement__(closestLog)
-            didModifyCurrentState = False
-            for i in range(0, len(Logger.__currentState)):  # Fix-up current state
-                if Logger.__currentState[i].startswith("closest_food_mob-{}".format(agentId)):
-                    Logger.__currentState[i] = closestLog
-                    didModifyCurrentState = True
-                    break
-            if not didModifyCurrentState:
-                Logger.__currentState.append(closestLog)
+            self.__pushStatement__(closestLog)
+            self.__setState__("closest_food_mob", agentId, closestLog)
 
-    @staticmethod
-    def logClosestFoodItem(agent, item):
+    def logClosestFoodItem(self, agent, item):
         """
         Log the closest food item to the agent given.
         """
@@ -538,39 +675,22 @@ class Logger:
         if item == None:
             if "None" != agent.lastClosestFoodItem:
                 closestLog = "closest_food_item-{}-None".format(agentId)
-                Logger.__pushStatement__(closestLog)
-                didModifyCurrentState = False
-                for i in range(0, len(Logger.__currentState)):  # Fix-up current state
-                    if Logger.__currentState[i].startswith("closest_food_item-{}".format(agentId)):
-                        Logger.__currentState[i] = closestLog
-                        didModifyCurrentState = True
-                        break
-                if not didModifyCurrentState:
-                    Logger.__currentState.append(closestLog)
+                self.__pushStatement__(closestLog)
+                self.__setState__("closest_food_item", agentId, closestLog)
             return
 
         if not isFoodItem(item.type):
             return
 
         # This might be an entity not previously declared in the log. Log its definition if so.
-        Logger.logItemDefinition(item)
+        self.logItemDefinition(item)
 
         if item.id != agent.lastClosestFoodItem:
             closestLog = "closest_food_item-{}-{}".format(agentId, item.id)
-            Logger.__pushStatement__(closestLog)
-            didModifyCurrentState = False
-            for i in range(0, len(Logger.__currentState)):  # Fix-up current state
-                if Logger.__currentState[i].startswith("closest_food_item-{}".format(agentId)):
-                    Logger.__currentState[i] = closestLog
-                    didModifyCurrentState = True
-                    break
-            if not didModifyCurrentState:
-                Logger.__currentState.append(closestLog)
-
-    __lastLookAtDidFinish = False   # Keep track of whether or not lookAt has finished to log post-conditions ONCE
+            self.__pushStatement__(closestLog)
+            self.__setState__("closest_food_item", agentId, closestLog)
 
-    @staticmethod
-    def logLookAtStart(agent, entity):
+    def logLookAtStart(self, agent, entity):
         """
         Log the preconditions and action for the LookAt command, provided that it is not a repeat
         call of the previous LookAt command.
@@ -581,51 +701,41 @@ class Logger:
         if agent.lastStartedLookingAt == entity.id:
             return
 
-        Logger.__pushNewline__()
+        self.__pushNewline__()
 
-        for i in range(0, len(Logger.__currentState)):  # Fix up current state
-            if Logger.__currentState[i].startswith("looking_at-{}".format(agentId)):
-                Logger.__currentState[i] = "looking_at-{}-None".format(agentId)
-                break
+        self.__replaceState__("looking_at", agentId, "looking_at-{}-None".format(agentId))
 
         # This might be an entity not previously declared in the log. Log it if so.
-        Logger.logEntityDefinition(entity)
+        self.logEntityDefinition(entity)
 
         # Preconditions - None
 
         # Action
-        Logger.__pushStatement__("!LOOKAT-{}-{}-{}".format(agentId, agent.lastFinishedLookingAt, entity.id))
-        Logger.__lastLookAtDidFinish = False
+        self.__pushStatement__("!LOOKAT-{}-{}-{}".format(agentId, agent.lastFinishedLookingAt, entity.id))
+        self.__lastLookAtDidFinish = False
 
-    @staticmethod
-    def logLookAtFinish(agent, entity):
+    def logLookAtFinish(self, agent, entity):
         """
         Log the postconditions for the LookAt command, since it has ran to completion before looking elsewhere
         """
         agentId = agent.getId()
 
         # Did command already run to completion (and was therefore postconditions were logged)?
-        if Logger.__lastLookAtDidFinish:
+        if self.__lastLookAtDidFinish:
             return
 
         lookAtLog = "looking_at-{}-{}".format(agentId, entity.id)
-        Logger.__pushStatement__(lookAtLog)
+        self.__pushStatement__(lookAtLog)
 
         # Fix up current state
         # TODO: We currently avoid doing this for HTNAgents, since we may no longer be at the entity by the time a plan is generated
         if agent.__class__.__name__ != "HTNAgent":
-            for i in range(0, len(Logger.__currentState)):
-                if Logger.__currentState[i].startswith("looking_at-{}".format(agentId)):
-                    Logger.__currentState[i] = lookAtLog
-                    break
+            self.__replaceState__("looking_at", agentId, lookAtLog)
 
-        Logger.__lastLookAtDidFinish = True
-        Logger.__pushNewline__()
+        self.__lastLookAtDidFinish = True
+        self.__pushNewline__()
 
-    __lastMoveToDidFinish = False   # Keep track of whether or not moveTo has finished to log post-conditions ONCE
-    
-    @staticmethod
-    def logMoveToStart(agent, entity):
+    def logMoveToStart(self, agent, entity):
         """
         Log the preconditions and action for the MoveTo command, provided that it is not a repeat
         call of the previous LookAt command.
@@ -636,144 +746,129 @@ class Logger:
         if agent.lastStartedMovingTo == entity.id:
             return
 
-        Logger.__pushNewline__()
+        self.__pushNewline__()
 
         # Modify the current state (there will always be an at string in the current state..)
-        for i in range(0, len(Logger.__currentState)):
-            if Logger.__currentState[i].startswith("at-{}".format(agentId)):
-                Logger.__currentState[i] = "at-{}-None".format(agentId)
-                break
+        self.__replaceState__("at", agentId, "at-{}-None".format(agentId))
 
         # This might be an entity not previously declared in the log. Log it if so.
-        Logger.logEntityDefinition(entity)
+        self.logEntityDefinition(entity)
 
         # Pre-conditions
-        Logger.__pushStatement__("looking_at-{}-{}".format(agentId, entity.id))
+        self.__pushStatement__("looking_at-{}-{}".format(agentId, entity.id))
 
         # Action
-        Logger.__pushStatement__("!MOVETO-{}-{}-{}".format(agentId, agent.lastFinishedMovingTo, entity.id))
-        Logger.__lastMoveToDidFinish = False
+        self.__pushStatement__("!MOVETO-{}-{}-{}".format(agentId, agent.lastFinishedMovingTo, entity.id))
+        self.__lastMoveToDidFinish = False
 
-    @staticmethod
-    def logMoveToFinish(agent, entity):
+    def logMoveToFinish(self, agent, entity):
         """
         Log the postconditions for the MoveTo command, since it has ran to completion before moving elsewhere.
         """
         agentId = agent.getId()
 
         # Did command already run to completion (and was therefore postconditions were logged)?
-        if Logger.__lastMoveToDidFinish:
+        if self.__lastMoveToDidFinish:
             return
 
         isAtLog = "at-{}-{}".format(agentId, entity.id)
-        Logger.__pushStatement__(isAtLog)
+        self.__pushStatement__(isAtLog)
 
         # Fix up current state
         # TODO: We currently avoid doing this for HTNAgents, since we may no longer be at the entity by the time a plan is generated
         if agent.__class__.__name__ != "HTNAgent":
-            for i in range(0, len(Logger.__currentState)):
-                if Logger.__currentState[i].startswith("at-{}".format(agentId)):
-                    Logger.__currentState[i] = isAtLog
-                    break
+            self.__replaceState__("at", agentId, isAtLog)
 
-        Logger.__lastMoveToDidFinish = True
-        Logger.__pushNewline__()
+        self.__lastMoveToDidFinish = True
+        self.__pushNewline__()
 
-    @staticmethod
-    def logCraft(agent, itemCrafted, itemsUsed):
+    def logCraft(self, agent, itemCrafted, itemsUsed):
         """
         Log the preconditions, action, and postconditions for the Craft command.
         """
         agentId = agent.getId()
 
-        Logger.__pushNewline__()
+        self.__pushNewline__()
 
         # Preconditions
         for item in itemsUsed:
-            Logger.__logAt__(item, agent)
+            self.__logAt__(item, agent)
 
         # Action
-        Logger.__pushStatement__("!CRAFT-{}-{}".format(agentId, itemCrafted.type))
+        self.__pushStatement__("!CRAFT-{}-{}".format(agentId, itemCrafted.type))
 
         # Postconditions
-        Logger.__pushStatement__("items-{}-{}".format(itemCrafted.type, itemCrafted.id))
-        Logger.__logAt__(itemCrafted, agent)
+        self.__pushStatement__("items-{}-{}".format(itemCrafted.type, itemCrafted.id))
+        self.__logAt__(itemCrafted, agent)
         for item in itemsUsed:
-            Logger.__pushStatement__("at-{}-None".format(item.id))
+            self.__pushStatement__("at-{}-None".format(item.id))
 
-        Logger.__pushNewline__()
+        self.__pushNewline__()
         
 
-    __lastAttack = None     # Keep track of the last entity we attacked to avoid unnecessary repeat logs
-
-    @staticmethod
-    def logAttack(agent, entity, didKill):
+    def logAttack(self, agent, entity, didKill):
         """
-        Log the preconditions, action, and possible postconditions for the Attack command.
+        Log the preconditions, action, and possible postconditions for the Attack command. If the entity was killed, the
+        agent should first wait briefly for any item that was immediately picked up to appear in its inventory.
         """
         agentId = agent.getId()
-        Logger.__pushNewline__()
+        self.__pushNewline__()
 
         # Preconditions
-        Logger.__pushStatement__("looking_at-{}-{}".format(agentId, entity.id))
-        Logger.__pushStatement__("at-{}-{}".format(agentId, entity.id))
+        self.__pushStatement__("looking_at-{}-{}".format(agentId, entity.id))
+        self.__pushStatement__("at-{}-{}".format(agentId, entity.id))
 
         # Action
-        Logger.__pushStatement__("!ATTACK-{}-{}".format(agentId, entity.id))
+        self.__pushStatement__("!ATTACK-{}-{}".format(agentId, entity.id))
 
         # Postconditions
         if didKill:
-            Logger.logEntityIsAlive(entity, False)
+            self.logEntityIsAlive(entity, False)
 
-            # Sleep to give time for item to appear in inventory if one was immediately picked up
-            time.sleep(0.5)
-            
             # If we did immediately pick up an item, log the item definitions as postconditions of the attack, and then fake a call to PickUpItem
             newItems, _ = agent.inventory.update()
             if len(newItems) > 0:
                 for item in newItems:
-                    Logger.logItemDefinition(item)
-                    Logger.__pushStatement__("at-{}-None".format(item.id))
+                    self.logItemDefinition(item)
+                    self.__pushStatement__("at-{}-None".format(item.id))
                 for item in newItems:
-                    Logger.logPickUpItem(agent, item)
+                    self.logPickUpItem(agent, item)
             # If we did NOT pick up an item, there are probably one or more lying closeby... define any items lying on the ground as post-conditions
             else:
                 nearbyItems = agent.getAllNearbyItems()
                 for item in nearbyItems:
                     newItem = Item("{}{}".format(item.type, agent.inventory.getId()), item.type)
-                    if not Logger.isEntityDefined(newItem):
-                        AgentInventory.enqueueItem(newItem)    # We will most likely be picking up the item and so we will queue up the id to preserve it
+                    if not self.isEntityDefined(newItem):
+                        self.itemIds.enqueueItem(newItem)      # We will most likely be picking up the item and so we will queue up the id to preserve it
                         for i in range(0, item.quantity):      # Items from a JSON observation have a stack quantity
-                            Logger.logItemDefinition(newItem)
-                            Logger.__pushStatement__("at-{}-None".format(item.id))
-                            AgentInventory.enqueueItem(newItem)
+                            self.logItemDefinition(newItem)
+                            self.__pushStatement__("at-{}-None".format(item.id))
+                            self.itemIds.enqueueItem(newItem)
                             if i < item.quantity - 1:
                                 newItem = Item("{}{}".format(item.type, agent.inventory.getId()), item.type)
     
-        Logger.__pushNewline__()
+        self.__pushNewline__()
 
-    @staticmethod
-    def logPickUpItem(agent, item):
+    def logPickUpItem(self, agent, item):
         """
         Log the preconditions, action, and possible postconditions for the PickUpItem command.
         """
         agentId = agent.getId()
-        Logger.__pushNewline__()
+        self.__pushNewline__()
 
         # Make sure the item has been declared
-        Logger.logItemDefinition(item)
+        self.logItemDefinition(item)
 
         # Preconditions
-        Logger.__pushStatement__("at-{}-None".format(item.id))
+        self.__pushStatement__("at-{}-None".format(item.id))
 
         # Action
-        Logger.__pushStatement__("!PICKUPITEM-{}-{}".format(agentId, item.id))
+        self.__pushStatement__("!PICKUPITEM-{}-{}".format(agentId, item.id))
 
         # Postconditions
-        Logger.__logAt__(item, agent)
+        self.__logAt__(item, agent)
 
-    @staticmethod
-    def logEquipItem(agent, item):
+    def logEquipItem(self, agent, item):
         """
         Log the preconditions, action, and possible postconditions for the EquipItem command.
         """
@@ -785,35 +880,27 @@ class Logger:
 
         # Make sure the item has been declared
         if item != None:
-            Logger.logItemDefinition(item)
+            self.logItemDefinition(item)
 
-        Logger.__pushNewline__()
+        self.__pushNewline__()
 
         # Preconditions
-        Logger.__pushStatement__("at-{}-{}".format(item.id, agentId))
+        self.__pushStatement__("at-{}-{}".format(item.id, agentId))
 
         # Action
-        Logger.__pushStatement__("!EQUIP-{}-{}".format(agentId, item.id))
+        self.__pushStatement__("!EQUIP-{}-{}".format(agentId, item.id))
 
         # Postconditions
         postcondition = "equipped_item-{}-{}".format(agentId, item.id)
-        Logger.__pushStatement__(postcondition)
+        self.__pushStatement__(postcondition)
 
         # Change current state to reflect that this item is equipped
-        didModifyCurrentState = False
-        for i in range(0, len(Logger.__currentState)):  # Fix-up current state
-            if Logger.__currentState[i].startswith("equipped_item-{}".format(agentId)):
-                Logger.__currentState[i] = postcondition
-                didModifyCurrentState = True
-                break
-        if not didModifyCurrentState:
-            Logger.__currentState.append(postcondition)
+        self.__setState__("equipped_item", agentId, postcondition)
 
-        Logger.__pushNewline__()
+        self.__pushNewline__()
 
 
-    @staticmethod
-    def logGiveItemToAgent(sourceAgent, item, targetAgent):
+    def logGiveItemToAgent(self, sourceAgent, item, targetAgent):
         """
         Log the preconditions, action, and possible postconditions for the GiveItem command.
         """
@@ -822,45 +909,50 @@ class Logger:
         if sourceAgentId == None or targetAgentId == None:
             return
 
-        Logger.__pushNewline__()
+        self.__pushNewline__()
 
         # Preconditions
-        Logger.__pushStatement__("looking_at-{}-{}".format(sourceAgentId, targetAgentId))
-        Logger.__logAt__(sourceAgent, targetAgent)
-        Logger.__logAt__(item, sourceAgent)
-        Logger.__pushStatement__("equipped_item-{}-{}".format(sourceAgentId, item.id))
+        self.__pushStatement__("looking_at-{}-{}".format(sourceAgentId, targetAgentId))
+        self.__logAt__(sourceAgent, targetAgent)
+        self.__logAt__(item, sourceAgent)
+        self.__pushStatement__("equipped_item-{}-{}".format(sourceAgentId, item.id))
 
         # Action
-        Logger.__pushStatement__("!GIVEITEM-{}-{}-{}".format(sourceAgentId, item.id, targetAgentId))
+        self.__pushStatement__("!GIVEITEM-{}-{}-{}".format(sourceAgentId, item.id, targetAgentId))
 
         # Postconditions
-        Logger.__pushStatement__("equipped_item-{}-{}".format(sourceAgentId, "None"))
-        Logger.__logAt__(item, targetAgent)
+        self.__pushStatement__("equipped_item-{}-{}".format(sourceAgentId, "None"))
+        self.__logAt__(item, targetAgent)
 
         # Fix up current state
-        didModifyCurrentState = False
-        for i in range(0, len(Logger.__currentState)):
-            if Logger.__currentState[i].startswith("equipped_item-{}".format(sourceAgentId)):
-                Logger.__currentState[i] = "equipped_item-{}-{}".format(sourceAgentId, "None")
-                didModifyCurrentState = True
-                break
-        if not didModifyCurrentState:
-            Logger.__currentState.append("equipped_item-{}-{}".format(sourceAgentId, "None"))
+        self.__setState__("equipped_item", sourceAgentId, "equipped_item-{}-{}".format(sourceAgentId, "None"))
 
-        Logger.__pushNewline__()
+        self.__pushNewline__()
 
-    @staticmethod
-    def export():
-        """
-        Outputs the current JSON log string to a file located a the 'logs' directory within the current working
-        directory. The file name is determined by the current date and time.
-        """
-        fileName = datetime.fromtimestamp(time.time()).strftime('%m_%d_%Y_%H_%M_%S') + ".log"
-        filePath = "logs"
-        if not os.path.isdir(filePath):
-            os.mkdir(filePath)
-        filePath = os.path.join(filePath, fileName)
-        with open(filePath, "w+") as logFile:
-            logFile.write("\n".join(Logger.__contents))
-        print("Mission log output has been saved to: " + filePath)
-        Logger.clearLog()
+    def export(self):
+        """
+        Completes the log file located in the 'logs' directory within the current working directory, which statements have
+        been streamed to as they were logged. The file name is determined by the date and time of the mission, shared with
+        every other file it outputs (see getOutputFileSuffix), and the id of the run this logger is bound to, or the id given by Run.py.
+        """
+        if self.__writer == None:   # Nothing was logged, so export an empty log
+            self.__openWriter__()
+        self.__writer.finish()
+        print("Mission log output has been saved to: " + self.__writer.path)
+        self.__writer = None
+        self.__lastStatement = None
+
+class LoggerFacade(type):
+    """
+    Metaclass of the Logger class, which forwards any attribute not defined on the Logger class itself to its default TraceLogger.
+    """
+
+    def __getattr__(cls, name):
+        return getattr(cls.default, name)
+
+class Logger(metaclass = LoggerFacade):
+    """
+    Static interface to the default TraceLogger, used by any agent that was not given a TraceLogger of its own when created. Any
+    method of a TraceLogger can be called on this class (ie. Logger.logInitialState(agents)), and is performed on the default logger.
+    """
+    default = TraceLogger()     # The TraceLogger used by agents that were not given one
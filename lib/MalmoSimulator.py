@@ -0,0 +1,786 @@
+# ==============================================================================================
+# This file contains an offline stand-in for the MalmoPython module, simulating a simple flat
+# world with agents, mobs and items on a discrete tick clock so that missions can be ran without
+# any Minecraft client. Run a mission script against it with:
+#     python MalmoSimulator.py <missionScript> [args...]
+# ==============================================================================================
+import json
+import math
+import os
+import random
+import runpy
+import sys
+import uuid
+import xml.etree.ElementTree as ElementTree
+from Utils import *
+
+# Simulation constants
+TICKS_PER_SECOND = 20                   # The number of simulated ticks in one second of mission time
+TICK_TOLERANCE = 1e-6                   # The fraction of a tick that a tick is treated as having begun early by, absorbing rounding errors in the simulated time
+MISSION_NAMESPACE = {"m": "http://ProjectMalmo.microsoft.com"}
+WALK_SPEED = 4.317                      # Blocks per second travelled by an agent moving at full speed
+TURN_SPEED = 180.0                      # Degrees per second turned by an agent turning at full speed
+MOB_WALK_SPEED = 1.0                    # Blocks per second travelled by a wandering peaceful mob
+MOB_CHASE_SPEED = 2.3                   # Blocks per second travelled by a hostile mob chasing an agent
+MOB_CHASE_RANGE = 16.0                  # The distance at which hostile mobs begin chasing the nearest agent
+MOB_ATTACK_RANGE = 1.5                  # The distance at which hostile mobs are able to attack an agent
+MOB_ATTACK_DAMAGE = 3.0                 # The damage dealt by a hostile mob per attack
+MOB_ATTACK_COOLDOWN = 20                # The number of ticks between attacks of a hostile mob
+AGENT_REACH = 4.0                       # The distance from an agent's head at which it is able to strike a mob
+AGENT_ATTACK_ANGLE = 45.0               # The largest angle in degrees between an agent's view and a mob it is able to strike
+AGENT_ATTACK_COOLDOWN = 10              # The number of ticks between attacks of an agent holding down attack
+PICK_UP_RANGE = 1.5                     # The distance at which agents pick up items on the ground
+PICK_UP_DELAY = 40                      # The number of ticks before a thrown item can be picked up
+MAX_STACK_SIZE = 64
+NUMBER_OF_CARRIED_SLOTS = 36            # Inventory slots that picked up items may be placed into (hotbar and main inventory)
+
+FLAT_WORLD_BLOCK_IDS = {"1": "stone", "2": "grass", "3": "dirt", "7": "bedrock", "12": "sand", "13": "gravel", "24": "sandstone"}
+PASSABLE_BLOCKS = frozenset(["air", "tallgrass", "double_plant", "red_flower", "yellow_flower", "torch", "snow_layer", "water", "flowing_water"])
+MOB_HEALTH = {"Chicken": 4, "Rabbit": 3, "Sheep": 8, "Cow": 10, "MushroomCow": 10, "Pig": 10, "Spider": 16, "CaveSpider": 12}
+DEFAULT_MOB_HEALTH = 20
+MOB_DROPS = {                           # A mapping of mob types to the (item type, quantity) dropped on death
+    "Cow": [("beef", 2), ("leather", 1)],
+    "MushroomCow": [("beef", 2), ("leather", 1)],
+    "Pig": [("porkchop", 2)],
+    "Sheep": [("mutton", 1), ("wool", 1)],
+    "Chicken": [("chicken", 1), ("feather", 1)],
+    "Rabbit": [("rabbit", 1)],
+    "Zombie": [("rotten_flesh", 1)],
+    "Skeleton": [("bone", 1), ("arrow", 1)],
+    "Spider": [("string", 1)],
+    "Creeper": [("gunpowder", 1)]
+}
+WEAPON_DAMAGE = {"wooden_sword": 4, "golden_sword": 4, "stone_sword": 5, "iron_sword": 6, "diamond_sword": 7}
+DEFAULT_ATTACK_DAMAGE = 1
+
+# ==============================================================================================
+# MalmoPython interface
+# ==============================================================================================
+
+class LoggingSeverityLevel:
+    LOG_OFF = 0
+    LOG_ERRORS = 1
+    LOG_WARNINGS = 2
+    LOG_INFO = 3
+    LOG_FINE = 4
+    LOG_TRACE = 5
+    LOG_ALL = 6
+
+def setLogging(filename, severity):
+    """
+    Malmo's native logging does not exist in the simulator, so this does nothing.
+    """
+    pass
+
+class MissionErrorCode:
+    MISSION_BAD_ROLE_REQUEST = 0
+    MISSION_BAD_VIDEO_REQUEST = 1
+    MISSION_ALREADY_RUNNING = 2
+    MISSION_INSUFFICIENT_CLIENTS_AVAILABLE = 3
+    MISSION_TRANSMISSION_ERROR = 4
+    MISSION_SERVER_WARMING_UP = 5
+    MISSION_SERVER_NOT_FOUND = 6
+    MISSION_NO_COMMAND_PORT = 7
+    MISSION_BAD_INSTALLATION = 8
+    MISSION_CAN_NOT_KILL_BUSY_CLIENT = 9
+    MISSION_CAN_NOT_KILL_IRREPLACEABLE_CLIENT = 10
+    MISSION_VERSION_MISMATCH = 11
+
+class MissionExceptionDetails:
+    def __init__(self, errorCode, message):
+        self.errorCode = errorCode
+        self.message = message
+
+class MissionException(Exception):
+    def __init__(self, errorCode, message):
+        super(MissionException, self).__init__(message)
+        self.details = MissionExceptionDetails(errorCode, message)
+        self.message = message
+
+class ClientInfo:
+    def __init__(self, ip_address = "127.0.0.1", control_port = 10000, command_port = 0):
+        self.ip_address = ip_address
+        self.control_port = control_port
+        self.command_port = command_port
+
+class ClientPool:
+    def __init__(self):
+        self.clients = []
+
+    def add(self, clientInfo):
+        self.clients.append(clientInfo)
+
+class MissionSpec:
+    def __init__(self, xml = "", validate = True):
+        self.xml = xml.strip()
+        self.simulatedWorld = None  # The world simulated for this mission once it has been started with role 0
+
+    def getAsXML(self, prettyPrint = False):
+        return self.xml
+
+class MissionRecordSpec:
+    """
+    Recordings are not produced by the simulator, so every recording option is accepted and ignored.
+    """
+    def __init__(self, destination = ""):
+        self.destination = destination
+
+    def setDestination(self, destination):
+        self.destination = destination
+
+    def recordRewards(self):
+        pass
+
+    def recordObservations(self):
+        pass
+
+    def recordCommands(self):
+        pass
+
+    def recordMP4(self, framesPerSecond, bitRate):
+        pass
+
+class TimestampedString:
+    def __init__(self, timestamp, text):
+        self.timestamp = timestamp
+        self.text = text
+
+class WorldState:
+    def __init__(self, hasBegun = False, isRunning = False, observations = None, numberOfObservations = 0):
+        self.has_mission_begun = hasBegun
+        self.is_mission_running = isRunning
+        self.observations = observations if observations != None else []
+        self.number_of_observations_since_last_state = numberOfObservations
+        self.rewards = []
+        self.number_of_rewards_since_last_state = 0
+        self.video_frames = []
+        self.number_of_video_frames_since_last_state = 0
+        self.mission_control_messages = []
+        self.errors = []
+
+class AgentHost:
+    """
+    Stand-in for a Malmo AgentHost, connected to a single agent of a simulated world once its mission has been started.
+    """
+
+    def __init__(self):
+        self.world = None       # The SimulatedWorld this host takes part in
+        self.agent = None       # The SimulatedAgent controlled by this host
+        self.__lastTick = -1    # The tick of the last observation returned by getWorldState()
+        self.__arguments = {}   # A mapping of command line argument names to [isFlag, value, description]
+        self.__aliases = {}     # A mapping of short command line argument names to full names
+        self.addOptionalFlag("help,h", "show description of allowed options")
+        self.addOptionalFlag("test", "run this as an integration test")
+
+    # Command line arguments ===================================================================
+
+    def __addArgument__(self, names, description, isFlag, default):
+        names = names.split(",")
+        self.__arguments[names[0]] = [isFlag, default, description]
+        for alias in names[1:]:
+            self.__aliases[alias] = names[0]
+
+    def addOptionalFlag(self, names, description):
+        self.__addArgument__(names, description, True, False)
+
+    def addOptionalStringArgument(self, names, description, default):
+        self.__addArgument__(names, description, False, default)
+
+    def addOptionalIntArgument(self, names, description, default):
+        self.__addArgument__(names, description, False, default)
+
+    def addOptionalFloatArgument(self, names, description, default):
+        self.__addArgument__(names, description, False, default)
+
+    def parse(self, argv):
+        i = 1
+        while i < len(argv):
+            name = argv[i].lstrip("-")
+            name = self.__aliases.get(name, name)
+            if name not in self.__arguments:
+                raise RuntimeError("unrecognised option '{}'".format(argv[i]))
+            argument = self.__arguments[name]
+            if argument[0]:
+                argument[1] = True
+            else:
+                if i + 1 >= len(argv):
+                    raise RuntimeError("the required argument for option '{}' is missing".format(argv[i]))
+                i += 1
+                argument[1] = type(argument[1])(argv[i]) if argument[1] != None else argv[i]
+            argument.append(True)   # Mark the argument as received
+            i += 1
+
+    def receivedArgument(self, name):
+        argument = self.__arguments.get(name)
+        return argument != None and len(argument) > 3
+
+    def getStringArgument(self, name):
+        return self.__arguments[name][1]
+
+    def getIntArgument(self, name):
+        return int(self.__arguments[name][1])
+
+    def getFloatArgument(self, name):
+        return float(self.__arguments[name][1])
+
+    def getUsage(self):
+        return "\n".join("  --{:<20} {}".format(name, argument[2]) for name, argument in self.__arguments.items())
+
+    # Missions =================================================================================
+
+    def startMission(self, mission, clientPool, recording = None, role = 0, experimentId = ""):
+        """
+        Start the mission given in the role given. The mission must first be started with role 0, which creates the
+        simulated world that all other roles join.
+        """
+        if recording == None:   # Called as startMission(mission, recording) for a single agent mission
+            recording = clientPool
+        if self.world != None and self.world.running:
+            raise MissionException(MissionErrorCode.MISSION_ALREADY_RUNNING, "A mission is already running.")
+        if role == 0:
+            mission.simulatedWorld = SimulatedWorld(mission.xml, int(os.environ.get("MALMO_SIMULATOR_SEED", 0)))
+        world = mission.simulatedWorld
+        if world == None:
+            raise MissionException(MissionErrorCode.MISSION_SERVER_NOT_FOUND, "Failed to find the server for this mission.")
+        if role < 0 or role >= len(world.agents):
+            raise MissionException(MissionErrorCode.MISSION_BAD_ROLE_REQUEST, "Role {} is not defined in the mission.".format(role))
+
+        self.world = world
+        self.agent = world.agents[role]
+        self.__lastTick = -1
+        world.join(self.agent)
+
+    def sendCommand(self, command, key = None):
+        if self.agent != None and self.world.running:
+            self.agent.command(command)
+
+    def peekWorldState(self):
+        """
+        Returns the current state of the mission without consuming any observations.
+        """
+        if self.world == None:
+            return WorldState()
+        return WorldState(self.world.hasBegun, self.world.running, numberOfObservations = self.__pendingObservations__())
+
+    def getWorldState(self):
+        """
+        Returns the current state of the mission along with the latest observation, if one was made since the last call.
+        """
+        if self.world == None:
+            return WorldState()
+        pending = self.__pendingObservations__()
+        observations = []
+        if pending > 0:
+            observations.append(TimestampedString(self.world.tick, self.agent.observe()))
+            self.__lastTick = self.world.tick
+        return WorldState(self.world.hasBegun, self.world.running, observations, pending)
+
+    def __pendingObservations__(self):
+        """
+        Internal method that returns the number of ticks simulated since the last observation was returned.
+        """
+        if not self.world.hasBegun:
+            return 0
+        return self.world.tick - self.__lastTick
+
+    def setObservationsPolicy(self, policy):
+        pass
+
+    def setRewardsPolicy(self, policy):
+        pass
+
+    def setVideoPolicy(self, policy):
+        pass
+
+# ==============================================================================================
+# Simulation
+# ==============================================================================================
+
+class SimulatedClock:
+    """
+    The clock that every simulated world runs by. Time only passes while a mission loop or agent waits, at which point every
+    running world is stepped through each tick that falls within the wait, so that missions run as fast as they can be computed.
+    """
+
+    def __init__(self):
+        self.time = 0.0     # The current simulated time in seconds
+        self.worlds = []    # The worlds being simulated
+
+    def now(self):
+        return self.time
+
+    def reset(self):
+        """
+        Return to the start of simulated time and forget every world, so that another mission can be ran in the same process.
+        """
+        self.time = 0.0
+        self.worlds = []
+
+    def sleep(self, seconds):
+        self.time += max(seconds, 0.0)
+        for world in self.worlds:
+            world.advanceTo(self.time)
+        self.worlds = [world for world in self.worlds if world.running]
+
+simulatedClock = SimulatedClock()
+
+class SimulatedEntity:
+    """
+    A mob, agent or item in a simulated world.
+    """
+
+    def __init__(self, name, position, rng, yaw = 0.0, life = 0.0, quantity = None):
+        self.name = name                                                # The mob type, agent name, or item type of this entity
+        self.id = str(uuid.UUID(int=rng.getrandbits(128)))              # The unique id of this entity
+        self.x, self.y, self.z = position.x, position.y, position.z
+        self.yaw = yaw
+        self.pitch = 0.0
+        self.life = life
+        self.quantity = quantity                                        # The size of the stack, for items
+        self.cooldown = 0                                               # Ticks until this entity may next attack, or an item may be picked up
+        self.wanderTicks = 0                                            # Ticks until a mob next decides where to wander
+        self.wanderSpeed = 0.0                                          # The speed a mob is currently wandering at
+
+    def isItem(self):
+        return self.quantity != None
+
+    def toJson(self):
+        entityJson = {"name": self.name, "id": self.id, "x": self.x, "y": self.y, "z": self.z, "yaw": self.yaw, "pitch": self.pitch, "life": self.life}
+        if self.quantity != None:
+            entityJson["quantity"] = self.quantity
+        return entityJson
+
+class SimulatedAgent(SimulatedEntity):
+    """
+    An agent in a simulated world, controlled by the commands sent to its AgentHost.
+    """
+
+    def __init__(self, world, section, rng):
+        name = section.findtext("m:Name", "Agent", MISSION_NAMESPACE)
+        placement = section.find("m:AgentStart/m:Placement", MISSION_NAMESPACE)
+        position = Vector(float(placement.get("x", 0)), float(placement.get("y", 0)), float(placement.get("z", 0))) if placement != None else Vector(0.0, 0.0, 0.0)
+        super(SimulatedAgent, self).__init__(name, position, rng, float(placement.get("yaw", 0)) if placement != None else 0.0, 20.0)
+        self.world = world
+        self.food = 20
+        self.joined = False
+        self.quit = False
+        self.inventory = [None] * NUMBER_OF_INVENTORY_SLOTS     # A list of [type, quantity] slots, or None for empty slots
+        self.currentItemIndex = 0
+        self.controls = {"move": 0.0, "strafe": 0.0, "turn": 0.0, "pitch": 0.0, "jump": 0.0, "crouch": 0.0, "attack": 0.0, "use": 0.0}
+        self.pendingAttack = False
+        self.pendingUse = False
+        self.stats = {"DamageDealt": 0, "MobsKilled": 0, "PlayersKilled": 0, "TimeAlive": 0, "Score": 0, "XP": 0, "DistanceTravelled": 0}
+        self.__observation = None       # The JSON text of the observation for the tick in __observationTick
+        self.__observationTick = -1
+
+        for item in section.findall("m:AgentStart/m:Inventory/m:InventoryItem", MISSION_NAMESPACE):
+            self.inventory[int(item.get("slot"))] = [item.get("type"), int(item.get("quantity", 1))]
+
+        # Observation ranges
+        self.gridMin = (-GRID_OBSERVATION_X_HALF_LEN, -GRID_OBSERVATION_Y_HALF_LEN, -GRID_OBSERVATION_Z_HALF_LEN)
+        self.gridMax = (GRID_OBSERVATION_X_HALF_LEN, GRID_OBSERVATION_Y_HALF_LEN, GRID_OBSERVATION_Z_HALF_LEN)
+        self.gridName = None
+        grid = section.find("m:AgentHandlers/m:ObservationFromGrid/m:Grid", MISSION_NAMESPACE)
+        if grid != None:
+            self.gridName = grid.get("name")
+            gridMin, gridMax = grid.find("m:min", MISSION_NAMESPACE), grid.find("m:max", MISSION_NAMESPACE)
+            self.gridMin = tuple(int(gridMin.get(axis)) for axis in ("x", "y", "z"))
+            self.gridMax = tuple(int(gridMax.get(axis)) for axis in ("x", "y", "z"))
+        self.entityRange = None
+        self.entityRangeName = None
+        entityRange = section.find("m:AgentHandlers/m:ObservationFromNearbyEntities/m:Range", MISSION_NAMESPACE)
+        if entityRange != None:
+            self.entityRangeName = entityRange.get("name")
+            self.entityRange = tuple(float(entityRange.get(axis)) for axis in ("xrange", "yrange", "zrange"))
+
+    def command(self, command):
+        """
+        Apply a command sent by the AgentHost.
+        """
+        parts = command.split(" ")
+        if parts[0] in self.controls and len(parts) == 2:
+            value = float(parts[1])
+            if parts[0] == "attack" and value == 1:
+                self.pendingAttack = True   # Even a brief press of attack strikes once, as a click does in Minecraft
+            if parts[0] == "use" and value == 1 and self.controls["use"] != 1:
+                self.pendingUse = True
+            self.controls[parts[0]] = value
+        elif parts[0].startswith("hotbar.") and len(parts) == 2:
+            if parts[1] == "1":
+                self.currentItemIndex = int(parts[0].split(".")[1]) - 1
+        elif parts[0] == "swapInventoryItems" and len(parts) == 3:
+            a, b = int(parts[1]), int(parts[2])
+            self.inventory[a], self.inventory[b] = self.inventory[b], self.inventory[a]
+        elif parts[0] == "discardCurrentItem":
+            self.world.throwItem(self)
+        elif parts[0] == "craft" and len(parts) == 2:
+            self.addItem(parts[1], 1)
+        elif parts[0] == "quit":
+            self.quit = True
+
+    def addItem(self, itemType, quantity):
+        """
+        Add items to the first slots able to hold them. Returns the quantity that did not fit.
+        """
+        for i in range(0, NUMBER_OF_CARRIED_SLOTS):
+            slot = self.inventory[i]
+            if slot != None and slot[0] == itemType and slot[1] < MAX_STACK_SIZE:
+                amount = min(quantity, MAX_STACK_SIZE - slot[1])
+                slot[1] += amount
+                quantity -= amount
+            if quantity == 0:
+                return 0
+        for i in range(0, NUMBER_OF_CARRIED_SLOTS):
+            if self.inventory[i] == None:
+                amount = min(quantity, MAX_STACK_SIZE)
+                self.inventory[i] = [itemType, amount]
+                quantity -= amount
+            if quantity == 0:
+                return 0
+        return quantity
+
+    def removeCurrentItem(self):
+        """
+        Remove one of the currently held item from this agent's inventory, and return its type. Returns None if no item is held.
+        """
+        slot = self.inventory[self.currentItemIndex]
+        if slot == None:
+            return None
+        slot[1] -= 1
+        if slot[1] == 0:
+            self.inventory[self.currentItemIndex] = None
+        return slot[0]
+
+    def heldItemType(self):
+        slot = self.inventory[self.currentItemIndex]
+        return slot[0] if slot != None else None
+
+    def observe(self):
+        """
+        Returns the JSON text of this agent's observation of the current tick, built once per tick.
+        """
+        if self.__observationTick == self.world.tick:
+            return self.__observation
+
+        observation = {
+            "Name": self.name, "XPos": self.x, "YPos": self.y, "ZPos": self.z, "Yaw": self.yaw, "Pitch": self.pitch,
+            "Life": self.life, "Food": self.food, "Air": 300, "IsAlive": self.life > 0,
+            "WorldTime": self.world.tick, "TotalTime": self.world.tick, "currentItemIndex": self.currentItemIndex,
+            "inventory": [{"type": slot[0], "index": i, "quantity": slot[1], "inventory": "inventory"} for i, slot in enumerate(self.inventory) if slot != None]
+        }
+        observation.update(self.stats)
+        if self.gridName != None:
+            observation[self.gridName] = self.world.blockGridAround(self, self.gridMin, self.gridMax)
+        if self.entityRangeName != None:
+            xRange, yRange, zRange = self.entityRange
+            observation[self.entityRangeName] = [entity.toJson() for entity in self.world.allEntities()
+                                                 if abs(entity.x - self.x) <= xRange and abs(entity.y - self.y) <= yRange and abs(entity.z - self.z) <= zRange]
+
+        self.__observation = json.dumps(observation)
+        self.__observationTick = self.world.tick
+        return self.__observation
+
+class SimulatedWorld:
+    """
+    A flat world built from a mission XML, holding the agents, mobs and items of a single simulated mission.
+    """
+
+    def __init__(self, missionXML, seed = 0):
+        root = ElementTree.fromstring(missionXML)
+        self.rng = random.Random(seed)                  # Random number generator for all of the world's decisions, so each run is repeatable
+        self.tick = 0                                   # The number of ticks simulated since all agents joined
+        self.startTime = None                           # The simulated time at which all agents joined
+        self.hasBegun = False
+        self.running = False
+        self.blocks = {}                                # A mapping of (x, y, z) positions to the types of blocks drawn by the mission
+        self.layers = ["bedrock", "dirt", "dirt", "grass"]  # The block types of each layer of the flat world, from y = 0 upwards
+        self.mobs = []
+        self.items = []
+
+        timeUp = root.find("m:ServerSection/m:ServerHandlers/m:ServerQuitFromTimeUp", MISSION_NAMESPACE)
+        self.tickLimit = int(float(timeUp.get("timeLimitMs")) * TICKS_PER_SECOND / 1000) if timeUp != None else None
+
+        generator = root.find("m:ServerSection/m:ServerHandlers/m:FlatWorldGenerator", MISSION_NAMESPACE)
+        if generator != None:
+            self.__parseGeneratorString__(generator.get("generatorString", ""))
+        decorator = root.find("m:ServerSection/m:ServerHandlers/m:DrawingDecorator", MISSION_NAMESPACE)
+        if decorator != None:
+            for draw in decorator:
+                self.__draw__(draw)
+
+        self.agents = [SimulatedAgent(self, section, self.rng) for section in root.findall("m:AgentSection", MISSION_NAMESPACE)]
+
+    def __parseGeneratorString__(self, generatorString):
+        """
+        Internal method that builds the layers of the flat world from a Minecraft superflat generator string (ie. "3;7,2*3,2;1;").
+        """
+        parts = generatorString.split(";")
+        if len(parts) < 2 or parts[1] == "":
+            return
+        self.layers = []
+        for layer in parts[1].split(","):
+            count, blockId = layer.split("*") if "*" in layer else ("1", layer)
+            self.layers.extend([FLAT_WORLD_BLOCK_IDS.get(blockId.split(":")[0], "stone")] * int(count))
+
+    def __draw__(self, draw):
+        """
+        Internal method that applies a single element of a DrawingDecorator to the world.
+        """
+        tag = draw.tag.split("}")[-1]
+        get = lambda name: int(float(draw.get(name)))
+        if tag == "DrawBlock":
+            self.blocks[(get("x"), get("y"), get("z"))] = draw.get("type")
+        elif tag == "DrawCuboid":
+            x1, x2 = sorted((get("x1"), get("x2")))
+            y1, y2 = sorted((get("y1"), get("y2")))
+            z1, z2 = sorted((get("z1"), get("z2")))
+            for x in range(x1, x2 + 1):
+                for y in range(y1, y2 + 1):
+                    for z in range(z1, z2 + 1):
+                        self.blocks[(x, y, z)] = draw.get("type")
+        elif tag == "DrawLine":
+            start, end = (get("x1"), get("y1"), get("z1")), (get("x2"), get("y2"), get("z2"))
+            steps = max(abs(end[i] - start[i]) for i in range(0, 3))
+            for step in range(0, steps + 1):
+                t = step / float(steps) if steps > 0 else 0.0
+                self.blocks[tuple(int(round(start[i] + (end[i] - start[i]) * t)) for i in range(0, 3))] = draw.get("type")
+        elif tag == "DrawSphere":
+            cx, cy, cz, radius = get("x"), get("y"), get("z"), get("radius")
+            for x in range(cx - radius, cx + radius + 1):
+                for y in range(cy - radius, cy + radius + 1):
+                    for z in range(cz - radius, cz + radius + 1):
+                        if (x - cx) ** 2 + (y - cy) ** 2 + (z - cz) ** 2 <= radius ** 2:
+                            self.blocks[(x, y, z)] = draw.get("type")
+        elif tag == "DrawItem":
+            self.items.append(SimulatedEntity(draw.get("type"), Vector(get("x") + 0.5, get("y"), get("z") + 0.5), self.rng, quantity=1))
+        elif tag == "DrawEntity":
+            mobType = draw.get("type")
+            self.mobs.append(SimulatedEntity(mobType, Vector(float(draw.get("x")), float(draw.get("y")), float(draw.get("z"))), self.rng,
+                                             self.rng.uniform(-180.0, 180.0), float(MOB_HEALTH.get(mobType, DEFAULT_MOB_HEALTH))))
+
+    def join(self, agent):
+        """
+        Mark an agent as having joined the mission. The mission begins once every agent has joined.
+        """
+        agent.joined = True
+        if all(a.joined for a in self.agents):
+            self.hasBegun = True
+            self.running = True
+            self.startTime = simulatedClock.now()
+            simulatedClock.worlds.append(self)
+
+    def allEntities(self):
+        return self.agents + self.mobs + self.items
+
+    def blockAt(self, x, y, z):
+        """
+        Returns the type of block at the integer position given.
+        """
+        block = self.blocks.get((x, y, z))
+        if block != None:
+            return block
+        return self.layers[y] if 0 <= y < len(self.layers) else "air"
+
+    def isPassable(self, x, y, z):
+        """
+        Returns true if an entity standing at the position given would not be inside of a solid block.
+        """
+        bx, by, bz = int(math.floor(x)), int(math.floor(y)), int(math.floor(z))
+        return self.blockAt(bx, by, bz) in PASSABLE_BLOCKS and self.blockAt(bx, by + 1, bz) in PASSABLE_BLOCKS
+
+    def blockGridAround(self, agent, gridMin, gridMax):
+        """
+        Returns a flat list of the block types surrounding an agent, ordered by x, then z, then y, as observed by Malmo.
+        """
+        bx, by, bz = int(math.floor(agent.x)), int(math.floor(agent.y)), int(math.floor(agent.z))
+        return [self.blockAt(bx + x, by + y, bz + z)
+                for y in range(gridMin[1], gridMax[1] + 1)
+                for z in range(gridMin[2], gridMax[2] + 1)
+                for x in range(gridMin[0], gridMax[0] + 1)]
+
+    def advanceTo(self, time):
+        """
+        Step the world through every tick that has begun by the simulated time given. The simulated time is a sum of many
+        waits, so a tick that is due may be reached a rounding error early, which is tolerated.
+        """
+        targetTick = math.floor((time - self.startTime) * TICKS_PER_SECOND + TICK_TOLERANCE)
+        while self.running and self.tick < targetTick:
+            self.step()
+
+    def step(self):
+        """
+        Simulate a single tick of the world.
+        """
+        for agent in self.agents:
+            self.__stepAgent__(agent)
+        for mob in self.mobs:
+            self.__stepMob__(mob)
+        for item in self.items:
+            item.cooldown -= 1
+        self.__pickUpItems__()
+
+        self.tick += 1
+        if any(agent.quit for agent in self.agents) or (self.tickLimit != None and self.tick >= self.tickLimit):
+            self.running = False
+
+    def __move__(self, entity, dx, dz):
+        """
+        Internal method that moves an entity horizontally, stopping along each axis that would move it into a solid block.
+        Returns the distance moved.
+        """
+        startX, startZ = entity.x, entity.z
+        if dx != 0 and self.isPassable(entity.x + dx, entity.y, entity.z):
+            entity.x += dx
+        if dz != 0 and self.isPassable(entity.x, entity.y, entity.z + dz):
+            entity.z += dz
+        return math.sqrt((entity.x - startX) ** 2 + (entity.z - startZ) ** 2)
+
+    def __stepAgent__(self, agent):
+        """
+        Internal method that applies the continuous commands of an agent for a single tick.
+        """
+        if agent.life <= 0:
+            return
+        dt = 1.0 / TICKS_PER_SECOND
+        agent.stats["TimeAlive"] += 1
+        controls = agent.controls
+
+        # Turning
+        agent.yaw += controls["turn"] * TURN_SPEED * dt
+        agent.yaw = (agent.yaw + 180.0) % 360.0 - 180.0
+        agent.pitch = max(-90.0, min(90.0, agent.pitch + controls["pitch"] * TURN_SPEED * dt))
+
+        # Movement
+        speed = WALK_SPEED * dt * (0.3 if controls["crouch"] == 1 else 1.0)
+        yaw = math.radians(agent.yaw)
+        dx = (-math.sin(yaw) * controls["move"] - math.cos(yaw) * controls["strafe"]) * speed
+        dz = (math.cos(yaw) * controls["move"] - math.sin(yaw) * controls["strafe"]) * speed
+        if dx != 0 or dz != 0:
+            agent.stats["DistanceTravelled"] += self.__move__(agent, dx, dz)
+
+        # Attacking
+        agent.cooldown -= 1
+        if (agent.pendingAttack or controls["attack"] == 1) and agent.cooldown <= 0:
+            agent.pendingAttack = False
+            agent.cooldown = AGENT_ATTACK_COOLDOWN
+            self.__strike__(agent)
+
+        # Using (placing the held block in front of the agent)
+        if agent.pendingUse:
+            agent.pendingUse = False
+            heldType = agent.heldItemType()
+            if heldType != None and isBlock(heldType):
+                x, z = int(math.floor(agent.x - math.sin(yaw))), int(math.floor(agent.z + math.cos(yaw)))
+                y = int(math.floor(agent.y))
+                if self.blockAt(x, y, z) in PASSABLE_BLOCKS:
+                    self.blocks[(x, y, z)] = agent.removeCurrentItem()
+
+    def __strike__(self, agent):
+        """
+        Internal method that has an agent strike the nearest mob within reach that it is facing.
+        """
+        yaw = math.radians(agent.yaw)
+        lookX, lookZ = -math.sin(yaw), math.cos(yaw)
+        target, targetDistance = None, None
+        for mob in self.mobs:
+            dx, dy, dz = mob.x - agent.x, mob.y - (agent.y + 1), mob.z - agent.z
+            distance = math.sqrt(dx * dx + dy * dy + dz * dz)
+            horizontal = math.sqrt(dx * dx + dz * dz)
+            if distance > AGENT_REACH or (targetDistance != None and distance >= targetDistance):
+                continue
+            if horizontal > 0 and math.degrees(math.acos(max(-1.0, min(1.0, (dx * lookX + dz * lookZ) / horizontal)))) > AGENT_ATTACK_ANGLE:
+                continue
+            target, targetDistance = mob, distance
+        if target == None:
+            return
+
+        damage = WEAPON_DAMAGE.get(agent.heldItemType(), DEFAULT_ATTACK_DAMAGE)
+        target.life -= damage
+        agent.stats["DamageDealt"] += damage
+        if target.life <= 0:
+            self.mobs.remove(target)
+            agent.stats["MobsKilled"] += 1
+            agent.stats["XP"] += self.rng.randint(1, 3)
+            for itemType, quantity in MOB_DROPS.get(target.name, []):
+                self.items.append(SimulatedEntity(itemType, Vector(target.x, target.y, target.z), self.rng, quantity=quantity))
+
+    def __stepMob__(self, mob):
+        """
+        Internal method that moves a mob for a single tick. Hostile mobs chase and attack the nearest agent within range,
+        while all other mobs wander randomly.
+        """
+        dt = 1.0 / TICKS_PER_SECOND
+        mob.cooldown -= 1
+        if isHostileMob(mob.name):
+            living = [agent for agent in self.agents if agent.life > 0]
+            nearest = min(living, key=lambda agent: (agent.x - mob.x) ** 2 + (agent.z - mob.z) ** 2) if len(living) > 0 else None
+            if nearest != None:
+                dx, dz = nearest.x - mob.x, nearest.z - mob.z
+                distance = math.sqrt(dx * dx + dz * dz)
+                if distance <= MOB_ATTACK_RANGE:
+                    if mob.cooldown <= 0:
+                        mob.cooldown = MOB_ATTACK_COOLDOWN
+                        nearest.life = max(0.0, nearest.life - MOB_ATTACK_DAMAGE)
+                    return
+                if distance <= MOB_CHASE_RANGE:
+                    mob.yaw = math.degrees(math.atan2(-dx, dz))
+                    self.__move__(mob, dx / distance * MOB_CHASE_SPEED * dt, dz / distance * MOB_CHASE_SPEED * dt)
+                    return
+
+        # Wander
+        mob.wanderTicks -= 1
+        if mob.wanderTicks <= 0:
+            mob.wanderTicks = self.rng.randint(20, 80)
+            mob.wanderSpeed = MOB_WALK_SPEED if self.rng.random() < 0.5 else 0.0
+            mob.yaw = self.rng.uniform(-180.0, 180.0)
+        if mob.wanderSpeed > 0:
+            yaw = math.radians(mob.yaw)
+            self.__move__(mob, -math.sin(yaw) * mob.wanderSpeed * dt, math.cos(yaw) * mob.wanderSpeed * dt)
+
+    def throwItem(self, agent):
+        """
+        Throw one of the item currently held by an agent a short distance in front of it.
+        """
+        itemType = agent.removeCurrentItem()
+        if itemType == None:
+            return
+        yaw = math.radians(agent.yaw)
+        item = SimulatedEntity(itemType, Vector(agent.x - math.sin(yaw) * 2.0, agent.y, agent.z + math.cos(yaw) * 2.0), self.rng, quantity=1)
+        item.cooldown = PICK_UP_DELAY
+        self.items.append(item)
+
+    def __pickUpItems__(self):
+        """
+        Internal method that moves items on the ground into the inventory of any agent standing close enough to them.
+        """
+        for item in list(self.items):
+            if item.cooldown > 0:
+                continue
+            for agent in self.agents:
+                if agent.life > 0 and abs(agent.y - item.y) < 2 and (agent.x - item.x) ** 2 + (agent.z - item.z) ** 2 <= PICK_UP_RANGE ** 2:
+                    item.quantity = agent.addItem(item.name, item.quantity)
+                    if item.quantity == 0:
+                        self.items.remove(item)
+                        break
+
+# ==============================================================================================
+# Installation
+# ==============================================================================================
+
+def install():
+    """
+    Install the simulator in place of MalmoPython, so that any later 'import MalmoPython' loads this module instead,
+    and replace the mission Clock with the simulated clock.
+    """
+    sys.modules["MalmoPython"] = sys.modules[__name__]
+    Clock.now = simulatedClock.now
+    Clock.sleep = simulatedClock.sleep
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python MalmoSimulator.py <missionScript> [args...]")
+        exit(1)
+    install()
+    sys.argv = sys.argv[1:]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(sys.argv[0])))
+    runpy.run_path(sys.argv[0], run_name="__main__")
@@ -0,0 +1,95 @@
+# ==============================================================================================
+# This file contains the MissionCache class, an on-disk cache of mission XML keyed by the hash
+# of the scenario that produced it, so that repeated runs of the same mission do not need to
+# render its XML again. The cache is bounded in size, evicting the least recently used missions.
+# ==============================================================================================
+import json
+import os
+import re
+import tempfile
+from Utils import *
+
+# A mission stored in the cache, holding both the XML as rendered by the ScenarioBuilder and a compacted form of it that can
+# be given to a MissionSpec directly
+CachedMission = namedtuple("CachedMission", "xml missionSpecXML")
+
+class MissionCache:
+    """
+    On-disk cache of mission XML, with one file per mission named by the hash of its scenario. Whenever the total size of
+    the cache exceeds its limit, the missions that were least recently used are removed. Writes are atomic, so a cache
+    directory can be shared by missions running at the same time.
+    """
+
+    def __init__(self, directory = os.path.join("cache", "missions"), maxSize = 32 * 1024 * 1024):
+        self.directory = directory      # The directory containing the cached missions
+        self.maxSize = maxSize          # The maximum total size of the cached missions, in bytes
+
+    def __getPath__(self, key):
+        """
+        Internal method that returns the path to the file of the mission with the key given.
+        """
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key):
+        """
+        Returns the CachedMission stored under the key given, or None if there is no such mission in the cache.
+        """
+        path = self.__getPath__(key)
+        try:
+            with open(path) as file:
+                contents = json.load(file)
+            os.utime(path)      # Mark the mission as most recently used
+        except (IOError, OSError, ValueError):
+            return None
+        return CachedMission(contents["xml"], contents["missionSpecXML"])
+
+    def put(self, key, xml):
+        """
+        Store the XML of a mission under the key given, along with the form of it given to a MissionSpec, evicting the least
+        recently used missions if the cache has grown too large. Returns the CachedMission stored.
+        """
+        mission = CachedMission(xml, re.sub(r">\s+<", "><", xml.strip()))
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory, exist_ok = True)
+        descriptor, temporaryPath = tempfile.mkstemp(dir = self.directory, suffix = ".tmp")
+        with os.fdopen(descriptor, "w") as file:
+            json.dump({"xml": mission.xml, "missionSpecXML": mission.missionSpecXML}, file)
+        os.chmod(temporaryPath, 0o644)
+        os.replace(temporaryPath, self.__getPath__(key))
+        self.__evict__()
+        return mission
+
+    def __evict__(self):
+        """
+        Internal method that removes the least recently used missions until the total size of the cache is within its limit.
+        """
+        entries = []    # A list of (last used time, size, path) tuples
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue    # Removed by another mission in the meantime
+            entries.append((status.st_mtime, status.st_size, path))
+
+        totalSize = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if totalSize <= self.maxSize:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            totalSize -= size
+
+    def clear(self):
+        """
+        Remove every mission from the cache.
+        """
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                os.remove(os.path.join(self.directory, name))
@@ -0,0 +1,108 @@
+# ==============================================================================================
+# This file contains the MissionLoop class, a reusable driver for the main loop of a mission that
+# runs the actions of each agent at a fixed tick rate instead of spinning as fast as possible.
+# ==============================================================================================
+import time
+from Utils import *
+
+class MissionLoop:
+    """
+    Driver for the main loop of a mission. Each registered callback is ran once per tick for as long as the mission of any of
+    the given agents is still running. Ticks either occur at a fixed rate, or, when waking on observations, as soon as any agent
+    receives a new observation. Commands sent by the agents during a tick are batched and sent together at the end of the tick.
+    """
+
+    def __init__(self, agents, tickRate = 20, wakeOnObservation = False):
+        self.agents = agents                        # The list of agents taking part in this mission
+        self.tickRate = tickRate                    # The number of ticks to run per second (when waking on observations, the tick budget)
+        self.wakeOnObservation = wakeOnObservation  # Whether to run the next tick as soon as a new observation arrives, rather than at a fixed rate
+        self.pollInterval = 0.002                   # How long to sleep between checks for a new observation when waking on observations
+        self.callbacks = []                         # A list of (Action, Agent) tuples to run each tick, where the agent may be None
+
+        # Tick statistics
+        self.tickCount = 0                          # The number of ticks that have been ran
+        self.overrunCount = 0                       # The number of ticks that took longer than the time allotted to a tick
+        self.totalTickTime = 0.0                    # The total amount of time spent running callbacks, in seconds
+        self.maxTickTime = 0.0                      # The longest amount of time spent running callbacks for a single tick, in seconds
+
+    def addCallback(self, function, args = None, agent = None):
+        """
+        Register a function to be ran once per tick, along with an optional list of arguments. If an agent is given, the
+        function is only ran while that agent's mission is still running.
+        """
+        self.callbacks.append((Action(function, args if args != None else []), agent))
+
+    def __getActiveAgents__(self):
+        """
+        Internal method that returns a list of the agents in this loop whose mission is still running.
+        """
+        return [agent for agent in self.agents if agent.isMissionActive()]
+
+    def __waitForObservation__(self):
+        """
+        Internal method that waits until any agent has received an observation that has not yet been read, or until the mission has ended for all agents.
+        """
+        while True:
+            worldStates = [agent.host.peekWorldState() for agent in self.agents]
+            if any(w.number_of_observations_since_last_state > 0 for w in worldStates) or not any(w.is_mission_running for w in worldStates):
+                return
+            Clock.sleep(self.pollInterval)
+
+    def __runTick__(self, activeAgents):
+        """
+        Internal method that runs each registered callback once, and then sends all commands queued by the agents.
+        """
+        for callback, agent in self.callbacks:
+            if agent == None or agent in activeAgents:
+                callback.function(*callback.args)
+        for agent in self.agents:
+            agent.commands.flush()
+
+    def run(self):
+        """
+        Run ticks until the mission has ended for all agents.
+        """
+        tickLength = 1.0 / self.tickRate
+        for agent in self.agents:
+            agent.commands.reset()  # The mission has just started, so no continuous command holds a value yet
+            agent.commands.batching = True
+
+        nextTickTime = Clock.now()
+        activeAgents = self.__getActiveAgents__()
+        while len(activeAgents) > 0:
+            tickStartTime = time.time()
+            self.__runTick__(activeAgents)
+            tickTime = time.time() - tickStartTime
+
+            # Record statistics for this tick
+            self.tickCount += 1
+            self.totalTickTime += tickTime
+            self.maxTickTime = max(self.maxTickTime, tickTime)
+            if tickTime > tickLength:
+                self.overrunCount += 1
+
+            # Wait for the next tick (by the mission clock, which may be simulated, whereas tick statistics are always measured in real time)
+            if self.wakeOnObservation:
+                self.__waitForObservation__()
+            else:
+                nextTickTime += tickLength
+                currentTime = Clock.now()
+                if nextTickTime > currentTime:
+                    Clock.sleep(nextTickTime - currentTime)
+                else:
+                    nextTickTime = currentTime  # Overran the tick, so start over from now rather than running several ticks back-to-back to catch up
+            activeAgents = self.__getActiveAgents__()
+
+        for agent in self.agents:
+            agent.commands.flush()
+            agent.commands.batching = False
+
+    def printStatistics(self):
+        """
+        Print out statistics on the ticks that have been ran by this loop.
+        """
+        averageTickTime = self.totalTickTime / self.tickCount if self.tickCount > 0 else 0.0
+        print("Ticks ran: {}".format(self.tickCount))
+        print("Ticks overrun: {} ({:.1f}%)".format(self.overrunCount, 100.0 * self.overrunCount / self.tickCount if self.tickCount > 0 else 0.0))
+        print("Average tick time: {:.2f} ms".format(averageTickTime * 1000))
+        print("Longest tick time: {:.2f} ms".format(self.maxTickTime * 1000))
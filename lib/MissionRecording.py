@@ -0,0 +1,159 @@
+# ==============================================================================================
+# This file contains classes for recording every world state and command of an agent during a
+# mission, and for replaying those recordings at full speed without Minecraft. Run a mission
+# script while recording or replaying with:
+#     python MissionRecording.py record <recordingDir> <missionScript> [args...]
+#     python MissionRecording.py replay <recordingDir> <missionScript> [args...]
+# ==============================================================================================
+import atexit
+import gzip
+import json
+import os
+import runpy
+import sys
+import time
+import types
+import MalmoSimulator
+from Utils import *
+
+RECORDING_FILE_NAME = "agent{}.rec.gz"  # The name of the recording for each agent, numbered in the order agents are created
+
+class RecordingAgentHost:
+    """
+    Wrapper for a Malmo AgentHost that records the result of every call to getWorldState() and every command sent to a
+    compressed file, one JSON record per line. Everything else is passed through to the wrapped AgentHost.
+    """
+
+    def __init__(self, host, filename):
+        self.host = host                                # The wrapped Malmo AgentHost
+        self.file = gzip.open(filename, "wt")           # The recording being written
+        self.startTime = time.time()                    # The time recording began, which each record is timestamped relative to
+        atexit.register(self.close)
+
+    def __getattr__(self, name):
+        return getattr(self.host, name)
+
+    def __write__(self, kind, value):
+        """
+        Internal method that writes a single record of the kind given ("w" for a world state, or "c" for a command).
+        """
+        self.file.write(json.dumps([kind, round(time.time() - self.startTime, 4), value]) + "\n")
+
+    def getWorldState(self):
+        worldState = self.host.getWorldState()
+        text = worldState.observations[-1].text if len(worldState.observations) > 0 else None
+        self.__write__("w", [worldState.number_of_observations_since_last_state, worldState.is_mission_running, text])
+        return worldState
+
+    def sendCommand(self, command, *args):
+        self.host.sendCommand(command, *args)
+        self.__write__("c", command)
+
+    def close(self):
+        """
+        Close the recording. This is done automatically when the program exits.
+        """
+        if not self.file.closed:
+            self.file.close()
+
+class ReplayAgentHost(MalmoSimulator.AgentHost):
+    """
+    Stand-in for a Malmo AgentHost that returns the world states of a recording in the order they were recorded, one
+    per call to getWorldState(), without waiting. The mission is running until every recorded world state has been returned.
+    Commands sent are collected so they can be compared with the commands that were recorded.
+    """
+
+    def __init__(self, filename):
+        super(ReplayAgentHost, self).__init__()
+        self.worldStates = []           # A list of recorded (timestamp, observation count, is mission running, observation text) tuples
+        self.recordedCommands = []      # A list of the commands sent during the recording
+        self.sentCommands = []          # A list of the commands sent during the replay
+        self.__next = 0                 # The index of the next world state to return
+        with gzip.open(filename, "rt") as file:
+            for line in file:
+                kind, timestamp, value = json.loads(line)
+                if kind == "w":
+                    self.worldStates.append((timestamp, value[0], value[1], value[2]))
+                elif kind == "c":
+                    self.recordedCommands.append(value)
+
+    def startMission(self, *args):
+        self.__next = 0
+        self.sentCommands = []
+
+    def sendCommand(self, command, key = None):
+        self.sentCommands.append(command)
+
+    def peekWorldState(self):
+        if self.__next >= len(self.worldStates):
+            return MalmoSimulator.WorldState(True, False)
+        _, count, isRunning, _ = self.worldStates[self.__next]
+        return MalmoSimulator.WorldState(True, isRunning, numberOfObservations = count)
+
+    def getWorldState(self):
+        if self.__next >= len(self.worldStates):
+            return MalmoSimulator.WorldState(True, False)
+        timestamp, count, isRunning, text = self.worldStates[self.__next]
+        self.__next += 1
+        observations = [MalmoSimulator.TimestampedString(timestamp, text)] if text != None else []
+        return MalmoSimulator.WorldState(True, isRunning, observations, count)
+
+    def firstCommandMismatch(self):
+        """
+        Returns the index of the first command sent during the replay that differs from the recording, or None if all commands match.
+        """
+        for i in range(0, max(len(self.sentCommands), len(self.recordedCommands))):
+            if i >= len(self.sentCommands) or i >= len(self.recordedCommands) or self.sentCommands[i] != self.recordedCommands[i]:
+                return i
+        return None
+
+def __installHosts__(baseModule, createHost):
+    """
+    Internal function that installs a copy of a MalmoPython module in its place, whose AgentHost class is replaced by the
+    function given. The function is passed the index of each agent host in the order they are created.
+    """
+    module = types.ModuleType("MalmoPython")
+    module.__dict__.update({name: value for name, value in vars(baseModule).items() if not name.startswith("__")})
+    hosts = []
+    def agentHost():
+        host = createHost(len(hosts))
+        hosts.append(host)
+        return host
+    module.AgentHost = agentHost
+    sys.modules["MalmoPython"] = module
+    return hosts
+
+def main():
+    if len(sys.argv) < 4 or sys.argv[1] not in ["record", "replay"]:
+        print("Usage: python MissionRecording.py <record | replay> <recordingDir> <missionScript> [args...]")
+        exit(1)
+    mode, directory, script = sys.argv[1], sys.argv[2], sys.argv[3]
+    filename = lambda index: os.path.join(directory, RECORDING_FILE_NAME.format(index))
+
+    if mode == "record":
+        import MalmoPython
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        hosts = __installHosts__(MalmoPython, lambda index: RecordingAgentHost(MalmoPython.AgentHost(), filename(index)))
+    else:
+        hosts = __installHosts__(MalmoSimulator, lambda index: ReplayAgentHost(filename(index)))
+        Clock.now = MalmoSimulator.simulatedClock.now       # Waits are skipped in replays, by only advancing simulated time
+        Clock.sleep = MalmoSimulator.simulatedClock.sleep
+
+    sys.argv = sys.argv[3:]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+    startTime = time.process_time()
+    runpy.run_path(script, run_name="__main__")
+    cpuTime = time.process_time() - startTime
+
+    if mode == "replay":
+        totalWorldStates = sum(len(host.worldStates) for host in hosts)
+        print()
+        print("Replay CPU time: {:.3f} s ({:.3f} ms per world state replayed)".format(cpuTime, 1000 * cpuTime / max(totalWorldStates, 1)))
+        for i, host in enumerate(hosts):
+            mismatch = host.firstCommandMismatch()
+            print("Agent {}: {} world states replayed, {} commands sent, {}".format(i, len(host.worldStates), len(host.sentCommands),
+                  "all matching the recording" if mismatch == None else "first differing from the recording at command {}".format(mismatch)))
+
+if __name__ == "__main__":
+    main()
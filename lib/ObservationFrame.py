@@ -0,0 +1,112 @@
+# ==============================================================================================
+# This file holds the ObservationFrame class, representing a single JSON observation received
+# by an agent. Each observation is parsed exactly once and then shared by every query made on
+# the agent until the next observation arrives.
+# ==============================================================================================
+import json
+from Utils import *
+from BlockGrid import *
+
+# The entity type strings belonging to each category of entity, used to classify every nearby entity in a single pass
+CATEGORY_TYPES = {
+    EntityCategory.Mob          : frozenset(mob.value for mob in MobType.All),
+    EntityCategory.PeacefulMob  : frozenset(mob.value for mob in MobType.Peaceful),
+    EntityCategory.HostileMob   : frozenset(mob.value for mob in MobType.Hostile),
+    EntityCategory.FoodMob      : frozenset(mob.value for mob in MobType.Food),
+    EntityCategory.FoodItem     : frozenset(item.value for item in ItemType.Food)
+}
+
+class ObservationFrame:
+    """
+    A single parsed JSON observation of an agent's world state. Frames are numbered in the order they are received by an
+    agent, so information derived from an observation can be cached on the frame it was computed from and reused until
+    a frame with a newer sequence number replaces it.
+    """
+
+    def __init__(self, text, sequence):
+        self.sequence = sequence        # The number of this frame in the order the agent received its observations
+        self.json = json.loads(text)    # The parsed JSON observation
+        self.__entities = None          # A list of EntityInfo tuples for the nearby entities, built on first request
+        self.nearestEntities = None     # A dictionary mapping each EntityCategory to its NearestEntity, built on first request by nearestByCategory()
+        self.__entityIndex = None       # A dictionary mapping entity ids to EntityInfo tuples for the nearby entities, built on first request
+        self.__blockGrid = None         # The decoded BlockGrid of nearby blocks, built on first request
+
+    def __getitem__(self, key):
+        """
+        Returns the value of an attribute in this observation (ie. "XPos", "Life", "inventory").
+        """
+        return self.json[key]
+
+    def get(self, key, default = None):
+        """
+        Returns the value of an attribute in this observation, or the default given if the attribute is not present.
+        """
+        return self.json.get(key, default)
+
+    def getPosition(self):
+        """
+        Returns the Vector position of the observing agent's head in this frame.
+        """
+        return Vector(self.json["XPos"], self.json["YPos"] + 1, self.json["ZPos"])   # Agent's head is above the agent's location
+
+    def getNearbyEntities(self):
+        """
+        Returns a list of named EntityInfo tuples of all entities observed nearby in this frame.
+        The list is shared by all callers for this frame, and should not be modified.
+        """
+        if self.__entities == None:
+            self.__entities = [EntityInfo("{}{}".format(k["name"], numerifyId(k["id"]).replace("-", "")), k["name"], Vector(k["x"], k["y"], k["z"]), k.get("quantity")) for k in self.json["nearby_entities"]]
+        return self.__entities
+
+    def getEntityIndex(self):
+        """
+        Returns a dictionary mapping the id of each entity observed nearby in this frame to its EntityInfo tuple.
+        The dictionary is shared by all callers for this frame, and should not be modified.
+        """
+        if self.__entityIndex == None:
+            self.__entityIndex = {entity.id: entity for entity in self.getNearbyEntities()}
+        return self.__entityIndex
+
+    def resolveIds(self, entityIds):
+        """
+        Returns a list containing the EntityInfo tuple for each of the entity ids given, as observed in this frame.
+        The entry for an id that was not observed nearby is None.
+        """
+        entityIndex = self.getEntityIndex()
+        return [entityIndex.get(entityId) for entityId in entityIds]
+
+    def getBlockGrid(self):
+        """
+        Returns the decoded BlockGrid of blocks surrounding the observing agent in this frame, centered on the agent's position.
+        Returns None if this frame does not contain a grid observation.
+        """
+        if self.__blockGrid == None:
+            blocks = self.json.get(u'blockgrid')
+            if blocks == None:
+                return None
+            self.__blockGrid = BlockGrid(blocks, self.getPosition())
+        return self.__blockGrid
+
+def nearestByCategory(frame):
+    """
+    Returns a dictionary mapping each EntityCategory to a NearestEntity tuple holding the entity of that category nearest
+    to the observing agent in the frame given, along with its distance. Categories without any nearby entity are not present.
+    Every nearby entity is classified once, and the result is cached on the frame.
+    """
+    if frame.nearestEntities != None:
+        return frame.nearestEntities
+
+    agentPos = frame.getPosition()
+    nearest = {}
+    for entity in frame.getNearbyEntities():
+        distanceToEntity = None
+        for category, types in CATEGORY_TYPES.items():
+            if entity.type not in types:
+                continue
+            if distanceToEntity == None:
+                distanceToEntity = MathExt.distanceBetweenPoints(agentPos, entity.position)
+            if category not in nearest or distanceToEntity < nearest[category].distance:
+                nearest[category] = NearestEntity(entity, distanceToEntity)
+
+    frame.nearestEntities = nearest
+    return nearest
@@ -5,38 +5,61 @@
 import MalmoPython
 import json
 import math
-import time
+import shutil
+import tempfile
+import numpy
 import pandas
-import matplotlib.pyplot as plt
-import sys
-import random
 from Utils import *
 from Logger import *
 
 # A named tuple that contains an attribute name, as well as the handler and argument list for obtaining the attribute
 SpecialAttribute = namedtuple("SpecialAttribute", "name function args")
 
+# A mapping of each default attribute read directly from an agent's observation to the key it is read from
+OBSERVATION_KEYS = {
+    "DamageDealt": "DamageDealt",
+    "MobsKilled": "MobsKilled",
+    "PlayersKilled": "PlayersKilled",
+    "TimeAlive": "TimeAlive",
+    "Hunger": "Food",
+    "Score": "Score",
+    "XP": "XP",
+    "DistanceTravelled": "DistanceTravelled"
+}
+
 class Performance:
     """
     Static class for logging and exporting performance data of agents.
     """
     agentList = []                  # A list of all agents we are recording the performance of
-    updateInterval = 100            # How often each Agent's performance should be updated
+    updateInterval = 1.0            # How often each Agent's performance should be sampled, in seconds of mission time
+    sampleIntervals = {}            # A mapping of attribute names to how often each should be sampled in seconds, for attributes sampled less often than updateInterval
     filenameOverride = None         # An override to the suffix of the filename exported, rather than use the default timestamp
     defaultAttributes = ["SysTime", "DamageDealt", "MobsKilled", "PlayersKilled", "CurrentHealth", "HealthLost", "IsAlive", "TimeAlive", "Hunger", "Score", "XP", "DistanceTravelled"]
     specialAttributes = []          # A list of specific performance metrics for a particular mission beyond just the defaults
+    initialCapacity = 256           # The number of samples each agent has room for before its column arrays must grow
+    chunkSize = 10000               # The number of samples of each agent held in memory before they are flushed to disk
 
     def __init__(self, agent):
-        self.startTime = time.time()    # The starting time that the agent came into existence
+        self.startTime = Clock.now()    # The starting time that the agent came into existence
         self.agent = agent              # Store a reference to the Agent that owns this performance data (we will query for information from the agent)
-        self.counter = 0                # Counter for determining when an update is required
+        self.nextSampleTime = None      # The time the next sample is due, or None if no sample has been taken yet
         self.currentHealth = 20.0       # Current health (assume agent starts at full health)
         self.healthLost = 0.0           # Total amount of health lost
         self.isAlive = True             # Whether or not the agent is alive
 
-        # A pandas dataframe storing all of the data over time in CSV format
-        self.data = pandas.DataFrame(columns= (Performance.defaultAttributes + [i.name for i in Performance.specialAttributes]))
-        self.dataIdx = 0
+        # A NumPy array for each attribute storing the samples held in memory, created once the first value of the attribute is sampled
+        self.columns = Performance.defaultAttributes + [i.name for i in Performance.specialAttributes]
+        self.columnData = [None] * len(self.columns)
+        self.dataIdx = 0                # The number of samples held in memory
+        self.capacity = 0               # The number of samples the column arrays have room for
+        self.initialTime = None         # The system time of the first sample, which all system times are exported relative to
+        self.chunkFile = None           # A temporary file holding the samples flushed to disk, in CSV format
+
+        # The sampling schedule of each attribute, where attributes that are not yet due again repeat the value last sampled
+        self.attributeIntervals = [Performance.sampleIntervals.get(name, 0.0) if name != "SysTime" else 0.0 for name in self.columns]
+        self.nextAttributeTimes = [None] * len(self.columns)
+        self.lastSample = [None] * len(self.columns)
 
     @staticmethod
     def addAgents(agents):
@@ -55,6 +78,16 @@ class Performance:
         for agent in Performance.agentList:
             agent.performance.__updateAgentPerformance__()
 
+    @staticmethod
+    def reset():
+        """
+        Stop tracking all agents and special attributes, so that another mission can be ran in the same process.
+        """
+        Performance.agentList = []
+        Performance.specialAttributes = []
+        Performance.sampleIntervals = {}
+        Performance.filenameOverride = None
+
     @staticmethod
     def export():
         """
@@ -64,39 +97,123 @@ class Performance:
             agent.performance.__exportAgentPerformance__()
 
     @staticmethod
-    def trackItems(items):
+    def trackItems(items, interval = None):
         """
-        Specify items you want to track across agent inventories.
+        Specify items you want to track across agent inventories. Optionally supply how often each should be sampled in seconds,
+        if less often than updateInterval.
         """
         for item in items:
             Performance.specialAttributes.append(SpecialAttribute(item.value, Performance.__trackItemHandler__, [item]))
+            if interval != None:
+                Performance.setSampleInterval(item.value, interval)
+
+    @staticmethod
+    def setSampleInterval(attribute, interval):
+        """
+        Set how often an attribute should be sampled in seconds, for attributes that are costly to sample or change slowly. Samples
+        are still taken every updateInterval, repeating the value last sampled for the attribute until it is due again, so an
+        interval shorter than updateInterval has no effect. Must be called before the agents are added.
+        """
+        Performance.sampleIntervals[attribute] = interval
+
+    @staticmethod
+    def __getNextTime__(nextTime, now, interval):
+        """
+        Returns the time the next sample is due after taking a sample that was due at the time given. Samples stay on a fixed grid
+        of the interval given, so that time spent between updates does not accumulate as drift. Samples that were missed entirely
+        are skipped, rather than being taken back-to-back to catch up.
+        """
+        if interval <= 0:
+            return now
+        nextTime += interval
+        if nextTime <= now:
+            nextTime += (math.floor((now - nextTime) / interval) + 1) * interval
+        return nextTime
 
     @staticmethod
     def __trackItemHandler__(agent, item):
         return agent.inventory.amountOfItem(item)
 
-    def __updateAgentHealth__(self):
+    def __updateAgentHealth__(self, observation):
         """
-        Checks if the agent has lost health and if so, adds to the healthLost stat. If health is gained, currentHealth is adjusted.
-        If health reaches 0, agent is dead and isDead is changed to true.
+        Checks if the agent has lost health in the observation given and if so, adds to the healthLost stat. If health is gained,
+        currentHealth is adjusted. If health reaches 0, agent is dead and isDead is changed to true.
         Should be checked frequently throughout an Agent's mission.
         """
-        health = self.agent.getHealth()
-        if health == None:
+        if observation == None:
             return
+        health = observation["Life"]
         if health < self.currentHealth:
             self.healthLost += self.currentHealth - health
         if health == 0.0:
             self.isAlive = False
         self.currentHealth = health
 
-    def __adjustSystemTimes__(self):
+    @staticmethod
+    def __getColumnType__(value):
         """
-        Adjust the system time values in the performance Dataframe to start at 0 for index 1.
+        Returns the NumPy type of array that can store a sampled value as is. Values that are not booleans, integers or floats
+        (such as None before the first observation) are stored as objects.
         """
-        timeLabel = Performance.defaultAttributes[0]
-        initialTime = self.data.iloc[0][timeLabel]
-        self.data.loc[:, timeLabel] -= initialTime
+        if isinstance(value, bool):
+            return numpy.dtype(bool)
+        elif isinstance(value, int):
+            return numpy.dtype(numpy.int64)
+        elif isinstance(value, float):
+            return numpy.dtype(numpy.float64)
+        return numpy.dtype(object)
+
+    def __addSample__(self, sample):
+        """
+        Append a sample of every attribute to the column arrays, growing them if they are full. Once enough samples are held in
+        memory, they are flushed to disk.
+        """
+        if self.dataIdx == self.capacity:
+            self.capacity = max(Performance.initialCapacity, self.capacity * 2)
+            for i, column in enumerate(self.columnData):
+                if column is not None:
+                    self.columnData[i] = numpy.empty(self.capacity, dtype=column.dtype)
+                    self.columnData[i][:self.dataIdx] = column[:self.dataIdx]
+
+        if self.initialTime == None:
+            self.initialTime = sample[0]
+        for i, value in enumerate(sample):
+            column = self.columnData[i]
+            if column is None:
+                column = self.columnData[i] = numpy.empty(self.capacity, dtype=Performance.__getColumnType__(value))
+            elif column.dtype != object and Performance.__getColumnType__(value) != column.dtype:
+                # Values of differing types are stored as objects, so that each is exported as it was sampled
+                column = self.columnData[i] = column.astype(object)
+            column[self.dataIdx] = value
+        self.dataIdx += 1
+
+        if self.dataIdx >= Performance.chunkSize:
+            self.__flushSamples__()
+
+    def __getDataFrame__(self):
+        """
+        Returns a pandas DataFrame of the samples held in memory, with system times adjusted to start at 0 for the first sample.
+        """
+        columns = []
+        for i, column in enumerate(self.columnData):
+            column = column[:self.dataIdx] if column is not None else numpy.empty(0, dtype=object)
+            if i == 0 and self.dataIdx > 0:
+                column = column - self.initialTime
+            columns.append(column)
+        frame = pandas.DataFrame(dict(enumerate(columns)))
+        frame.columns = self.columns
+        return frame
+
+    def __flushSamples__(self):
+        """
+        Append the samples held in memory to a temporary file on disk, and start new column arrays.
+        """
+        if self.chunkFile == None:
+            self.chunkFile = tempfile.TemporaryFile("w+", newline="")
+        self.__getDataFrame__().to_csv(self.chunkFile, index=False, header=self.chunkFile.tell() == 0)
+        self.columnData = [None] * len(self.columns)
+        self.dataIdx = 0
+        self.capacity = 0
 
     def __updateAgentPerformance__(self):
         """
@@ -106,128 +223,65 @@ class Performance:
         if self.agent.agentType == AgentType.Human:
             self.agent.inventory.update()
 
-        if self.counter == 100:
-            self.__updateAgentHealth__()
-            defaultData = [
-                time.time() - self.startTime,       # Time passed since start of mission
-                self.agent.getDamageDealt(),        # Amount of damage dealt
-                self.agent.getMobsKilled(),         # The number of mobs this agent killed
-                self.agent.getPlayersKilled(),      # The number of players this agent killed
-                self.currentHealth,                 # The current health
-                self.healthLost,                    # The total amount of health lost over time
-                self.isAlive,                       # Whether or not this agent is alive
-                self.agent.getTimeAlive(),          # The total amount of time this agent has been alive
-                self.agent.getHunger(),             # The current hunger level of this agent
-                self.agent.getScore(),              # The current score
-                self.agent.getXP(),                 # The current experience point level
-                self.agent.getDistanceTravelled()]  # The total amount of distance travelled over time
-            specialData = []
-            for specialAttrib in Performance.specialAttributes:
-                specialData.append(specialAttrib.function(self.agent, *specialAttrib.args))
-            self.data.loc[self.dataIdx] = defaultData + specialData
-            self.counter = 0
-            self.dataIdx += 1
-        else:
-            self.counter += 1
+        # Only sample once the sampling period has elapsed, by the mission clock
+        now = Clock.now()
+        if self.nextSampleTime == None:
+            self.nextSampleTime = now
+        if now < self.nextSampleTime:
+            return
+        self.nextSampleTime = Performance.__getNextTime__(self.nextSampleTime, now, Performance.updateInterval)
+
+        # Every attribute of a sample is read from the same observation
+        observation = self.agent.getObservationJson()
+        self.__updateAgentHealth__(observation)
+        sample = []
+        for i in range(0, len(self.columns)):
+            interval = self.attributeIntervals[i]
+            if interval > 0:
+                if self.nextAttributeTimes[i] != None and now < self.nextAttributeTimes[i]:
+                    sample.append(self.lastSample[i])   # Not yet due to be sampled again
+                    continue
+                self.nextAttributeTimes[i] = Performance.__getNextTime__(self.nextAttributeTimes[i] if self.nextAttributeTimes[i] != None else now, now, interval)
+            sample.append(self.__sampleAttribute__(i, observation, now))
+        self.lastSample = sample
+        self.__addSample__(sample)
+
+    def __sampleAttribute__(self, idx, observation, now):
+        """
+        Returns the current value of the attribute with the index given, where the observation is the agent's current observation
+        (or None if no observations have occurred).
+        """
+        attribute = self.columns[idx]
+        if idx >= len(Performance.defaultAttributes):
+            specialAttrib = Performance.specialAttributes[idx - len(Performance.defaultAttributes)]
+            return specialAttrib.function(self.agent, *specialAttrib.args)
+        elif attribute == "SysTime":
+            return now - self.startTime     # Time passed since start of mission
+        elif attribute == "CurrentHealth":
+            return self.currentHealth       # The current health
+        elif attribute == "HealthLost":
+            return self.healthLost          # The total amount of health lost over time
+        elif attribute == "IsAlive":
+            return self.isAlive             # Whether or not this agent is alive
+        elif observation == None:
+            return None
+        return observation[OBSERVATION_KEYS[attribute]]
 
     def __exportAgentPerformance__(self):
         """
         Export all of this agent's performance data over time to a CSV file.
         """
-        self.__adjustSystemTimes__()
-    
         agentId = self.agent.getId()
-        fileNameSuffix = Performance.filenameOverride if Performance.filenameOverride != None else datetime.fromtimestamp(time.time()).strftime('%m_%d_%Y_%H_%M_%S')
-        fileName = agentId + "_" + fileNameSuffix + ".csv"
+        fileNameSuffix = Performance.filenameOverride if Performance.filenameOverride != None else getOutputFileSuffix()
+        fileName = "{}_{}_{}.csv".format(agentId, self.agent.agentType.value, fileNameSuffix)
         filePath = "performance"
         if not os.path.isdir(filePath):
             os.mkdir(filePath)
 
         filePath = os.path.join(filePath, fileName)
-        self.data.to_csv(filePath, index=False)
+        with open(filePath, "w", newline="") as file:
+            if self.chunkFile != None:  # Samples flushed to disk come first
+                self.chunkFile.seek(0)
+                shutil.copyfileobj(self.chunkFile, file)
+            self.__getDataFrame__().to_csv(file, index=False, header=self.chunkFile == None)
         print("{} performance output has been saved to: {}".format(agentId, filePath))
-
-
-
-# ===========================================================================================================
-# Standalone Functions for Interpreting Previously Recorded Data
-# ===========================================================================================================
-
-def __getCSVFiles__():
-    """
-    Repeatedly asks the user to input the name of a performance CSV file in the performance directory, until the empty string is received.
-    Returns the list of csv filenames.
-    """
-    filenames = []
-    shouldGetInput = True
-    while shouldGetInput:
-        filename = input("Enter CSV file name: ")
-        if len(filename) == 0:
-            shouldGetInput = False
-        else:
-            filepath = os.path.join("performance", filename)
-            if os.path.isfile(filepath):
-                filenames.append(filename)
-            else:
-                print("'{}' could not be found.".format(filepath))
-    return filenames
-
-def __getGraphAttributes__(dataframe):
-    """
-    Gets all available attributes from a sample dataframe, then repeatedly collects attributes to plot from the user until an empty string is received.
-    Returns the list of attributes.
-    """
-    print("Plottable Attributes ==============================")
-    for col in dataframe.columns:
-        print("- " + col)
-    print("===================================================\n")
-    
-    attributes = []
-    shouldGetInput = True
-    while shouldGetInput:
-        attribute = input("Attribute: ")
-        if len(attribute) == 0:
-            shouldGetInput = False
-        else:
-            attributes.append(attribute)
-    return attributes
-
-def main():
-    """
-    Main method allowing this file to be ran as a script for nicely outputting statistical data from a csv file in
-    various forms.
-    """
-    filenames = __getCSVFiles__()
-    if len(filenames) == 0:
-        print("No CSV files entered")
-        return
-
-    # These have a 1:1 mapping to the filepaths gathered above
-    agentIds = []
-    agentData = []
-    for filepath in filenames:
-        agentIds.append(filepath.split("_")[0])
-        agentData.append(pandas.read_csv(os.path.join("performance", filepath)))
-
-    # Collect the attributes of interest in each AgentData object
-    attributes = __getGraphAttributes__(agentData[0])
-
-    # Plot each attribute against SysTime
-    fig = plt.figure()
-    fig.canvas.set_window_title("Agent Statistics Over Time")
-    for i in range(len(agentIds)):
-        for attribute in attributes:
-            r = random.random()
-            g = random.random()
-            b = random.random()
-            plt.plot(agentData[i]["SysTime"], agentData[i][attribute], markeredgecolor=(r, g, b, 1), linestyle="solid", label="{} {}".format(agentIds[i], attribute))
-
-    # Show the plot on-screen
-    plt.legend(loc="best")
-    plt.xlabel("Time")
-    plt.ylabel("Amount")
-    plt.show()
-
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
@@ -2,13 +2,23 @@
 # ==============================================================================================
 # This file represents a standalone script for the post-processing of log files. For each file
 # in the logs/ directory, parse the log and resolve any minor issues that have resulted due to
-# tolerance issues while the mission ran.
+# tolerance issues while the mission ran. Cleaned logs are written to the cleaned_logs/ directory,
+# along with a manifest of every log processed, so that logs which have not changed since they
+# were last processed can be skipped.
 # ==============================================================================================
+import hashlib
+import json
 import os
 import sys
+import tempfile
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from Logger import TraceWriter
 
 # GLOBALS FOR ALL LOGS
 WORKING_DIR = None          # Current working directory of this script
+CLEANED_LOG_DIR = None      # Directory that cleaned logs are written to, mirroring the layout of the logs/ directory
 TOTAL_LOGS = 0              # Total number of logs processed
 LOGS_DELETED = 0            # Number of logs that were deleted due to unmet conditions specified by parameters
 MIN_KILLS = 0               # Minimum number of kills that must be made by the agents in order to preserve log
@@ -19,41 +29,12 @@ ACTION_POST_TUPLES = {      # A set of tuples to show what post-condition is exp
     "!ATTACK" : "status"
 }
 ENTITY_DECLARATION_STRINGS = ["items", "mobs", "agents"]    # A list of strings representing the start to an entity declaration
+PROCESSING_VERSION = 1      # Version of the cleanup performed on each log. Increase this whenever the cleanup changes, so that every log is processed again
+MANIFEST_FILE_NAME = "manifest.json"    # Name of the manifest of processed logs, stored in the cleaned log directory
 
-# GLOBALS FOR EACH LOG
-old_file_contents = []      # A list of the lines for the original log file
-new_file_contents = []      # A list of the lines for the new log file after post-processing
-id_counters = {}            # A global counter for each type of entity for generating new simple entity ids
-id_map = {}                 # A mapping of original complex Malmo ids to simpler ones generated in this script
-dead_entities = []          # A list of ids for entities that have been declared as dead
-startMarkerIndex = None     # Location in the log of the START marker
-endMarkerIndex = None       # Location in the log of the END marker
-
-
-def resetGlobals():
-    """
-    Reset the global values so that they are ready to be used for processing a new log.
-    """
-    global id_counters, old_file_contents, new_file_contents, id_map, dead_entities, startMarkerIndex, endMarkerIndex
-    old_file_contents = []
-    new_file_contents = []
-    id_counters = {}
-    id_map = {}
-    dead_entities = []
-    startMarkerIndex = None
-    endMarkerIndex = None
-
-def getNextIdNumberForType(entityType):
-    """
-    Returns the next ID number for use for a specific type of entity.
-    """
-    global id_counters
-    if entityType in id_counters:
-        id_counters[entityType] += 1
-        return id_counters[entityType]
-    else:
-        id_counters[entityType] = 1
-        return 1
+# The outcome of processing a single log. The delete reason is None if the log was kept, and otherwise one of "preconditions"
+# (an action's preconditions were never met), "kills" or "lines" (the log did not meet the minimum given by -k or -l).
+LogResult = namedtuple("LogResult", "path deleteReason originalLines cleanedLines kills")
 
 def doesLogDirectoryExist():
     """
@@ -78,396 +59,627 @@ def getLogFilePaths():
                 paths.append(filepath)
     return paths
 
-def getLine(idx):
+def getPartialLogFilePaths():
     """
-    Get a line from the original log file by index, making any necessary adjustments to it before returning it.
+    Returns a list of file paths for each partial log file (left behind by a mission that never finished) in the output directory.
     """
-    line = old_file_contents[idx]
-    strings = line.split("-")
-    for idx in range(0, len(strings)):
-        # Replace old entity ids with new ones if they were previously generated
-        if strings[idx] in id_map:
-            strings[idx] = id_map[strings[idx]]
-    return "-".join(strings)
+    logDirPath = os.path.join(WORKING_DIR, "logs")
+    paths = []
+    for (dirpath, _, filenames) in os.walk(logDirPath):
+        for filename in filenames:
+            if filename.endswith(".log" + TraceWriter.PARTIAL_EXTENSION):
+                paths.append(os.path.join(dirpath, filename))
+    return paths
 
-def addLine(line):
+def getFileHash(filePath):
     """
-    Before appending a new line to the output list of strings for a log, perform additional checks on each part of the line, separated by '-'.
+    Returns the SHA-256 hash of the contents of a file, as a hex string.
     """
-    strings = line.split("-")
-    for idx in range(0, len(strings)):
-        # If an entity is referenced after already dying, do not add the line
-        if endMarkerIndex == None and strings[idx] in dead_entities:
-            # Some actions reference a dead entity as the thing we are "looking FROM", "moving FROM", etc... THIS IS OKAY!
-            if line.startswith("!") and idx == 2 and len(strings) > 3:
-                continue
-            return
-    new_file_contents.append("-".join(strings))
+    fileHash = hashlib.sha256()
+    with open(filePath, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            fileHash.update(chunk)
+    return fileHash.hexdigest()
 
-# ======================================================================
-# Operations on original log
-# ======================================================================
-
-def handleEmptyLine(line):
+def readManifest(manifestPath):
     """
-    Handle the case when a line contains the empty string "".
+    Returns the manifest at the path given, as a mapping of the path of each log relative to the logs/ directory to its entry. Returns
+    an empty manifest if the file does not exist or cannot be read.
     """
-    global new_file_contents
-    if len(new_file_contents) > 0:
-        if new_file_contents[-1] == "": # No repeated newlines
-            return
-        if new_file_contents[-1].startswith("closest"): # No newline after closest_XXX entity output
-            return
-    addLine(line)
+    try:
+        with open(manifestPath) as file:
+            return json.load(file)
+    except (IOError, OSError, ValueError):
+        return {}
 
-def handleClosestXXXLine(line):
+def writeManifest(manifestPath, manifest):
     """
-    Handle the case where the line is defining a closest entity to one of the agents.
+    Atomically write a manifest to the path given, so that an interrupted run never leaves a corrupt manifest behind.
     """
-    global new_file_contents
-    if len(new_file_contents) > 0 and new_file_contents[-1].startswith("!"):    # Last action never finished... add a newline before proceeding
-        addLine("")
-    addLine(line)
+    directory = os.path.dirname(manifestPath)
+    if not os.path.isdir(directory):
+        os.makedirs(directory, exist_ok = True)
+    descriptor, temporaryPath = tempfile.mkstemp(dir = directory, suffix = ".tmp")
+    with os.fdopen(descriptor, "w") as file:
+        json.dump(manifest, file, indent = 1, sort_keys = True)
+    os.replace(temporaryPath, manifestPath)
 
-def handleEntityDefinitionLine(line):
+def getOutcome(result):
     """
-    Handle the case where the line is defining a new entity.
+    Returns the outcome of processing a log given its LogResult: "deleted" if the log was discarded, "truncated" if parts of it were
+    removed while cleaning it, or "kept" otherwise.
     """
-    global id_map
-    strings = line.split("-")
-    oldEntityId = strings[1]
-    entityType = strings[2]
-    if oldEntityId in id_map:   # We already defined and simplified this entity id?... shouldn't happen
-        strings[1] = id_map[oldEntityId]
-    elif oldEntityId == "None": # Special case... do not alter sole member None of NoneType
-        id_map["None"] = "None"
-    else:
-        newEntityId = "{}{}".format(entityType, getNextIdNumberForType(entityType))
-        id_map[oldEntityId] = newEntityId
-        # id_map[newEntityId] = newEntityId
-        strings[1] = newEntityId
-    addLine("-".join(strings))
-    
-def handleEntityStatusLine(line):
+    if result.deleteReason != None:
+        return "deleted"
+    return "truncated" if result.cleanedLines < result.originalLines else "kept"
+
+def getManifestEntry(result, fileStatus, fileHash):
     """
-    Handle the case where the line is declaring an entity as either alive or dead.
+    Returns the manifest entry recording the result of processing a log, given the status (from os.stat) and hash of the original log.
     """
-    global dead_entities
-    addLine(line)
-    if line.endswith("dead") and endMarkerIndex == None:
-        strings = line.split("-")
-        dead_entities.append(strings[1])
+    return {
+        "hash": fileHash,
+        "size": fileStatus.st_size,
+        "mtime": fileStatus.st_mtime_ns,
+        "version": PROCESSING_VERSION,
+        "minKills": MIN_KILLS,
+        "minLines": MIN_LINES,
+        "outcome": getOutcome(result),
+        "deleteReason": result.deleteReason,
+        "originalLines": result.originalLines,
+        "cleanedLines": result.cleanedLines,
+        "kills": result.kills
+    }
 
-def handleAttackLine(line, lineIdx):
+def isManifestEntryCurrent(entry, outputPath):
     """
-    Handle the case where the line declares an attack on an entity by some agent. This requires the line number that the attack occurred on.
-    Returns the amount to move the line index head for reading from the old file contents.
+    Returns true if a manifest entry was produced by the current version of the cleanup with the current parameters, and the cleaned
+    log it records (if any) still exists. Returns false otherwise.
     """
-    global new_file_contents
-    attackedEntityId = line.split("-")[2]
-
-    targetAttackIdx = None   # Line of attack action that resulted in the entity dying (if any)
-    lastAttackIdx = lineIdx  # Line of the last attack in this series of attacks
-    for i in range(lineIdx, len(old_file_contents)):
-        lineToCheck = getLine(i)
-        if not lineToCheck.startswith("!"):
-            continue
+    if entry == None or entry["version"] != PROCESSING_VERSION or entry["minKills"] != MIN_KILLS or entry["minLines"] != MIN_LINES:
+        return False
+    return entry["outcome"] == "deleted" or os.path.isfile(outputPath)
+
+class LogProcessor:
+    """
+    Processor for a single log file, holding all of the state used while parsing and fixing that log.
+    """
+
+    def __init__(self, filePath, outputPath = None, minKills = 0, minLines = 0):
+        self.filePath = filePath            # Full path to the log file being processed
+        self.outputPath = outputPath if outputPath != None else filePath    # Full path that the cleaned log is written to (the log file itself by default)
+        self.minKills = minKills            # Minimum number of kills that must be made by the agents in order to preserve log
+        self.minLines = minLines            # Minimum number of lines that the new log must have in order to preserve it
+        self.old_file_contents = []         # A list of the lines for the original log file
+        self.old_file_tokens = []           # A list of the tokens of each line of the original log file, separated by '-'
+        self.next_action_indexes = []       # For each line of the original log file, the index of the first action at or after it
+        self.new_file_contents = []         # A list of the lines for the new log file after post-processing
+        self.new_file_tokens = []           # A list of the tokens of each line of the new log file (kept up to date during cleanup)
+        self.new_action_indexes = []        # Ascending indexes of the actions in the new log file (kept up to date while copying the old log)
+        self.new_empty_indexes = []         # Ascending indexes of the empty lines in the new log file (only those indexed so far during cleanup)
+        self.state_indexes = {}             # A mapping of each subject to a mapping of each predicate to the ascending indexes of the lines indexed so far that set it
+        self.single_token_lines = set()     # The lines indexed so far that hold a single token (ie. START and END)
+        self.indexed_line_count = 0         # The number of lines at the start of the new log file that have been indexed during cleanup
+        self.id_counters = {}               # A counter for each type of entity for generating new simple entity ids
+        self.id_map = {}                    # A mapping of original complex Malmo ids to simpler ones generated for this log
+        self.dead_entities = []             # A list of ids for entities that have been declared as dead
+        self.dead_entity_ids = set()        # The ids in self.dead_entities, for quick lookups
+        self.startMarkerIndex = None        # Location in the log of the START marker
+        self.endMarkerIndex = None          # Location in the log of the END marker
+
+    def getNextIdNumberForType(self, entityType):
+        """
+        Returns the next ID number for use for a specific type of entity.
+        """
+        if entityType in self.id_counters:
+            self.id_counters[entityType] += 1
+            return self.id_counters[entityType]
         else:
+            self.id_counters[entityType] = 1
+            return 1
+
+    def getLine(self, idx):
+        """
+        Get a line from the original log file by index, making any necessary adjustments to it before returning it.
+        """
+        # Replace old entity ids with new ones if they were previously generated
+        return "-".join([self.id_map.get(string, string) for string in self.old_file_tokens[idx]])
+
+    def addLine(self, line):
+        """
+        Before appending a new line to the output list of strings for a log, perform additional checks on each part of the line, separated by '-'.
+        """
+        strings = line.split("-")
+        for idx in range(0, len(strings)):
+            # If an entity is referenced after already dying, do not add the line
+            if self.endMarkerIndex == None and strings[idx] in self.dead_entity_ids:
+                # Some actions reference a dead entity as the thing we are "looking FROM", "moving FROM", etc... THIS IS OKAY!
+                if line.startswith("!") and idx == 2 and len(strings) > 3:
+                    continue
+                return
+        self.__appendNewLine__("-".join(strings))
+
+    def __appendNewLine__(self, line):
+        """
+        Internal method that appends a line to the new log file while copying the old log, keeping track of where its actions and empty lines are.
+        """
+        if line == "":
+            self.new_empty_indexes.append(len(self.new_file_contents))
+        elif line.startswith("!"):
+            self.new_action_indexes.append(len(self.new_file_contents))
+        self.new_file_contents.append(line)
+
+    def __truncateNewLines__(self, startIdx):
+        """
+        Internal method that deletes every line of the new log file from the index given onwards while copying the old log.
+        """
+        del self.new_file_contents[startIdx:len(self.new_file_contents)]
+        length = len(self.new_file_contents)
+        while len(self.new_action_indexes) > 0 and self.new_action_indexes[-1] >= length:
+            self.new_action_indexes.pop()
+        while len(self.new_empty_indexes) > 0 and self.new_empty_indexes[-1] >= length:
+            self.new_empty_indexes.pop()
+
+    def __resetNewLineIndexes__(self):
+        """
+        Internal method that tokenizes the new log file before cleanup, discarding every line indexed so far.
+        """
+        self.new_file_tokens = [line.split("-") for line in self.new_file_contents]
+        self.new_empty_indexes = []
+        self.state_indexes = {}
+        self.single_token_lines = set()
+        self.indexed_line_count = 0
+
+    def __indexNewLines__(self, idx):
+        """
+        Internal method that indexes every line of the new log file up to and including the index given, during cleanup.
+        """
+        for i in range(self.indexed_line_count, idx + 1):
+            strings = self.new_file_tokens[i]
+            if len(strings) < 2:
+                self.single_token_lines.add(strings[0])
+                if strings[0] == "":
+                    self.new_empty_indexes.append(i)
+            else:
+                self.state_indexes.setdefault(strings[1], {}).setdefault(strings[0], []).append(i)
+        self.indexed_line_count = max(self.indexed_line_count, idx + 1)
+
+    def __deleteNewLines__(self, startIdx, endIdx):
+        """
+        Internal method that deletes the lines of the new log file between the indexes given during cleanup. Lines from the start
+        index onwards are no longer indexed, as they have moved.
+        """
+        for i in range(self.indexed_line_count - 1, startIdx - 1, -1):
+            strings = self.new_file_tokens[i]
+            if strings[0] == "" and len(strings) == 1:
+                self.new_empty_indexes.pop()
+            elif len(strings) >= 2:
+                self.state_indexes[strings[1]][strings[0]].pop()
+        self.indexed_line_count = min(self.indexed_line_count, startIdx)
+        del self.new_file_contents[startIdx:endIdx]
+        del self.new_file_tokens[startIdx:endIdx]
+
+    # ======================================================================
+    # Operations on original log
+    # ======================================================================
+
+    def handleEmptyLine(self, line):
+        """
+        Handle the case when a line contains the empty string "".
+        """
+        if len(self.new_file_contents) > 0:
+            if self.new_file_contents[-1] == "": # No repeated newlines
+                return
+            if self.new_file_contents[-1].startswith("closest"): # No newline after closest_XXX entity output
+                return
+        self.addLine(line)
+
+    def handleClosestXXXLine(self, line):
+        """
+        Handle the case where the line is defining a closest entity to one of the agents.
+        """
+        if len(self.new_file_contents) > 0 and self.new_file_contents[-1].startswith("!"):    # Last action never finished... add a newline before proceeding
+            self.addLine("")
+        self.addLine(line)
+
+    def handleEntityDefinitionLine(self, line):
+        """
+        Handle the case where the line is defining a new entity.
+        """
+        strings = line.split("-")
+        oldEntityId = strings[1]
+        entityType = strings[2]
+        if oldEntityId in self.id_map:   # We already defined and simplified this entity id?... shouldn't happen
+            strings[1] = self.id_map[oldEntityId]
+        elif oldEntityId == "None": # Special case... do not alter sole member None of NoneType
+            self.id_map["None"] = "None"
+        else:
+            newEntityId = "{}{}".format(entityType, self.getNextIdNumberForType(entityType))
+            self.id_map[oldEntityId] = newEntityId
+            # self.id_map[newEntityId] = newEntityId
+            strings[1] = newEntityId
+        self.addLine("-".join(strings))
+
+    def handleEntityStatusLine(self, line):
+        """
+        Handle the case where the line is declaring an entity as either alive or dead.
+        """
+        self.addLine(line)
+        if line.endswith("dead") and self.endMarkerIndex == None:
+            strings = line.split("-")
+            self.dead_entities.append(strings[1])
+            self.dead_entity_ids.add(strings[1])
+
+    def handleAttackLine(self, line, lineIdx):
+        """
+        Handle the case where the line declares an attack on an entity by some agent. This requires the line number that the attack occurred on.
+        Returns the amount to move the line index head for reading from the old file contents.
+        """
+        attackedEntityId = line.split("-")[2]
+
+        targetAttackIdx = None   # Line of attack action that resulted in the entity dying (if any)
+        lastAttackIdx = lineIdx  # Line of the last attack in this series of attacks
+        lineCount = len(self.old_file_contents)
+        i = self.next_action_indexes[lineIdx]
+        while i < lineCount:    # Jump from action to action until the series of attacks on this entity ends
+            lineToCheck = self.getLine(i)
             if lineToCheck.startswith("!ATTACK") and lineToCheck.endswith(attackedEntityId):
                 lastAttackIdx = i
-                nextLine = getLine(i + 1) if i < len(old_file_contents) - 1 else ""
+                nextLine = self.getLine(i + 1) if i < lineCount - 1 else ""
                 if nextLine.startswith("status"):
                     targetAttackIdx = i
             else:
                 break
+            i = self.next_action_indexes[i + 1]
+
+        # If this attack ended with the entity dying, make sure it is officially logged and return to move ahead in the log past the status update
+        if targetAttackIdx != None:
+            statusLine = self.getLine(targetAttackIdx + 1)
+            if statusLine.startswith("status") and statusLine.endswith("dead") and attackedEntityId in statusLine.split("-"):
+                self.__appendNewLine__(line)
+                self.handleEntityStatusLine(self.getLine(targetAttackIdx + 1))
+                return lastAttackIdx - lineIdx if lastAttackIdx != targetAttackIdx else lastAttackIdx - lineIdx + 1
+
+        # Attack was NOT conducted until completion. Loop backwards over the actions in self.new_file_contents and delete immediate prior actions on the attacked entity.
+        startDeleteIdx = len(self.new_file_contents) - 1
+        for i in reversed(self.new_action_indexes):
+            # If we hit an action that DOES NOT refer to this entity, we went too far
+            if attackedEntityId not in self.new_file_contents[i].split("-"):
+                break
 
-    # If this attack ended with the entity dying, make sure it is officially logged and return to move ahead in the log past the status update
-    if targetAttackIdx != None:
-        statusLine = getLine(targetAttackIdx + 1)
-        if statusLine.startswith("status") and statusLine.endswith("dead") and attackedEntityId in statusLine.split("-"):
-            new_file_contents.append(line)
-            handleEntityStatusLine(getLine(targetAttackIdx + 1))
-            return lastAttackIdx - lineIdx if lastAttackIdx != targetAttackIdx else lastAttackIdx - lineIdx + 1
-
-    # Attack was NOT conducted until completion. Loop backwards over new_file_contents and delete immediate prior actions on the attacked entity.
-    startDeleteIdx = len(new_file_contents) - 1
-    for i in range(len(new_file_contents) - 1, -1, -1):
-        lineToCheck = new_file_contents[i]
-        strings = lineToCheck.split("-")
-
-        # If we hit an action that DOES NOT refer to this entity, we went too far
-        if lineToCheck.startswith("!") and attackedEntityId not in strings:
-            break
-
-        # If we hit an action that DOES refer to this attacked entity, move the starting delete index to right after the next previous empty string
-        if lineToCheck.startswith("!") and attackedEntityId in strings:
-            prevLine = lineToCheck
-            while prevLine != "":
-                prevLine = new_file_contents[i - 1]
-                startDeleteIdx = i
-                i -= 1
-
-    # Delete everything that referenced this entity that was attacked but never killed in a row
-    del new_file_contents[startDeleteIdx:len(new_file_contents)]
-    return lastAttackIdx - lineIdx
-
-# ======================================================================
-# Operations on newly generated log
-# ======================================================================
-
-def checkActionPreconditions(idx, checkClosest=False):
-    """
-    Given a line index of an action in the newly generated log contents, make sure that each pre-condition has been set beforehand in the log.
-    Returns 0 if no changes occurred, > 0 for the amount the log was truncated by (if any), and -1 if the log should be discarded.
-    """
-    global new_file_contents
-    # Gather all of the preconditions we will be checking for
-    startIdx = idx
-    preconditions = []
-    preconditionLineNumbers = []
-    for i in range(idx - 1, -1, -1):
-        startIdx = i
-        # Newline is the stopping point
-        if new_file_contents[i] == "":
-            break
-        # ClosestXXX comes in at random (ignore if we are not to check that closest_entity... was set beforehand)
-        elif new_file_contents[i].startswith("closest") and not checkClosest:
-            continue
-        # Entity declarations comes in at random (ignore)
-        elif new_file_contents[i].startswith(tuple(ENTITY_DECLARATION_STRINGS)):
-            continue
-        # Add the precondition
-        preconditions.append(new_file_contents[i].split("-"))
-        preconditionLineNumbers.append(i)
-
-    # Loop backwards and check for the preconditions having been set. Note: if a precondition is set with the wrong values, then it is a failure
-    linesDeleted = 0
-    for i in range(startIdx, -1, -1):
-        lineToCheck = new_file_contents[i].split("-")
-        for j in range(0, len(preconditions)):
-            if lineToCheck[0] == preconditions[j][0] and lineToCheck[1] == preconditions[j][1]:     # If 1st two args match, ensure the entire lines match
-                if len(lineToCheck) != len(preconditions[j]):
-                    return -1
-                allValuesMatch = True
-                for k in range(0, len(preconditions[j])):
-                    if lineToCheck[k] != preconditions[j][k]:
-                        allValuesMatch = False
-
-                # ClosestXXX is a special case, where if we are checking preconditions for the FIRST action, it must appear in initial state
-                if preconditions[j][0].startswith("closest") and checkClosest == True:
-                    if not allValuesMatch:  # Modify closestXXX in initial state to match
-                        new_file_contents[i] = "-".join(preconditions[j])
-                    
-                    # Remove closestXXX before action
-                    del new_file_contents[preconditionLineNumbers[j]]
-                    linesDeleted += 1
-                    allValuesMatch = True
-
-                if not allValuesMatch:
-                    return -1
-                del preconditions[j]
+            # If we hit an action that DOES refer to this attacked entity, move the starting delete index to right after the next previous empty string
+            emptyIdx = bisect_left(self.new_empty_indexes, i) - 1
+            if emptyIdx >= 0:
+                startDeleteIdx = self.new_empty_indexes[emptyIdx] + 1
+            else:   # No previous empty string, so search backwards from the end of the log as always
+                prevLine = self.new_file_contents[i]
+                while prevLine != "":
+                    prevLine = self.new_file_contents[i - 1]
+                    startDeleteIdx = i
+                    i -= 1
+
+        # Delete everything that referenced this entity that was attacked but never killed in a row
+        self.__truncateNewLines__(startDeleteIdx)
+        return lastAttackIdx - lineIdx
+
+    # ======================================================================
+    # Operations on newly generated log
+    # ======================================================================
+
+    def checkActionPreconditions(self, idx, checkClosest=False):
+        """
+        Given a line index of an action in the newly generated log contents, make sure that each pre-condition has been set beforehand in the log.
+        Returns 0 if no changes occurred, > 0 for the amount the log was truncated by (if any), and -1 if the log should be discarded.
+        """
+        # Gather all of the preconditions we will be checking for
+        startIdx = idx
+        preconditions = []
+        preconditionLineNumbers = []
+        for i in range(idx - 1, -1, -1):
+            startIdx = i
+            # Newline is the stopping point
+            if self.new_file_contents[i] == "":
                 break
+            # ClosestXXX comes in at random (ignore if we are not to check that closest_entity... was set beforehand)
+            elif self.new_file_contents[i].startswith("closest") and not checkClosest:
+                continue
+            # Entity declarations comes in at random (ignore)
+            elif self.new_file_contents[i].startswith(tuple(ENTITY_DECLARATION_STRINGS)):
+                continue
+            # Add the precondition
+            preconditions.append(self.new_file_tokens[i])
+            preconditionLineNumbers.append(i)
+
+        # The closest entities of the first action may need to be moved into the initial state, which is done while looping backwards line by line
+        # (as is checking a precondition that shares its predicate with START or END, which appear without a subject)
+        if checkClosest or any(precondition[0] in self.single_token_lines for precondition in preconditions):
+            linesDeleted = self.__scanForPreconditions__(startIdx, preconditions, preconditionLineNumbers, checkClosest)
+            if checkClosest:    # Lines may have been changed or deleted
+                self.__resetNewLineIndexes__()
+                self.__indexNewLines__(idx - linesDeleted)
+            return linesDeleted
+
+        # Look up the line that last set each precondition. Note: if a precondition is set with the wrong values, then it is a failure
+        matchCounts = {}    # The number of preconditions matched so far to each predicate and subject, as each is matched to the next previous line setting it
+        for precondition in preconditions:
+            key = (precondition[0], precondition[1])
+            lineIndexes = self.state_indexes.get(precondition[1], {}).get(precondition[0], [])
+            matchIdx = bisect_right(lineIndexes, startIdx) - 1 - matchCounts.get(key, 0)
+            if matchIdx < 0 or self.new_file_tokens[lineIndexes[matchIdx]] != precondition:
+                return -1
+            matchCounts[key] = matchCounts.get(key, 0) + 1
+        return 0
 
-    # If not all preconditions were set, return false
-    if len(preconditions) > 0:
-        return -1
-    else:
-        return linesDeleted
+    def __scanForPreconditions__(self, startIdx, preconditions, preconditionLineNumbers, checkClosest):
+        """
+        Internal method that loops backwards line by line from the index given and checks for each of the preconditions given having been set.
+        Returns the value described by checkActionPreconditions().
+        """
+        # Loop backwards and check for the preconditions having been set. Note: if a precondition is set with the wrong values, then it is a failure
+        linesDeleted = 0
+        for i in range(startIdx, -1, -1):
+            if len(preconditions) == 0:
+                break
+            lineToCheck = self.new_file_contents[i].split("-")
+            for j in range(0, len(preconditions)):
+                if lineToCheck[0] == preconditions[j][0] and lineToCheck[1] == preconditions[j][1]:     # If 1st two args match, ensure the entire lines match
+                    if len(lineToCheck) != len(preconditions[j]):
+                        return -1
+                    allValuesMatch = True
+                    for k in range(0, len(preconditions[j])):
+                        if lineToCheck[k] != preconditions[j][k]:
+                            allValuesMatch = False
+
+                    # ClosestXXX is a special case, where if we are checking preconditions for the FIRST action, it must appear in initial state
+                    if preconditions[j][0].startswith("closest") and checkClosest == True:
+                        if not allValuesMatch:  # Modify closestXXX in initial state to match
+                            self.new_file_contents[i] = "-".join(preconditions[j])
+
+                        # Remove closestXXX before action
+                        del self.new_file_contents[preconditionLineNumbers[j]]
+                        linesDeleted += 1
+                        allValuesMatch = True
+
+                    if not allValuesMatch:
+                        return -1
+                    del preconditions[j]
+                    break
+
+        # If not all preconditions were set, return false
+        if len(preconditions) > 0:
+            return -1
+        else:
+            return linesDeleted
 
-def checkActionPostconditions(idx):
-    """
-    Given a line index of an action in the newly generated log contents, make sure the action is followed by its expected post-conditions.
-    Returns the new length of new_file_contents.
-    """
-    global new_file_contents
+    def checkActionPostconditions(self, idx):
+        """
+        Given a line index of an action in the newly generated log contents, make sure the action is followed by its expected post-conditions.
+        Returns the new length of self.new_file_contents.
+        """
 
-    line = new_file_contents[idx]
-    action = line.split("-")[0]
+        action = self.new_file_tokens[idx][0]
 
-    # Received a line that was not an expected action
-    if action not in ACTION_POST_TUPLES:
-        return 0
+        # Received a line that was not an expected action
+        if action not in ACTION_POST_TUPLES:
+            return 0
 
-    # Action was followed by its expected immediate post-condition
-    if idx + 1 < len(new_file_contents) and new_file_contents[idx + 1].startswith(ACTION_POST_TUPLES[action]):
-        return 0
+        # Action was followed by its expected immediate post-condition
+        if idx + 1 < len(self.new_file_contents) and self.new_file_contents[idx + 1].startswith(ACTION_POST_TUPLES[action]):
+            return 0
 
-    # Action was not followed by its expected immedate post-condition. Delete from the previous newline to the next newline.
-    startDeleteIdx = idx
-    for i in range(idx, -1, -1):
-        startDeleteIdx = i
-        if new_file_contents[i] == "":
-            break
-    endDeleteIdx = idx
-    for i in range(idx, len(new_file_contents)):
-        endDeleteIdx = i
-        if new_file_contents[i] == "":
-            break
-    orignalLength = len(new_file_contents)
-    del new_file_contents[startDeleteIdx:endDeleteIdx]
-    return orignalLength - len(new_file_contents)
-
-def fixActionFromParameter(idx):
-    """
-    Given the line index of an action in the newly generated log contents, ensure that the parameter denoting where we last acted on is correct,
-    after having potentially deleted previous parts of the original log.
-    """
-    global new_file_contents
-
-    line = new_file_contents[idx]
-    strings = line.split("-")
-    statePrefix = None
-    entity = None
-    expectedParam = None
-    if line.startswith("!LOOKAT"):
-        statePrefix = "looking_at"
-        entity = strings[1]
-        expectedParam = strings[2]
-    elif line.startswith("!MOVETO"):
-        statePrefix = "at"
-        entity = strings[1]
-        expectedParam = strings[2]
-    else:
-        return  # Only applies to certain actions
-
-    # Loop upwards through the new log for the first appearance of the statePrefix, and ensure that the parameter in the action matches
-    for i in range(idx, -1, -1):
-        stringsToCheck = new_file_contents[i].split("-")
-        if stringsToCheck[0].startswith(statePrefix) and stringsToCheck[1] == entity:
-            actualParam = stringsToCheck[2]
-            if actualParam != expectedParam:
-                strings[2] = actualParam
-                new_file_contents[idx] = "-".join(strings)
+        # Action was not followed by its expected immedate post-condition. Delete from the previous newline to the next newline.
+        emptyIdx = bisect_right(self.new_empty_indexes, idx) - 1
+        startDeleteIdx = self.new_empty_indexes[emptyIdx] if emptyIdx >= 0 else 0
+        try:
+            endDeleteIdx = self.new_file_contents.index("", idx)
+        except ValueError:
+            endDeleteIdx = len(self.new_file_contents) - 1
+        orignalLength = len(self.new_file_contents)
+        self.__deleteNewLines__(startDeleteIdx, endDeleteIdx)
+        return orignalLength - len(self.new_file_contents)
+
+    def fixActionFromParameter(self, idx):
+        """
+        Given the line index of an action in the newly generated log contents, ensure that the parameter denoting where we last acted on is correct,
+        after having potentially deleted previous parts of the original log.
+        """
+
+        line = self.new_file_contents[idx]
+        strings = line.split("-")
+        statePrefix = None
+        entity = None
+        expectedParam = None
+        if line.startswith("!LOOKAT"):
+            statePrefix = "looking_at"
+            entity = strings[1]
+            expectedParam = strings[2]
+        elif line.startswith("!MOVETO"):
+            statePrefix = "at"
+            entity = strings[1]
+            expectedParam = strings[2]
+        else:
+            return  # Only applies to certain actions
+
+        # Find the last appearance of the statePrefix for the entity in the new log, and ensure that the parameter in the action matches
+        lastSetIdx = None
+        if any(singleLine.startswith(statePrefix) for singleLine in self.single_token_lines):
+            for i in range(idx, -1, -1):    # A line without a subject could match, so loop upwards through the new log line by line
+                stringsToCheck = self.new_file_tokens[i]
+                if stringsToCheck[0].startswith(statePrefix) and stringsToCheck[1] == entity:
+                    lastSetIdx = i
+                    break
+        else:
+            for predicate, lineIndexes in self.state_indexes.get(entity, {}).items():
+                if predicate.startswith(statePrefix):
+                    matchIdx = bisect_right(lineIndexes, idx) - 1
+                    if matchIdx >= 0 and (lastSetIdx == None or lineIndexes[matchIdx] > lastSetIdx):
+                        lastSetIdx = lineIndexes[matchIdx]
+        if lastSetIdx == None:
             return
 
-def processLogFile(filePath):
-    """
-    Given a full, absolute path to a log file, parse the file and fix any issues, rewriting the result back out to the file.
-    """
-    global LOGS_DELETED, id_counters, old_file_contents, new_file_contents, id_map, dead_entities, startMarkerIndex, endMarkerIndex
-
-    resetGlobals()
-    with open(filePath, "r") as logFile:
-        line = logFile.readline()
-        while line:
-            nextLine = logFile.readline()
-            if not nextLine:
-                old_file_contents.append(line)
-            else:
-                old_file_contents.append(line[:-1]) # Do not include newline at the end of each line
-            line = nextLine
-
-    # ============================================================
-    # Copy old log -> new log, applying adjustments
-    # ============================================================
-    lineIdx = -1
-    while lineIdx < len(old_file_contents) - 1:
-        lineIdx += 1
-        line = getLine(lineIdx)
+        actualParam = self.new_file_tokens[lastSetIdx][2]
+        if actualParam != expectedParam:
+            strings[2] = actualParam
+            self.new_file_contents[idx] = "-".join(strings)
+            self.new_file_tokens[idx] = strings
+
+    def process(self):
+        """
+        Parse the log file and fix any issues, writing the result out to the output path. The output is deleted instead if the log
+        cannot be fixed, or does not meet the minimum number of kills and lines. Returns a LogResult.
+        """
+        filePath = self.filePath
+        with open(filePath, "r") as logFile:
+            line = logFile.readline()
+            while line:
+                nextLine = logFile.readline()
+                if not nextLine:
+                    self.old_file_contents.append(line)
+                else:
+                    self.old_file_contents.append(line[:-1]) # Do not include newline at the end of each line
+                line = nextLine
+        self.old_file_tokens = [line.split("-") for line in self.old_file_contents]
+        self.next_action_indexes = [len(self.old_file_contents)] * (len(self.old_file_contents) + 1)
+        for i in range(len(self.old_file_contents) - 1, -1, -1):
+            self.next_action_indexes[i] = i if self.old_file_contents[i].startswith("!") else self.next_action_indexes[i + 1]
 
         # ============================================================
-        # Line Checks
+        # Copy old log -> new log, applying adjustments
         # ============================================================
-        # Empty string
-        if line == "":
-            handleEmptyLine(line)
-            continue
-        # ClosestXXX declaration
-        elif line.startswith("closest"):
-            handleClosestXXXLine(line)
-            continue
-        # Leaving initial state output
-        elif line.startswith("START"):
-            startMarkerIndex = lineIdx
-            addLine(line)
-            continue
-        # Entering final state output
-        elif line.startswith("END"):
-            endMarkerIndex = lineIdx
-            addLine(line)
-            continue
-        # Defining a new entity
-        elif line.startswith("agents") or line.startswith("mobs") or line.startswith("items"):
-            handleEntityDefinitionLine(line)
-            continue
-        # Declaring an entity as either alive or dead
-        elif line.startswith("status"):
-            handleEntityStatusLine(line)
-            continue
-        # Attacking an entity
-        elif line.startswith("!ATTACK"):
-            lineIdx += handleAttackLine(line, lineIdx)
-            continue
-        # Default case... just add the line
-        else:
-            addLine(line)
-            continue
-
-    # ============================================================
-    # Perform additional cleanup on new log
-    # ============================================================
-    lineIdx = -1
-    new_file_len = len(new_file_contents)
-    startMarkerIndex = None
-    endMarkerIndex = None
-    nextActionIsFirstAction = True
-    while lineIdx < new_file_len - 1:
-        lineIdx += 1
-        line = new_file_contents[lineIdx]
-        strings = line.split("-")
+        lineIdx = -1
+        while lineIdx < len(self.old_file_contents) - 1:
+            lineIdx += 1
+            line = self.getLine(lineIdx)
+
+            # ============================================================
+            # Line Checks
+            # ============================================================
+            # Empty string
+            if line == "":
+                self.handleEmptyLine(line)
+                continue
+            # ClosestXXX declaration
+            elif line.startswith("closest"):
+                self.handleClosestXXXLine(line)
+                continue
+            # Leaving initial state output
+            elif line.startswith("START"):
+                self.startMarkerIndex = lineIdx
+                self.addLine(line)
+                continue
+            # Entering final state output
+            elif line.startswith("END"):
+                self.endMarkerIndex = lineIdx
+                self.addLine(line)
+                continue
+            # Defining a new entity
+            elif line.startswith("agents") or line.startswith("mobs") or line.startswith("items"):
+                self.handleEntityDefinitionLine(line)
+                continue
+            # Declaring an entity as either alive or dead
+            elif line.startswith("status"):
+                self.handleEntityStatusLine(line)
+                continue
+            # Attacking an entity
+            elif line.startswith("!ATTACK"):
+                lineIdx += self.handleAttackLine(line, lineIdx)
+                continue
+            # Default case... just add the line
+            else:
+                self.addLine(line)
+                continue
 
         # ============================================================
-        # Line Checks
+        # Perform additional cleanup on new log
         # ============================================================
-        # Leaving initial state output
-        if line.startswith("START"):
-            startMarkerIndex = lineIdx
-            continue
-        # If line represents an action
-        elif strings[0] in ACTION_POST_TUPLES:
-            # If it is a LOOKAT or MOVETO command, possibly fix the 3rd parameter of where we looked/moved from previously after deleting parts of the log
-            fixActionFromParameter(lineIdx)
-
-            # Check that each action's preconditions were actually set before-hand
-            if nextActionIsFirstAction and startMarkerIndex != None:
-                nextActionIsFirstAction = False
-                returnValue = checkActionPreconditions(lineIdx, True)
-            else:
-                returnValue = checkActionPreconditions(lineIdx)
-            if returnValue < 0:
-                os.remove(filePath)
-                LOGS_DELETED += 1
-                return
-            elif returnValue > 0:   # Move back that number of lines and continue
-                lineIdx -= (returnValue + 1)
-                new_file_len -= returnValue
+        lineIdx = -1
+        new_file_len = len(self.new_file_contents)
+        self.startMarkerIndex = None
+        self.endMarkerIndex = None
+        nextActionIsFirstAction = True
+        self.__resetNewLineIndexes__()
+        while lineIdx < new_file_len - 1:
+            lineIdx += 1
+            line = self.new_file_contents[lineIdx]
+            strings = self.new_file_tokens[lineIdx]
+            self.__indexNewLines__(lineIdx)
+
+            # ============================================================
+            # Line Checks
+            # ============================================================
+            # Leaving initial state output
+            if line.startswith("START"):
+                self.startMarkerIndex = lineIdx
                 continue
-    
-            # Check that each action is followed by its expected post-conditions
-            returnValue = checkActionPostconditions(lineIdx)
-            if returnValue > 0:    # Move back that number of lines and continue
-                lineIdx -= (returnValue + 1)
-                new_file_len -= returnValue
+            # If line represents an action
+            elif strings[0] in ACTION_POST_TUPLES:
+                # If it is a LOOKAT or MOVETO command, possibly fix the 3rd parameter of where we looked/moved from previously after deleting parts of the log
+                self.fixActionFromParameter(lineIdx)
+
+                # Check that each action's preconditions were actually set before-hand
+                if nextActionIsFirstAction and self.startMarkerIndex != None:
+                    nextActionIsFirstAction = False
+                    returnValue = self.checkActionPreconditions(lineIdx, True)
+                else:
+                    returnValue = self.checkActionPreconditions(lineIdx)
+                if returnValue < 0:
+                    self.__removeOutput__()
+                    return self.__getResult__("preconditions")
+                elif returnValue > 0:   # Move back that number of lines and continue
+                    lineIdx -= (returnValue + 1)
+                    new_file_len -= returnValue
+                    continue
+
+                # Check that each action is followed by its expected post-conditions
+                returnValue = self.checkActionPostconditions(lineIdx)
+                if returnValue > 0:    # Move back that number of lines and continue
+                    lineIdx -= (returnValue + 1)
+                    new_file_len -= returnValue
+                    continue
                 continue
-            continue
-
-    # Output the list of strings back to the file with the same name
-    with open(filePath, "w+") as newFile:
-        newFile.write("\n".join(new_file_contents))
 
-    # Do any additional parameter checks to see if we should keep the file
-    if len(dead_entities) < MIN_KILLS:
-        os.remove(filePath)
-        LOGS_DELETED += 1
-    if len(new_file_contents) < MIN_LINES:
-        os.remove(filePath)
-        LOGS_DELETED += 1
+        # Do any additional parameter checks to see if we should keep the file
+        if len(self.dead_entities) < self.minKills:
+            self.__removeOutput__()
+            return self.__getResult__("kills")
+        if len(self.new_file_contents) < self.minLines:
+            self.__removeOutput__()
+            return self.__getResult__("lines")
+
+        # Output the list of strings to the output file
+        outputDirPath = os.path.dirname(self.outputPath)
+        if outputDirPath != "" and not os.path.isdir(outputDirPath):
+            os.makedirs(outputDirPath, exist_ok = True)
+        with open(self.outputPath, "w+") as newFile:
+            newFile.write("\n".join(self.new_file_contents))
+        return self.__getResult__(None)
+
+    def __removeOutput__(self):
+        """
+        Internal method that deletes the output of this log (which is the log file itself when cleaning logs in place), if it exists.
+        """
+        if os.path.isfile(self.outputPath):
+            os.remove(self.outputPath)
+
+    def __getResult__(self, deleteReason):
+        """
+        Internal method that returns the LogResult for this log, given the reason it was deleted for (or None if it was kept).
+        """
+        return LogResult(self.filePath, deleteReason, len(self.old_file_contents), len(self.new_file_contents), len(self.dead_entities))
+
+def processLogFile(filePath, outputPath = None, minKills = 0, minLines = 0):
+    """
+    Given a full, absolute path to a log file, parse the file and fix any issues, writing the result out to the output path given
+    (or deleting it). The log file is cleaned in place if no output path is given. Returns a LogResult.
+    """
+    return LogProcessor(filePath, outputPath, minKills, minLines).process()
 
 def main():
     """
     Main method.
     """
-    global WORKING_DIR, TOTAL_LOGS, MIN_KILLS, MIN_LINES
+    global WORKING_DIR, CLEANED_LOG_DIR, TOTAL_LOGS, LOGS_DELETED, MIN_KILLS, MIN_LINES
+    workers = 1
 
     # Process command-line parameters
     if "-h" in sys.argv:
@@ -475,6 +687,10 @@ def main():
         print("-h : Display this help message")
         print("-l <amt> : New log must contain <amt> number of lines (delete log otherwise)")
         print("-k <amt> : Companion must kill <amt> number of entities (delete log otherwise)")
+        print("-r : Recover the partial logs of missions that never finished before processing, removing any unfinished trailing action")
+        print("-j <amt> : Process <amt> number of logs at once, each in its own process (default 1)")
+        print("-o <dir> : Write cleaned logs to <dir> instead of the cleaned_logs/ directory")
+        print("-f : Process every log again, even those that have not changed since they were last processed")
         return
     if "-k" in sys.argv:
         kIndex = sys.argv.index("-k")
@@ -497,17 +713,112 @@ def main():
             print("Error - '{}' is not a valid input for argument '{}'".format(sys.argv[lIndex + 1], sys.argv[lIndex]))
             return
 
+    if "-j" in sys.argv:
+        jIndex = sys.argv.index("-j")
+        if jIndex == len(sys.argv) - 1:
+            print("Error - No amount specified for argument '-j'")
+            return
+        try:
+            workers = int(sys.argv[jIndex + 1])
+        except ValueError:
+            print("Error - '{}' is not a valid input for argument '{}'".format(sys.argv[jIndex + 1], sys.argv[jIndex]))
+            return
+
+    if "-o" in sys.argv:
+        oIndex = sys.argv.index("-o")
+        if oIndex == len(sys.argv) - 1:
+            print("Error - No directory specified for argument '-o'")
+            return
+        CLEANED_LOG_DIR = os.path.abspath(sys.argv[oIndex + 1])
+
     WORKING_DIR = os.getcwd()
+    if CLEANED_LOG_DIR == None:
+        CLEANED_LOG_DIR = os.path.join(WORKING_DIR, "cleaned_logs")
     if not doesLogDirectoryExist():
         print("Error - Output directory '{}' does not exist.".format(os.path.join(WORKING_DIR, "logs")))
-
-    logFilePaths = getLogFilePaths()
-    TOTAL_LOGS = len(logFilePaths)
-    for path in logFilePaths:
-        processLogFile(path)
-
+        exit(1)
+
+    if "-r" in sys.argv:
+        partialLogFilePaths = getPartialLogFilePaths()
+        liveLogCount = len(partialLogFilePaths)
+        partialLogFilePaths = [path for path in partialLogFilePaths if not TraceWriter.isBeingWritten(path)]
+        liveLogCount -= len(partialLogFilePaths)
+        recoveredLogs = [path for path in partialLogFilePaths if TraceWriter.recover(path) != None]
+        print("Logs recovered: {}".format(len(recoveredLogs)))
+        if liveLogCount > 0:
+            print("Logs skipped (still being written by a running mission): {}".format(liveLogCount))
+        if len(recoveredLogs) < len(partialLogFilePaths):
+            print("Logs unrecoverable (never reached START): {}".format(len(partialLogFilePaths) - len(recoveredLogs)))
+
+    # Skip each log that has not changed since it was last processed, according to the manifest. A log is only hashed when its size or
+    # modification time differs from that recorded.
+    logDirPath = os.path.join(WORKING_DIR, "logs")
+    manifestPath = os.path.join(CLEANED_LOG_DIR, MANIFEST_FILE_NAME)
+    previousManifest = readManifest(manifestPath)
+    manifest = previousManifest if "-f" not in sys.argv else {}
+    newManifest = {}
+    results = []
+    logFilePaths = []
+    outputPaths = []
+    pendingLogs = []    # A list of (relative path, file status, file hash) tuples for each log to be processed
+    for filePath in getLogFilePaths():
+        relativePath = os.path.relpath(filePath, logDirPath)
+        outputPath = os.path.join(CLEANED_LOG_DIR, relativePath)
+        fileStatus = os.stat(filePath)
+        entry = manifest.get(relativePath)
+        fileHash = None
+        if isManifestEntryCurrent(entry, outputPath):
+            if entry["size"] == fileStatus.st_size and entry["mtime"] == fileStatus.st_mtime_ns:
+                fileHash = entry["hash"]
+            else:
+                fileHash = getFileHash(filePath)
+            if fileHash == entry["hash"]:
+                newManifest[relativePath] = dict(entry, size=fileStatus.st_size, mtime=fileStatus.st_mtime_ns)
+                results.append(LogResult(filePath, entry["deleteReason"], entry["originalLines"], entry["cleanedLines"], entry["kills"]))
+                continue
+        logFilePaths.append(filePath)
+        outputPaths.append(outputPath)
+        pendingLogs.append((relativePath, fileStatus, fileHash if fileHash != None else getFileHash(filePath)))
+    skippedLogs = len(results)
+
+    # Remove the cleaned output of each log that has been removed from the logs/ directory since it was last processed
+    prunedLogs = 0
+    currentLogs = set(newManifest) | set(relativePath for relativePath, _, _ in pendingLogs)
+    for relativePath in previousManifest:
+        if relativePath not in currentLogs:
+            outputPath = os.path.join(CLEANED_LOG_DIR, relativePath)
+            if os.path.isfile(outputPath):
+                os.remove(outputPath)
+            prunedLogs += 1
+
+    if workers > 1 and len(logFilePaths) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            processedResults = list(executor.map(processLogFile, logFilePaths, outputPaths, [MIN_KILLS] * len(logFilePaths), [MIN_LINES] * len(logFilePaths), chunksize=max(1, len(logFilePaths) // (workers * 4))))
+    else:
+        processedResults = [processLogFile(path, outputPath, MIN_KILLS, MIN_LINES) for path, outputPath in zip(logFilePaths, outputPaths)]
+    for (relativePath, fileStatus, fileHash), result in zip(pendingLogs, processedResults):
+        newManifest[relativePath] = getManifestEntry(result, fileStatus, fileHash)
+    results.extend(processedResults)
+    writeManifest(manifestPath, newManifest)
+
+    # Merge the statistics of every log
+    TOTAL_LOGS = len(results)
+    print("Logs processed: {}".format(len(processedResults)))
+    print("Logs skipped (unchanged since last processed): {}".format(skippedLogs))
+    if prunedLogs > 0:
+        print("Logs pruned (removed from the logs directory): {}".format(prunedLogs))
+    LOGS_DELETED = len([result for result in results if result.deleteReason != None])
+    keptResults = [result for result in results if result.deleteReason == None]
     print("Logs cleaned: {}".format(TOTAL_LOGS - LOGS_DELETED))
     print("Logs deleted: {}".format(LOGS_DELETED))
+    for reason in ["preconditions", "kills", "lines"]:
+        count = len([result for result in results if result.deleteReason == reason])
+        if count > 0:
+            print("    Due to unmet {}: {}".format(reason if reason == "preconditions" else "minimum " + reason, count))
+    if len(keptResults) > 0:
+        print("Lines in cleaned logs: {} (from {} originally)".format(sum(result.cleanedLines for result in keptResults), sum(result.originalLines for result in keptResults)))
+        print("Kills in cleaned logs: {}".format(sum(result.kills for result in keptResults)))
+    print("Cleaned logs have been saved to: {}".format(CLEANED_LOG_DIR))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,30 +1,211 @@
 #!/usr/bin/python
 # ==============================================================================================
 # This file represents a standalone script for running one of the missions in this directory
-# a certain number of times contiguously. This is useful for exhaustively simulating a single
-# mission.
+# a certain number of times. This is useful for exhaustively simulating a single mission.
+# Several runs may be ran at once, each given its own set of Minecraft client ports from a pool.
 # ==============================================================================================
 import os
 import sys
+import time
+import queue
+import traceback
 import subprocess
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from Utils import CLIENTS_ENVIRONMENT_VARIABLE, RUN_ID_ENVIRONMENT_VARIABLE, resetOutputFileSuffix
+
+# The outcome of a single run of a mission
+RunResult = namedtuple("RunResult", "run ports exitCode duration logFiles performanceFiles output")
+
+LOG_OUTPUT_PREFIX = "Mission log output has been saved to: "
+PERFORMANCE_OUTPUT_MARKER = " performance output has been saved to: "
+
+def parsePorts(string):
+    """
+    Returns a list of ports from a string of comma-separated ports and inclusive ranges (ie. "10000-10003,10010").
+    """
+    ports = []
+    for part in string.split(","):
+        if "-" in part:
+            first, last = part.split("-")
+            ports.extend(range(int(first), int(last) + 1))
+        else:
+            ports.append(int(part))
+    return ports
+
+def getArgument(flag, default):
+    """
+    Returns the value following a flag in the command line arguments, or the default given if the flag is not present.
+    """
+    if flag not in sys.argv:
+        return default
+    index = sys.argv.index(flag)
+    if index == len(sys.argv) - 1:
+        print("Error - no value given for argument '{}'".format(flag))
+        exit(1)
+    return sys.argv[index + 1]
+
+def runMission(command, run, portGroups):
+    """
+    Run a single mission as a subprocess using a group of client ports taken from the pool, which is returned to the pool
+    once the mission has finished. Returns a RunResult.
+    """
+    ports = portGroups.get()
+    try:
+        env = dict(os.environ)
+        env[CLIENTS_ENVIRONMENT_VARIABLE] = ",".join("127.0.0.1:{}".format(port) for port in ports)
+        env[RUN_ID_ENVIRONMENT_VARIABLE] = "run{}".format(run)
+        print("Starting run {} on ports {}".format(run, ports))
+        startTime = time.time()
+        process = subprocess.run(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+        duration = time.time() - startTime
+    finally:
+        portGroups.put(ports)
+
+    output = process.stdout.splitlines()
+    logFiles = [line[len(LOG_OUTPUT_PREFIX):] for line in output if line.startswith(LOG_OUTPUT_PREFIX)]
+    performanceFiles = [line.split(PERFORMANCE_OUTPUT_MARKER, 1)[1] for line in output if PERFORMANCE_OUTPUT_MARKER in line]
+    print("Finished run {} with exit code {} in {:.1f}s".format(run, process.returncode, duration))
+    return RunResult(run, ports, process.returncode, duration, logFiles, performanceFiles, output)
+
+class OutputRecorder:
+    """
+    Wrapper for an output stream that records each line written to it, while still passing everything through.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.lines = []
+        self.__partialLine = ""
+
+    def write(self, text):
+        self.stream.write(text)
+        lines = (self.__partialLine + text).split("\n")
+        self.__partialLine = lines.pop()
+        self.lines.extend(lines)
+
+    def flush(self):
+        self.stream.flush()
+
+def runMissionInProcess(code, missionFile, run, ports):
+    """
+    Run a single mission by executing its already compiled code in this process, after resetting the global state left
+    behind by any previous mission. Returns a RunResult.
+    """
+    from Agent import Agent
+    from Logger import Logger
+    from Performance import Performance
+    Agent.reset()   # Also resets the command channel of each agent, so no command sent by the last mission is suppressed
+    Logger.reset()  # Also forgets the ids given to the items of the last mission
+    Performance.reset()
+    resetOutputFileSuffix()
+    simulator = sys.modules.get("MalmoPython")
+    if simulator != None and hasattr(simulator, "simulatedClock"):    # The offline MalmoSimulator is installed, so start its clock over
+        simulator.simulatedClock.reset()
+
+    os.environ[CLIENTS_ENVIRONMENT_VARIABLE] = ",".join("127.0.0.1:{}".format(port) for port in ports)
+    os.environ[RUN_ID_ENVIRONMENT_VARIABLE] = "run{}".format(run)
+    sys.argv = [missionFile]
+    print("Starting run {} on ports {}".format(run, ports))
+
+    recorder = OutputRecorder(sys.stdout)
+    sys.stdout = recorder
+    startTime = time.time()
+    try:
+        exec(code, {"__name__": "__main__", "__file__": missionFile})
+        exitCode = 0
+    except SystemExit as e:
+        exitCode = e.code if isinstance(e.code, int) else (0 if e.code == None else 1)
+    except Exception:
+        traceback.print_exc(file=recorder)
+        exitCode = 1
+    finally:
+        sys.stdout = recorder.stream
+    duration = time.time() - startTime
+
+    output = recorder.lines
+    logFiles = [line[len(LOG_OUTPUT_PREFIX):] for line in output if line.startswith(LOG_OUTPUT_PREFIX)]
+    performanceFiles = [line.split(PERFORMANCE_OUTPUT_MARKER, 1)[1] for line in output if PERFORMANCE_OUTPUT_MARKER in line]
+    print("Finished run {} with exit code {} in {:.1f}s".format(run, exitCode, duration))
+    return RunResult(run, ports, exitCode, duration, logFiles, performanceFiles, output)
 
 def main():
-    if len(sys.argv) < 3:
-        print("Usage: Run.py <mission> <times>")
+    if len(sys.argv) < 3 or "-h" in sys.argv:
+        print("Usage: Run.py <mission> <times> <args>")
+        print("Optional Arguments:")
+        print("    -j <count> : The maximum number of missions to run at once (default 1)")
+        print("    -p <ports> : The pool of client ports to assign to missions, as a comma-separated list of ports and ranges (default 10000 upwards)")
+        print("    -c <count> : The number of clients, and so ports, each mission uses (default 2)")
+        print("    -o <file>  : Write a CSV summary of every run to the file given")
+        print("    -s         : Run missions in the offline simulator, rather than with Minecraft clients")
+        print("    -w         : Run missions one after another in this process, only importing modules once (ignores -j)")
         return
 
     missionFile = os.path.join(os.getcwd(), sys.argv[1])
     numberOfRuns = int(sys.argv[2])
-
     if not os.path.isfile(missionFile):
         print("Could not find mission script '{}'".format(missionFile))
         return
 
-    for i in range(0, numberOfRuns):
-        print("Starting run {}".format(i + 1))
-        subprocess.check_output(["python3", missionFile])
+    try:
+        parallelRuns = int(getArgument("-j", 1))
+        clientsPerMission = int(getArgument("-c", 2))
+        ports = parsePorts(getArgument("-p", "{}-{}".format(10000, 10000 + parallelRuns * clientsPerMission - 1)))
+    except ValueError as e:
+        print("Error - invalid argument: {}".format(e))
+        return
+    summaryFile = getArgument("-o", None)
+
+    # Split the port pool into a group of ports for each mission that can be ran at once
+    portGroups = queue.Queue()
+    for i in range(0, len(ports) - clientsPerMission + 1, clientsPerMission):
+        portGroups.put(ports[i:i + clientsPerMission])
+    parallelRuns = min(parallelRuns, portGroups.qsize())
+    if parallelRuns == 0:
+        print("Error - the port pool does not contain enough ports for a single mission")
+        return
+
+    command = ["python3", missionFile]
+    if "-s" in sys.argv:
+        command = ["python3", os.path.join(os.path.dirname(os.path.abspath(__file__)), "MalmoSimulator.py"), missionFile]
+
+    startTime = time.time()
+    if "-w" in sys.argv:
+        # Warm runs: compile the mission once, and run it repeatedly in this process
+        parallelRuns = 1
+        if "-s" in sys.argv:
+            import MalmoSimulator
+            MalmoSimulator.install()
+        sys.path.insert(0, os.path.dirname(missionFile))
+        with open(missionFile) as file:
+            code = compile(file.read(), missionFile, "exec")
+        ports = portGroups.get()
+        results = [runMissionInProcess(code, missionFile, run, ports) for run in range(1, numberOfRuns + 1)]
+    else:
+        with ThreadPoolExecutor(max_workers=parallelRuns) as executor:
+            results = list(executor.map(lambda run: runMission(command, run, portGroups), range(1, numberOfRuns + 1)))
+    totalTime = time.time() - startTime
+
+    # Summarize all runs
+    print()
+    print("{:>5} {:>14} {:>6} {:>9}  {}".format("Run", "Ports", "Exit", "Time (s)", "Output files"))
+    for result in results:
+        print("{:>5} {:>14} {:>6} {:>9.1f}  {}".format(result.run, ",".join(str(port) for port in result.ports), result.exitCode, result.duration, " ".join(result.logFiles + result.performanceFiles)))
+    failedRuns = [result for result in results if result.exitCode != 0]
+    print("{} of {} runs succeeded in {:.1f}s ({} at once)".format(len(results) - len(failedRuns), len(results), totalTime, parallelRuns))
+    for result in failedRuns:
+        print()
+        print("Output of failed run {}:".format(result.run))
+        print("\n".join(result.output[-20:]))
+
+    if summaryFile != None:
+        with open(summaryFile, "w") as file:
+            file.write("Run,Ports,ExitCode,Duration,LogFiles,PerformanceFiles\n")
+            for result in results:
+                file.write('{},"{}",{},{:.3f},"{}","{}"\n'.format(result.run, ",".join(str(port) for port in result.ports), result.exitCode, result.duration, ";".join(result.logFiles), ";".join(result.performanceFiles)))
+        print("Run summary has been saved to: {}".format(summaryFile))
 
     print("Done")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
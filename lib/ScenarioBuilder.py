@@ -3,8 +3,14 @@
 # mission. Note: The only class in this file that should be used directly by callers is the
 # ScenarioBuilder
 # ==============================================================================================
+import hashlib
 from Utils import *
 
+SCENARIO_HASH_VERSION = 1   # Included in the hash of every scenario, and incremented whenever the XML rendered for a scenario changes
+
+# A single element of a DrawingDecorator, made up of its tag (ie. "DrawBlock") and a tuple of (name, value) attribute pairs
+Decorator = namedtuple("Decorator", "tag attributes")
+
 class EnvironmentBuilder:
     """
     Internal class used by the ScenarioBuilder for developing XML for the environment of a Malmo mission
@@ -12,7 +18,7 @@ class EnvironmentBuilder:
 
     def __init__(self):
         self.__generatorString = "3;7,2*3,2;1;"
-        self.__decoratorsXML = ""
+        self.__decorators = []
         self.__allowedMobs = set([])
 
     def getAllowedMobsList(self):
@@ -21,6 +27,18 @@ class EnvironmentBuilder:
         """
         return self.__allowedMobs
 
+    def getDecorators(self):
+        """
+        Returns the list of Decorators added to this environment, in the order they were added.
+        """
+        return self.__decorators
+
+    def getPrimitives(self):
+        """
+        Returns a tuple of everything that determines the XML of this environment.
+        """
+        return (self.__generatorString, tuple(self.__decorators), tuple(sorted(self.__allowedMobs)))
+
     def turnOnAnimalSpawning(self):
         """
         Allow for the natural spawning of animals & villagers.
@@ -63,75 +81,186 @@ class EnvironmentBuilder:
         self.__allowedMobs.discard(MobType.Hostile.Skeleton.value)
         self.__allowedMobs.discard(MobType.Hostile.Creeper.value)
 
-    def addCube(self, point0, point1, blockType, variant = None):
+    def __addBlockDecorator__(self, tag, attributes, blockType, variant):
         """
-        Add a cuboid of a specific block type from lower-left-near corner point0 to upper-right-far corner point1.
-        Each point is specified as a named Vector. If the block type specified is a mob spawner an additional mob type
-        must be provided.
+        Internal method that adds a decorator drawing blocks of the type given. If the block type is a mob spawner, the
+        decorator is only added if a mob type is provided as the variant.
         """
         if (blockType == BlockType.Mob_spawner):
             if (variant != None):
                 self.__allowedMobs.add(variant.value)   # Ensure the mob is allowed to spawn
-                self.__decoratorsXML += '''<DrawCuboid x1="{}" y1="{}" z1="{}" x2="{}" y2="{}" z2="{}" type="{}" variant="{}"/>'''.format(point0.x, point0.y, point0.z, point1.x, point1.y, point1.z, blockType.value, variant.value)
+                self.__decorators.append(Decorator(tag, tuple(attributes + [("type", blockType.value), ("variant", variant.value)])))
         else:
-            self.__decoratorsXML += '''<DrawCuboid x1="{}" y1="{}" z1="{}" x2="{}" y2="{}" z2="{}" type="{}"/>'''.format(point0.x, point0.y, point0.z, point1.x, point1.y, point1.z, blockType.value)
+            self.__decorators.append(Decorator(tag, tuple(attributes + [("type", blockType.value)])))
+
+    def addCube(self, point0, point1, blockType, variant = None):
+        """
+        Add a cuboid of a specific block type from lower-left-near corner point0 to upper-right-far corner point1.
+        Each point is specified as a named Vector. If the block type specified is a mob spawner an additional mob type
+        must be provided.
+        """
+        self.__addBlockDecorator__("DrawCuboid", [("x1", point0.x), ("y1", point0.y), ("z1", point0.z), ("x2", point1.x), ("y2", point1.y), ("z2", point1.z)], blockType, variant)
 
     def addLine(self, point0, point1, blockType, variant = None):
         """
         Add a line of a specific block type from point0 to point1, where each point is specified as a named Vector.
         If the block type specified is a mob spawner, an additional mob type must be provided.
         """
-        if (blockType == BlockType.Mob_spawner):
-            if (variant != None):
-                self.__allowedMobs.add(variant.value)   # Ensure the mob is allowed to spawn
-                self.__decoratorsXML += '''<DrawLine x1="{}" y1="{}" z1="{}" x2="{}" y2="{}" z2="{}" type="{}" variant="{}"/>'''.format(point0.x, point0.y, point0.z, point1.x, point1.y, point1.z, blockType.value, variant.value)
-        else:
-            self.__decoratorsXML += '''<DrawLine x1="{}" y1="{}" z1="{}" x2="{}" y2="{}" z2="{}" type="{}"/>'''.format(point0.x, point0.y, point0.z, point1.x, point1.y, point1.z, blockType.value)
+        self.__addBlockDecorator__("DrawLine", [("x1", point0.x), ("y1", point0.y), ("z1", point0.z), ("x2", point1.x), ("y2", point1.y), ("z2", point1.z)], blockType, variant)
 
     def addBlock(self, location, blockType, variant = None):
         """
         Add a block of a specific type at the location specified. The location should be given as a named Vector.
         If the block type specified is a mob spawner, an additional mob type must be provided.
         """
-        if (blockType == BlockType.Mob_spawner):
-            if (variant != None):
-                self.__allowedMobs.add(variant.value)   # Ensure the mob is allowed to spawn
-                self.__decoratorsXML += '''<DrawBlock x="{}" y="{}" z="{}" type="{}" variant="{}"/>'''.format(location.x, location.y, location.z, blockType.value, variant.value)
-        else:
-            self.__decoratorsXML += '''<DrawBlock x="{}" y="{}" z="{}" type="{}"/>'''.format(location.x, location.y, location.z, blockType.value)
+        self.__addBlockDecorator__("DrawBlock", [("x", location.x), ("y", location.y), ("z", location.z)], blockType, variant)
 
     def addSphere(self, center, radius, blockType, variant = None):
         """
         Add a sphere of a specific block type, with a given radius and center. The center should be given as a named Vector.
         If the block type specified is a mob spawner, an additional mob type must be provided.
         """
-        if (blockType == BlockType.Mob_spawner):
-            if (variant != None):
-                self.__allowedMobs.add(variant.value)   # Ensure the mob is allowed to spawn
-                self.__decoratorsXML += '''<DrawSphere x="{}" y="{}" z="{}" radius="{}" type="{}" variant="{}"/>'''.format(center.x, center.y, center.z, radius, blockType.value, variant.value)
-        else:
-            self.__decoratorsXML += '''<DrawSphere x="{}" y="{}" z="{}" radius="{}" type="{}"/>'''.format(center.x, center.y, center.z, radius, blockType.value)
+        self.__addBlockDecorator__("DrawSphere", [("x", center.x), ("y", center.y), ("z", center.z), ("radius", radius)], blockType, variant)
 
     def addDropItem(self, location, itemType):
         """
         Add a drop-item at a specific location specified as a named Vector.
         """
-        self.__decoratorsXML += '''<DrawItem x="{}" y="{}" z="{}" type="{}"/>'''.format(location.x, location.y, location.z, itemType.value)
+        self.__decorators.append(Decorator("DrawItem", (("x", location.x), ("y", location.y), ("z", location.z), ("type", itemType.value))))
 
     def addMob(self, location, mobType):
         """
         Spawn a mob of a specific type at the named Vector location given.
         """
-        self.__decoratorsXML += '''<DrawEntity x="{}" y="{}" z="{}" type="{}"/>'''.format(location.x, location.y, location.z, mobType.value)
+        self.__decorators.append(Decorator("DrawEntity", (("x", location.x), ("y", location.y), ("z", location.z), ("type", mobType.value))))
+
+    @staticmethod
+    def __blockPosition__(decorator):
+        """
+        Internal method that returns the (x, y, z) position of a DrawBlock decorator as a tuple of integers, or None if
+        the position is not made up of whole numbers.
+        """
+        position = (decorator.attributes[0][1], decorator.attributes[1][1], decorator.attributes[2][1])
+        if not all(type(value) == int or float(value).is_integer() for value in position):
+            return None
+        return tuple(int(value) for value in position)
+
+    @staticmethod
+    def __blockRegion__(decorator):
+        """
+        Internal method that returns the region of blocks drawn by a DrawCuboid, or a DrawLine along a single axis, as a
+        tuple of its (x, y, z) minimum and maximum corners. Returns None for any other decorator.
+        """
+        if decorator.tag != "DrawCuboid" and decorator.tag != "DrawLine":
+            return None
+        attributes = dict(decorator.attributes)
+        point0 = (attributes["x1"], attributes["y1"], attributes["z1"])
+        point1 = (attributes["x2"], attributes["y2"], attributes["z2"])
+        if decorator.tag == "DrawLine" and sum(1 for i in range(0, 3) if point0[i] != point1[i]) > 1:
+            return None     # Diagonal lines do not cover a box
+        return (tuple(min(point0[i], point1[i]) for i in range(0, 3)), tuple(max(point0[i], point1[i]) for i in range(0, 3)))
+
+    def __removeOverwrittenBlocks__(self, decorators):
+        """
+        Internal method that returns the decorators given without any DrawBlock that is later drawn over by another block,
+        a cuboid, or a line along a single axis.
+        """
+        kept = []
+        laterPositions = set()  # Positions of blocks drawn later than the decorator being checked
+        laterRegions = []       # Regions of cuboids and lines drawn later than the decorator being checked
+        for decorator in reversed(decorators):
+            if decorator.tag == "DrawBlock":
+                position = EnvironmentBuilder.__blockPosition__(decorator)
+                if position != None:
+                    if position in laterPositions or any(all(low[i] <= position[i] <= high[i] for i in range(0, 3)) for low, high in laterRegions):
+                        continue
+                    laterPositions.add(position)
+            else:
+                region = EnvironmentBuilder.__blockRegion__(decorator)
+                if region != None:
+                    laterRegions.append(region)
+            kept.append(decorator)
+        kept.reverse()
+        return kept
+
+    def __mergeBlocks__(self, blocks):
+        """
+        Internal method that merges DrawBlock decorators, all drawn one after another, into as few DrawBlock, DrawLine and
+        DrawCuboid decorators as possible. Blocks are first joined into runs along x, then runs into rectangles along z,
+        and rectangles into cuboids along y, for each type of block separately.
+        """
+        merged = []
+        groups = {}     # A mapping of (type, variant) to a set of positions, in the order each block type first appears
+        for block in blocks:
+            position = EnvironmentBuilder.__blockPosition__(block)
+            if position == None:
+                merged.append(block)
+                continue
+            blockType = block.attributes[3][1]
+            variant = block.attributes[4][1] if len(block.attributes) > 4 else None
+            groups.setdefault((blockType, variant), set()).add(position)
+
+        for (blockType, variant), positions in groups.items():
+            # Runs along x, as (y, z, x1, x2)
+            runs = []
+            for x, y, z in sorted(positions, key=lambda p: (p[1], p[2], p[0])):
+                if len(runs) > 0 and runs[-1][0] == y and runs[-1][1] == z and runs[-1][3] == x - 1:
+                    runs[-1][3] = x
+                else:
+                    runs.append([y, z, x, x])
+
+            # Rectangles along z, as (y, x1, x2, z1, z2)
+            rectangles = []
+            for y, z, x1, x2 in sorted(runs, key=lambda r: (r[0], r[2], r[3], r[1])):
+                if len(rectangles) > 0 and rectangles[-1][0:3] == [y, x1, x2] and rectangles[-1][4] == z - 1:
+                    rectangles[-1][4] = z
+                else:
+                    rectangles.append([y, x1, x2, z, z])
+
+            # Cuboids along y, as (x1, x2, z1, z2, y1, y2)
+            cuboids = []
+            for y, x1, x2, z1, z2 in sorted(rectangles, key=lambda r: (r[1], r[2], r[3], r[4], r[0])):
+                if len(cuboids) > 0 and cuboids[-1][0:4] == [x1, x2, z1, z2] and cuboids[-1][5] == y - 1:
+                    cuboids[-1][5] = y
+                else:
+                    cuboids.append([x1, x2, z1, z2, y, y])
+
+            variantAttribute = [("variant", variant)] if variant != None else []
+            for x1, x2, z1, z2, y1, y2 in cuboids:
+                extents = sum(1 for low, high in [(x1, x2), (y1, y2), (z1, z2)] if low != high)
+                if extents == 0:
+                    merged.append(Decorator("DrawBlock", tuple([("x", x1), ("y", y1), ("z", z1), ("type", blockType)] + variantAttribute)))
+                else:
+                    merged.append(Decorator("DrawLine" if extents == 1 else "DrawCuboid", tuple([("x1", x1), ("y1", y1), ("z1", z1), ("x2", x2), ("y2", y2), ("z2", z2), ("type", blockType)] + variantAttribute)))
+        return merged
+
+    def optimize(self):
+        """
+        Returns the decorators of this environment reduced to as few as possible, while drawing the same world. Blocks drawn
+        over by a later block, cuboid or line are removed, and each group of blocks drawn one after another is merged into lines and cuboids.
+        Only blocks that touch can be merged, so blocks spaced apart (ie. a grid of torches placed every few blocks) are left as they are.
+        """
+        optimized = []
+        blocks = []     # The DrawBlock decorators drawn one after another since the last decorator of any other kind
+        for decorator in self.__removeOverwrittenBlocks__(self.__decorators):
+            if decorator.tag == "DrawBlock":
+                blocks.append(decorator)
+                continue
+            optimized.extend(self.__mergeBlocks__(blocks))
+            blocks = []
+            optimized.append(decorator)
+        optimized.extend(self.__mergeBlocks__(blocks))
+        return optimized
 
     def finish(self):
         """
         Return the complete XML string for this set of decorations
         """
+        decoratorsXML = "".join(['<{} {}/>'.format(decorator.tag, " ".join(['{}="{}"'.format(name, value) for name, value in decorator.attributes])) for decorator in self.optimize()])
         return '''
         <FlatWorldGenerator forceReset="true" generatorString="{}"/>
         {}
-        '''.format(self.__generatorString, "<DrawingDecorator>" + self.__decoratorsXML + "</DrawingDecorator>" if len(self.__decoratorsXML) > 0 else "")
+        '''.format(self.__generatorString, "<DrawingDecorator>" + decoratorsXML + "</DrawingDecorator>" if len(decoratorsXML) > 0 else "")
     
 
 class AgentBuilder:
@@ -143,7 +272,7 @@ class AgentBuilder:
         self.name = name
         self.__position = startPosition if startPosition != None else (0, 0, 0)
         self.__direction = startDirection.value if startDirection != None else Direction.North.value
-        self.__inventoryXML = ""
+        self.__inventory = []  # A list of (slot, item type, quantity) tuples
         self.__handlersXML = ""
 
     def setPosition(self, position):
@@ -175,7 +304,20 @@ class AgentBuilder:
         Add an item to this agent's inventory at a designated item slot number, specifying a quantity.
         Each agent has 39 item slots, where 0-8 are the hotbar slots, 9-35 are the inventory slots, and 36-39 are the armor slots.
         """
-        self.__inventoryXML += '''<InventoryItem slot="{}" type="{}" quantity="{}"/>'''.format(slot.value, item.value, quantity)
+        self.__inventory.append((slot.value, item.value, quantity))
+
+    def getInventory(self):
+        """
+        Returns the items added to this agent's inventory as a list of (slot, item type, quantity) tuples.
+        """
+        return self.__inventory
+
+    def getPrimitives(self):
+        """
+        Returns a tuple of everything that determines the XML of this agent, including the size of its grid observation.
+        """
+        gridHalfLengths = (GRID_OBSERVATION_X_HALF_LEN, GRID_OBSERVATION_Y_HALF_LEN, GRID_OBSERVATION_Z_HALF_LEN)
+        return (self.name, tuple(self.__position), self.__direction, tuple(self.__inventory), gridHalfLengths, self.__handlersXML)
 
 
     def finish(self):
@@ -209,7 +351,7 @@ class AgentBuilder:
         </ObservationFromNearbyEntities>
         {}
         </AgentHandlers>
-        </AgentSection>'''.format(self.name, self.__position.x, self.__position.y, self.__position.z, self.__direction, self.__inventoryXML, -GRID_OBSERVATION_X_HALF_LEN, -GRID_OBSERVATION_Y_HALF_LEN, -GRID_OBSERVATION_Z_HALF_LEN, GRID_OBSERVATION_X_HALF_LEN, GRID_OBSERVATION_Y_HALF_LEN, GRID_OBSERVATION_Z_HALF_LEN, self.__handlersXML)
+        </AgentSection>'''.format(self.name, self.__position.x, self.__position.y, self.__position.z, self.__direction, "".join(['<InventoryItem slot="{}" type="{}" quantity="{}"/>'.format(slot, item, quantity) for slot, item, quantity in self.__inventory]), -GRID_OBSERVATION_X_HALF_LEN, -GRID_OBSERVATION_Y_HALF_LEN, -GRID_OBSERVATION_Z_HALF_LEN, GRID_OBSERVATION_X_HALF_LEN, GRID_OBSERVATION_Y_HALF_LEN, GRID_OBSERVATION_Z_HALF_LEN, self.__handlersXML)
 
 
 class ScenarioBuilder:
@@ -253,15 +395,35 @@ class ScenarioBuilder:
         """
         self.agents.append(AgentBuilder(name, startPosition, startDirection))
 
-    def finish(self):
+    def getPrimitives(self):
+        """
+        Returns a tuple of everything that determines the XML of this scenario: its description, time limit and time of day,
+        along with the primitives of its environment and of each of its agents.
+        """
+        return (self.__description, self.__timeLimit, str(self.__timeOfDay), self.environment.getPrimitives(), tuple(agent.getPrimitives() for agent in self.agents))
+
+    def getHash(self):
         """
-        Returns the complete XML string for the current scenario.
+        Returns a hash of this scenario as a string of hexadecimal digits, which is the same for any two scenarios that produce the same XML.
         """
+        return hashlib.sha256(repr((SCENARIO_HASH_VERSION, self.getPrimitives())).encode("utf-8")).hexdigest()
+
+    def finish(self, cache = None):
+        """
+        Returns the complete XML string for the current scenario. If a MissionCache is given, the XML is instead looked up
+        in the cache by the hash of this scenario (and stored in the cache if it is not found), and is returned in the compact
+        form that is given to a MissionSpec.
+        """
+        if cache != None:
+            key = self.getHash()
+            mission = cache.get(key)
+            if mission == None:
+                mission = cache.put(key, self.finish())
+            return mission.missionSpecXML
+
         mobsList = self.environment.getAllowedMobsList()
-        mobsAllowed = ""
-        for mob in mobsList:
-            mobsAllowed = mobsAllowed + mob + " "
-        returnValue = '''
+        mobsAllowed = "".join([mob + " " for mob in mobsList])
+        missionXML = '''
         <?xml version="1.0" encoding="UTF-8" standalone="no" ?>
         <Mission xmlns="http://ProjectMalmo.microsoft.com" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
             <About>
@@ -286,6 +448,4 @@ class ScenarioBuilder:
                 </ServerHandlers>
             </ServerSection>
             '''.format(self.__description, self.__timeOfDay, "false" if len(mobsList) == 0 else "true", mobsAllowed, self.environment.finish(), self.__timeLimit)
-        for i in range(0, len(self.agents)):
-            returnValue += self.agents[i].finish()
-        return returnValue + "</Mission>"
\ No newline at end of file
+        return "".join([missionXML] + [agent.finish() for agent in self.agents] + ["</Mission>"])
\ No newline at end of file
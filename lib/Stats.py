@@ -0,0 +1,228 @@
+#!/usr/bin/python
+# ==============================================================================================
+# This file represents a standalone script for summarizing the performance CSVs output by many
+# mission runs. Each run is aligned on a common grid of SysTime values, and the mean, median and
+# confidence band of each attribute is computed across all runs, and across the runs of each
+# type of agent (trained, hardcoded or human). Summaries are written as CSVs and PNG plots.
+# ==============================================================================================
+import fnmatch
+import glob
+import math
+import os
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+import numpy
+import pandas
+import matplotlib
+matplotlib.use("Agg")   # Plots are only ever saved to files, so no display is needed
+import matplotlib.pyplot as plt
+
+AGENT_TYPES = ["trained", "hardcoded", "human"]     # The values of each AgentType, which are part of the name of each performance CSV
+ALL_RUNS = "all"                                    # The name of the group containing every run
+TIME_ATTRIBUTE = "SysTime"                          # The attribute that runs are aligned on
+
+# A single performance CSV aligned on the SysTime grid. Values is a mapping of each attribute to an array holding the value of
+# the attribute at each point of the grid up to the end of the run, and finalValues a mapping of each attribute to its value
+# in the last sample of the run (which may fall between two points of the grid).
+AlignedRun = namedtuple("AlignedRun", "path agentId agentType values finalValues")
+
+def getAgentIdentity(filePath, typePatterns):
+    """
+    Returns a tuple of the agent id and agent type of a performance CSV, named as "<agentId>_<agentType>_<suffix>.csv". The type of
+    a file matching one of the (agentType, pattern) tuples given is taken from the first such pattern instead, which allows files
+    named without a type to be grouped. The type is "unknown" if it cannot be determined.
+    """
+    parts = os.path.basename(filePath).split("_")
+    agentType = parts[1].lower() if len(parts) > 1 and parts[1].lower() in AGENT_TYPES else "unknown"
+    for patternType, pattern in typePatterns:
+        if fnmatch.fnmatch(filePath, pattern) or fnmatch.fnmatch(os.path.basename(filePath), pattern):
+            agentType = patternType
+            break
+    return parts[0], agentType
+
+def alignRun(filePath, agentId, agentType, step):
+    """
+    Load a performance CSV and return it as an AlignedRun, where the value of each attribute at a point of the grid is the value
+    last sampled at or before that time. Values that are not numeric are treated as missing.
+    """
+    data = pandas.read_csv(filePath)
+    times = pandas.to_numeric(data[TIME_ATTRIBUTE], errors="coerce").to_numpy(dtype=float)
+    if len(times) == 0:
+        return AlignedRun(filePath, agentId, agentType, {}, {})
+    grid = numpy.arange(0, math.floor(times[-1] / step) + 1) * step
+    sampleIdxs = numpy.searchsorted(times, grid, side="right") - 1
+
+    values = {}
+    finalValues = {}
+    for attribute in data.columns:
+        if attribute == TIME_ATTRIBUTE:
+            continue
+        column = data[attribute]
+        if column.dtype == bool:
+            column = column.astype(float)
+        elif column.dtype == object:
+            column = column.replace({"True": 1.0, "False": 0.0})
+        column = pandas.to_numeric(column, errors="coerce").to_numpy(dtype=float)
+        values[attribute] = numpy.where(sampleIdxs >= 0, column[numpy.maximum(sampleIdxs, 0)], numpy.nan)
+        finalValues[attribute] = column[-1]
+    return AlignedRun(filePath, agentId, agentType, values, finalValues)
+
+def summarize(matrix, z):
+    """
+    Given a matrix with a row for each run and a column for each point of the grid, returns a dictionary of arrays holding the number
+    of runs, mean, median, standard deviation and confidence band of each column, ignoring missing values.
+    """
+    counts = numpy.sum(~numpy.isnan(matrix), axis=0)
+    summary = {"Runs": counts}
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        hasValues = counts > 0
+        mean = numpy.full(matrix.shape[1], numpy.nan)
+        median = numpy.full(matrix.shape[1], numpy.nan)
+        std = numpy.full(matrix.shape[1], numpy.nan)
+        mean[hasValues] = numpy.nanmean(matrix[:, hasValues], axis=0)
+        median[hasValues] = numpy.nanmedian(matrix[:, hasValues], axis=0)
+        std[counts > 1] = numpy.nanstd(matrix[:, counts > 1], axis=0, ddof=1)
+        margin = z * std / numpy.sqrt(counts)
+    summary["Mean"] = mean
+    summary["Median"] = median
+    summary["Std"] = std
+    summary["Lower"] = mean - margin
+    summary["Upper"] = mean + margin
+    return summary
+
+def getMatrix(runs, attribute, length):
+    """
+    Returns a matrix with a row for each run given and a column for each of the first points of the grid, holding the value of an
+    attribute. Points past the end of a run, or of a run without the attribute, are missing.
+    """
+    matrix = numpy.full((len(runs), length), numpy.nan)
+    for i, run in enumerate(runs):
+        values = run.values.get(attribute)
+        if values is not None:
+            matrix[i, :min(len(values), length)] = values[:length]
+    return matrix
+
+def getFinalValues(runs, attribute):
+    """
+    Returns a matrix with a single column holding the value of an attribute in the last sample of each run given.
+    """
+    return numpy.array([[run.finalValues.get(attribute, numpy.nan)] for run in runs])
+
+def plotAttribute(attribute, grid, summaries, filePath):
+    """
+    Save a plot of the mean, median and confidence band of an attribute over time for each group of runs to a PNG file.
+    """
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for i, (group, summary) in enumerate(summaries):
+        color = "C{}".format(i)
+        ax.plot(grid, summary["Mean"], color=color, linestyle="solid", label="{} mean".format(group))
+        ax.plot(grid, summary["Median"], color=color, linestyle="dashed", label="{} median".format(group))
+        ax.fill_between(grid, summary["Lower"], summary["Upper"], color=color, alpha=0.2, linewidth=0)
+    ax.set_title(attribute)
+    ax.set_xlabel("Time (s)")
+    ax.set_ylabel(attribute)
+    ax.legend(loc="best")
+    fig.savefig(filePath, dpi=100)
+    plt.close(fig)
+
+def getArguments(flag):
+    """
+    Returns a list of the values following each occurrence of a flag in the command line arguments.
+    """
+    return [sys.argv[i + 1] for i in range(0, len(sys.argv) - 1) if sys.argv[i] == flag]
+
+def main():
+    """
+    Main method allowing this file to be ran as a script for summarizing many performance CSVs at once.
+    """
+    if len(sys.argv) < 2 or "-h" in sys.argv:
+        print("Usage: python Stats.py <CSV glob> [<CSV glob> ...] <args>")
+        print("Optional Arguments:")
+        print("    -a <attribute>      : Summarize <attribute> (may be given more than once, default every attribute)")
+        print("    -s <seconds>        : The spacing of the SysTime grid that runs are aligned on (default 1.0)")
+        print("    -c <level>          : The confidence level of the confidence bands (default 0.95)")
+        print("    -j <amt>            : Load <amt> number of CSVs at once, each in its own process (default 1)")
+        print("    -o <dir>            : The directory to write summaries to (default stats)")
+        print("    -t <type>=<pattern> : Treat CSVs matching <pattern> as runs of agents of <type> (ie. trained=*Task1.T*)")
+        return
+
+    flags = ["-a", "-s", "-c", "-j", "-o", "-t"]
+    patterns = [arg for i, arg in enumerate(sys.argv[1:], 1) if not arg.startswith("-") and sys.argv[i - 1] not in flags]
+    try:
+        step = float(getArguments("-s")[-1]) if "-s" in sys.argv else 1.0
+        level = float(getArguments("-c")[-1]) if "-c" in sys.argv else 0.95
+        workers = int(getArguments("-j")[-1]) if "-j" in sys.argv else 1
+    except (ValueError, IndexError):
+        print("Error - invalid value given for argument '-s', '-c' or '-j'")
+        return
+    if step <= 0 or not 0 < level < 1:
+        print("Error - the grid spacing must be positive, and the confidence level between 0 and 1")
+        return
+    outputDir = getArguments("-o")[-1] if "-o" in sys.argv else "stats"
+    typePatterns = [tuple(arg.split("=", 1)) for arg in getArguments("-t") if "=" in arg]
+
+    filePaths = sorted(set(path for pattern in patterns for path in glob.glob(pattern, recursive=True) if path.endswith(".csv")))
+    if len(filePaths) == 0:
+        print("No CSV files matched")
+        return
+
+    # Load and align every run
+    identities = [getAgentIdentity(path, typePatterns) for path in filePaths]
+    agentIds = [agentId for agentId, _ in identities]
+    agentTypes = [agentType for _, agentType in identities]
+    if workers > 1 and len(filePaths) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            runs = list(executor.map(alignRun, filePaths, agentIds, agentTypes, [step] * len(filePaths), chunksize=max(1, len(filePaths) // (workers * 4))))
+    else:
+        runs = [alignRun(path, agentId, agentType, step) for path, agentId, agentType in zip(filePaths, agentIds, agentTypes)]
+    runs = [run for run in runs if len(run.values) > 0]
+    if len(runs) == 0:
+        print("None of the CSV files contain any samples")
+        return
+
+    attributes = getArguments("-a")
+    if len(attributes) == 0:
+        for run in runs:
+            attributes.extend(attribute for attribute in run.values if attribute not in attributes)
+    for attribute in [attribute for attribute in attributes if not any(attribute in run.values for run in runs)]:
+        print("Warning - no run recorded attribute '{}', so it will not be summarized".format(attribute))
+        attributes.remove(attribute)
+    if len(attributes) == 0:
+        return
+    groups = [(ALL_RUNS, runs)] + [(agentType, [run for run in runs if run.agentType == agentType]) for agentType in AGENT_TYPES + ["unknown"]]
+    groups = [(group, groupRuns) for group, groupRuns in groups if len(groupRuns) > 0]
+    length = max(len(values) for run in runs for values in run.values.values())
+    grid = numpy.arange(0, length) * step
+    z = NormalDist().inv_cdf((1 + level) / 2)
+
+    # Summarize each attribute over time, and at the end of each run
+    if not os.path.isdir(outputDir):
+        os.makedirs(outputDir, exist_ok=True)
+    frames = []
+    finalRows = []
+    for attribute in attributes:
+        summaries = []
+        for group, groupRuns in groups:
+            summary = summarize(getMatrix(groupRuns, attribute, length), z)
+            summaries.append((group, summary))
+            frames.append(pandas.DataFrame(dict([("Group", group), ("Attribute", attribute), (TIME_ATTRIBUTE, grid)] + list(summary.items()))))
+            final = summarize(getFinalValues(groupRuns, attribute), z)
+            finalRows.append(dict([("Group", group), ("Attribute", attribute)] + [(key, value[0]) for key, value in final.items()]))
+        plotAttribute(attribute, grid, summaries, os.path.join(outputDir, "{}.png".format(attribute)))
+
+    summaryPath = os.path.join(outputDir, "summary.csv")
+    pandas.concat(frames, ignore_index=True).to_csv(summaryPath, index=False)
+    finalPath = os.path.join(outputDir, "final_summary.csv")
+    pandas.DataFrame(finalRows).to_csv(finalPath, index=False)
+
+    print("Runs summarized: {}".format(len(runs)))
+    for group, groupRuns in groups:
+        print("    {}: {}".format(group, len(groupRuns)))
+    print("Summary over time has been saved to: {}".format(summaryPath))
+    print("Summary at the end of each run has been saved to: {}".format(finalPath))
+    print("Plots have been saved to: {}".format(outputDir))
+
+if __name__ == "__main__":
+    main()
@@ -11,8 +11,10 @@ import math
 from collections import namedtuple
 from Utils import *
 from ScenarioBuilder import ScenarioBuilder
+from MissionCache import MissionCache
 from Agent import *
 from Logger import Logger
+from MissionLoop import MissionLoop
 
 MalmoPython.setLogging("", MalmoPython.LoggingSeverityLevel.LOG_OFF)
 
@@ -22,8 +24,8 @@ player_agent = Agent("Player")
 companion_agent = Agent("Companion")
 malmoutils.parse_command_line(player_agent.host)
 client_pool = MalmoPython.ClientPool()
-client_pool.add( MalmoPython.ClientInfo('127.0.0.1',10000) )
-client_pool.add( MalmoPython.ClientInfo('127.0.0.1',10001) )
+for ip, port in getClientAddresses([10000, 10001]):
+    client_pool.add( MalmoPython.ClientInfo(ip, port) )
 # ========================================================================================================================
 
 # SET UP THE ENVIRONMENT HERE ============================================================================================
@@ -63,7 +65,7 @@ scenarioBuilder.environment.addBlock(Vector(-4, 4, -2), BlockType.Diamond_block)
 # Add a special block to indicate where the player agent should be "building"
 scenarioBuilder.environment.addBlock(Vector(0, 3, -2), BlockType.Gold_block)
 
-missionXML = scenarioBuilder.finish()
+missionXML = scenarioBuilder.finish(MissionCache())
 # ========================================================================================================================
 
 my_mission = MalmoPython.MissionSpec(missionXML, True)
@@ -178,8 +180,11 @@ Logger.logInitialState(Agent.agentList)
 collectionBlock = None
 buildingBlock = None
 
-while player_agent.isMissionActive() or companion_agent.isMissionActive():
-    # If this is the first iteration of the loop, find the "collection block" and "building block" and cache it for future use
+# Actions of both agents, ran once per tick
+def missionAction():
+    global collectionBlock, buildingBlock
+
+    # If this is the first tick, find the "collection block" and "building block" and cache it for future use
     if collectionBlock == None or buildingBlock == None:
         collectionBlock = player_agent.getClosestBlockByType(BlockType.Diamond_block)
         buildingBlock = player_agent.getClosestBlockByType(BlockType.Gold_block)
@@ -191,6 +196,11 @@ while player_agent.isMissionActive() or companion_agent.isMissionActive():
     # Nothing to do...
     companion_agent.noAction()
 
+missionLoop = MissionLoop(Agent.agentList)
+missionLoop.addCallback(missionAction)
+missionLoop.run()
+missionLoop.printStatistics()
+
 # Log final state and flush the log
 Logger.logFinalState(Agent.agentList)
 Logger.export()
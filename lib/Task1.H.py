@@ -11,6 +11,7 @@ from pynput.keyboard import Key, Controller
 from collections import namedtuple
 from Utils import *
 from ScenarioBuilder import ScenarioBuilder
+from MissionCache import MissionCache
 from HTNAgent import *
 from Logger import Logger
 from Performance import Performance
@@ -23,8 +24,8 @@ player_agent = Agent("Player", AgentType.Human)
 companion_agent = Agent("Companion", AgentType.Human)
 malmoutils.parse_command_line(player_agent.host)
 client_pool = MalmoPython.ClientPool()
-client_pool.add( MalmoPython.ClientInfo('127.0.0.1',10000) )
-client_pool.add( MalmoPython.ClientInfo('127.0.0.1',10001) )
+for ip, port in getClientAddresses([10000, 10001]):
+    client_pool.add( MalmoPython.ClientInfo(ip, port) )
 # ========================================================================================================================
 
 # SET UP THE ENVIRONMENT HERE ============================================================================================
@@ -58,7 +59,7 @@ scenarioBuilder.environment.addMob(Vector(2, 4, 4), MobType.Hostile.Zombie)
 scenarioBuilder.environment.addMob(Vector(-20, 4, 20), MobType.Hostile.Zombie)
 scenarioBuilder.environment.addMob(Vector(5, 4, -11), MobType.Hostile.Zombie)
 
-missionXML = scenarioBuilder.finish()
+missionXML = scenarioBuilder.finish(MissionCache())
 # ========================================================================================================================
 
 my_mission = MalmoPython.MissionSpec(missionXML, True)
@@ -14,9 +14,11 @@ import math
 from collections import namedtuple
 from Utils import *
 from ScenarioBuilder import ScenarioBuilder
+from MissionCache import MissionCache
 from HTNAgent import *
 from plan_generator import generate_plan
 from Logger import Logger
+from MissionLoop import MissionLoop
 
 MalmoPython.setLogging("", MalmoPython.LoggingSeverityLevel.LOG_OFF)
 
@@ -26,8 +28,8 @@ player_agent = Agent("Player")
 companion_agent = HTNAgent("Companion", generate_plan)
 malmoutils.parse_command_line(player_agent.host)
 client_pool = MalmoPython.ClientPool()
-client_pool.add( MalmoPython.ClientInfo('127.0.0.1',10000) )
-client_pool.add( MalmoPython.ClientInfo('127.0.0.1',10001) )
+for ip, port in getClientAddresses([10000, 10001]):
+    client_pool.add( MalmoPython.ClientInfo(ip, port) )
 # ========================================================================================================================
 
 # SET UP THE ENVIRONMENT HERE ============================================================================================
@@ -61,7 +63,7 @@ scenarioBuilder.environment.addMob(Vector(2, 4, 4), MobType.Hostile.Zombie)
 scenarioBuilder.environment.addMob(Vector(-20, 4, 20), MobType.Hostile.Zombie)
 scenarioBuilder.environment.addMob(Vector(5, 4, -11), MobType.Hostile.Zombie)
 
-missionXML = scenarioBuilder.finish()
+missionXML = scenarioBuilder.finish(MissionCache())
 # ========================================================================================================================
 
 my_mission = MalmoPython.MissionSpec(missionXML, True)
@@ -135,9 +137,11 @@ Logger.logInitialState(Agent.agentList)
 # Generate an initial plan using the HTN
 companion_agent.__updatePlan__()
 
-# Wait for all agents to finish:
-while player_agent.isMissionActive() or companion_agent.isMissionActive():
-    companion_agent.performNextAction()
+# Perform the next planned action once per tick until all agents have finished:
+missionLoop = MissionLoop(Agent.agentList)
+missionLoop.addCallback(companion_agent.performNextAction, agent=companion_agent)
+missionLoop.run()
+missionLoop.printStatistics()
 
 # Log final state and flush the log
 Logger.logFinalState(Agent.agentList)
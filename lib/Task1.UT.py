@@ -11,8 +11,10 @@ import math
 from collections import namedtuple
 from Utils import *
 from ScenarioBuilder import ScenarioBuilder
+from MissionCache import MissionCache
 from Agent import *
 from Logger import Logger
+from MissionLoop import MissionLoop
 from Performance import Performance
 
 MalmoPython.setLogging("", MalmoPython.LoggingSeverityLevel.LOG_OFF)
@@ -23,8 +25,8 @@ player_agent = Agent("Player", AgentType.Hardcoded)
 companion_agent = Agent("Companion", AgentType.Hardcoded)
 malmoutils.parse_command_line(player_agent.host)
 client_pool = MalmoPython.ClientPool()
-client_pool.add( MalmoPython.ClientInfo('127.0.0.1',10000) )
-client_pool.add( MalmoPython.ClientInfo('127.0.0.1',10001) )
+for ip, port in getClientAddresses([10000, 10001]):
+    client_pool.add( MalmoPython.ClientInfo(ip, port) )
 # ========================================================================================================================
 
 # SET UP THE ENVIRONMENT HERE ============================================================================================
@@ -58,7 +60,7 @@ scenarioBuilder.environment.addMob(Vector(2, 4, 4), MobType.Hostile.Zombie)
 scenarioBuilder.environment.addMob(Vector(-20, 4, 20), MobType.Hostile.Zombie)
 scenarioBuilder.environment.addMob(Vector(5, 4, -11), MobType.Hostile.Zombie)
 
-missionXML = scenarioBuilder.finish()
+missionXML = scenarioBuilder.finish(MissionCache())
 # ========================================================================================================================
 
 my_mission = MalmoPython.MissionSpec(missionXML, True)
@@ -132,11 +134,8 @@ Performance.addAgents([player_agent, companion_agent])
 Logger.trackClosestHostileMob(player_agent)
 Logger.logInitialState(Agent.agentList)
 
-# Wait for all agents to finish:
-while player_agent.isMissionActive() or companion_agent.isMissionActive():
-    # Update the performance of each agent
-    Performance.update()
-
+# Companion agent action, ran once per tick
+def companionAction():
     # Ensure we have our diamond sword equipped
     companion_agent.equip(ItemType.All.diamond_sword)
 
@@ -145,24 +144,31 @@ while player_agent.isMissionActive() or companion_agent.isMissionActive():
     if zombie != None:
         isLookingAt = companion_agent.lookAtEntity(zombie)
         if not isLookingAt:
-            continue
+            return
         isAt = companion_agent.moveToEntity(zombie)
         if not isAt:
-            continue
+            return
         companion_agent.attackMob(zombie)
-        continue
+        return
 
     # No zombies nearby... return to player
     isLookingAt = companion_agent.lookAtAgent(player_agent)
     if not isLookingAt:
-        continue
+        return
     isAt = companion_agent.moveToAgent(player_agent)
     if not isAt:
-        continue
+        return
 
     # Nothing to do...
     companion_agent.stopAllMovement()
 
+# Run each action once per tick until all agents have finished:
+missionLoop = MissionLoop(Agent.agentList)
+missionLoop.addCallback(Performance.update)
+missionLoop.addCallback(companionAction, agent=companion_agent)
+missionLoop.run()
+missionLoop.printStatistics()
+
 # Log final state and flush the log
 Logger.logFinalState(Agent.agentList)
 Logger.export()
@@ -11,6 +11,7 @@ from pynput.keyboard import Key, Controller
 from collections import namedtuple
 from Utils import *
 from ScenarioBuilder import ScenarioBuilder
+from MissionCache import MissionCache
 from Agent import *
 from Logger import Logger
 from Performance import Performance
@@ -24,8 +25,8 @@ player_agent = Agent("Player", AgentType.Human)
 companion_agent = Agent("Companion", AgentType.Human)
 malmoutils.parse_command_line(player_agent.host)
 client_pool = MalmoPython.ClientPool()
-client_pool.add( MalmoPython.ClientInfo('127.0.0.1',10000) )
-client_pool.add( MalmoPython.ClientInfo('127.0.0.1',10001) )
+for ip, port in getClientAddresses([10000, 10001]):
+    client_pool.add( MalmoPython.ClientInfo(ip, port) )
 # ========================================================================================================================
 
 # SET UP THE ENVIRONMENT HERE ============================================================================================
@@ -46,7 +47,7 @@ scenarioBuilder.environment.addMob(Vector(1, 4, -3), MobType.Peaceful.Cow)
 
 scenarioBuilder.agents[1].addInventoryItem(ItemType.All.diamond_sword, ItemSlot.HotBar._0)
 
-missionXML = scenarioBuilder.finish()
+missionXML = scenarioBuilder.finish(MissionCache())
 # ========================================================================================================================
 
 my_mission = MalmoPython.MissionSpec(missionXML, True)
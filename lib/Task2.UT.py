@@ -11,8 +11,10 @@ import math
 from collections import namedtuple
 from Utils import *
 from ScenarioBuilder import ScenarioBuilder
+from MissionCache import MissionCache
 from Agent import *
 from Logger import Logger
+from MissionLoop import MissionLoop
 from Performance import Performance
 
 MalmoPython.setLogging("", MalmoPython.LoggingSeverityLevel.LOG_OFF)
@@ -23,8 +25,8 @@ player_agent = Agent("Player", AgentType.Hardcoded)
 companion_agent = Agent("Companion", AgentType.Hardcoded)
 malmoutils.parse_command_line(player_agent.host)
 client_pool = MalmoPython.ClientPool()
-client_pool.add( MalmoPython.ClientInfo('127.0.0.1',10000) )
-client_pool.add( MalmoPython.ClientInfo('127.0.0.1',10001) )
+for ip, port in getClientAddresses([10000, 10001]):
+    client_pool.add( MalmoPython.ClientInfo(ip, port) )
 # ========================================================================================================================
 
 # SET UP THE ENVIRONMENT HERE ============================================================================================
@@ -44,7 +46,7 @@ scenarioBuilder.environment.addMob(Vector(-10, 4, -15), MobType.Peaceful.Cow)
 
 scenarioBuilder.agents[1].addInventoryItem(ItemType.All.diamond_sword, ItemSlot.HotBar._0)
 
-missionXML = scenarioBuilder.finish()
+missionXML = scenarioBuilder.finish(MissionCache())
 # ========================================================================================================================
 
 my_mission = MalmoPython.MissionSpec(missionXML, True)
@@ -121,29 +123,27 @@ Logger.trackClosestFoodItem(companion_agent)
 Logger.trackInventory(companion_agent)
 Logger.logInitialState(Agent.agentList)
 
-# Wait for all agents to finish:
-while player_agent.isMissionActive() or companion_agent.isMissionActive():
-    Performance.update()
-
+# Companion agent action, ran once per tick
+def companionAction():
     # If we have beef, go to the player and give it to them
     if companion_agent.inventory.amountOfItem(ItemType.Food.beef) > 0:
         isLookingAt = companion_agent.lookAtAgent(player_agent)
         if not isLookingAt:
-            continue
+            return
         isAt = companion_agent.moveToAgent(player_agent)
         if not isAt:
-            continue
+            return
         companion_agent.equip(ItemType.Food.beef)
         companion_agent.giveItemToAgent(ItemType.Food.beef, player_agent)
-        continue
+        return
 
     # If there is beef laying on the ground nearby, go pick it up
     closestFood = companion_agent.getClosestFoodItem()
     if closestFood != None:
         didPickUp = companion_agent.pickUpItem(closestFood)
         if not didPickUp:
-            continue
-        continue
+            return
+        return
 
     # If there are cows nearby, go and harvest them
     companion_agent.equip(ItemType.All.diamond_sword)   # Make sure we have our diamond sword equipped
@@ -151,18 +151,25 @@ while player_agent.isMissionActive() or companion_agent.isMissionActive():
     if closestCow != None:
         isLookingAt = companion_agent.lookAtEntity(closestCow)
         if not isLookingAt:
-            continue
+            return
         isAt = companion_agent.moveToEntity(closestCow)
         if not isAt:
-            continue
+            return
         didAttack = companion_agent.attackMob(closestCow)
         if not didAttack:
-            continue
-        continue
+            return
+        return
     
     # Nothing to do...
     companion_agent.noAction()
 
+# Run each action once per tick until all agents have finished:
+missionLoop = MissionLoop(Agent.agentList)
+missionLoop.addCallback(Performance.update)
+missionLoop.addCallback(companionAction, agent=companion_agent)
+missionLoop.run()
+missionLoop.printStatistics()
+
 # Log final state and flush the log
 Logger.logFinalState(Agent.agentList)
 Logger.export()
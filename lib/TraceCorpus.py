@@ -0,0 +1,328 @@
+# ==============================================================================================
+# This file contains the TraceCorpus class, a local SQLite database of cleaned trace logs, so
+# that subsets of traces can be selected for training without reading and parsing every file.
+# Each trace is stored with its entity declarations, initial and final state atoms, and action
+# sequence, indexed by action, entity type, number of kills and number of lines. Use with:
+#     python TraceCorpus.py ingest [directory]
+#     python TraceCorpus.py query [filters] [-o <directory>]
+# ==============================================================================================
+import hashlib
+import os
+import sqlite3
+import sys
+import zlib
+from collections import namedtuple
+from TraceFormat import BINARY_TRACE_EXTENSION, readTrace
+
+CORPUS_SCHEMA_VERSION = 1       # The version of the database schema, stored as the user_version of the database
+ENTITY_DECLARATION_STRINGS = ["items", "mobs", "agents"]    # A list of strings representing the start to an entity declaration
+
+# A trace stored in the corpus. Entities is a list of (kind, id, type) tuples for each entity declared, where kind is one of
+# ENTITY_DECLARATION_STRINGS. The initial and final states are lists of atoms, and actions is the list of action statements in order.
+Trace = namedtuple("Trace", "id path entities initialState actions finalState")
+
+# Filters for selecting traces from the corpus, which a trace must meet all of. Traces must have at least minKills kills (only
+# counting entities of killType, if given) and minLines lines, contain every action in actions (ie. "!GIVEITEM"), and declare an
+# entity of every type in entityTypes.
+TraceFilter = namedtuple("TraceFilter", "minKills minLines actions entityTypes killType", defaults = (0, 0, (), (), None))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS traces (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    hash TEXT NOT NULL,
+    lines INTEGER NOT NULL,
+    actions INTEGER NOT NULL,
+    kills INTEGER NOT NULL,
+    contents BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entities (
+    trace_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    entity TEXT NOT NULL,
+    type TEXT NOT NULL,
+    killed INTEGER NOT NULL,
+    UNIQUE (trace_id, entity)
+);
+CREATE TABLE IF NOT EXISTS atoms (
+    trace_id INTEGER NOT NULL,
+    phase TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    atom TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS actions (
+    trace_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    statement TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS traces_kills ON traces (kills);
+CREATE INDEX IF NOT EXISTS traces_lines ON traces (lines);
+CREATE INDEX IF NOT EXISTS traces_actions ON traces (actions);
+CREATE INDEX IF NOT EXISTS entities_type ON entities (type, killed, trace_id);
+CREATE INDEX IF NOT EXISTS atoms_trace ON atoms (trace_id, phase, position);
+CREATE INDEX IF NOT EXISTS actions_name ON actions (name, trace_id);
+CREATE INDEX IF NOT EXISTS actions_trace ON actions (trace_id, position);
+"""
+
+def parseTrace(statements):
+    """
+    Given a list with a tuple of tokens for each statement of a trace (see TraceFormat.readTrace), returns a tuple of the entities
+    declared, the initial state, the action statements, the final state, and a set of the ids of the entities that died during the trace.
+    """
+    entities = {}       # A mapping of each entity id to its (kind, id, type) tuple, in the order first declared
+    initialState = []
+    actions = []
+    finalState = []
+    killedEntities = set()
+    phase = "initial"
+    for tokens in statements:
+        if len(tokens) == 1 and tokens[0] in ["START", "END"]:
+            phase = "actions" if tokens[0] == "START" else "final"
+            continue
+        if len(tokens) == 0:
+            continue
+        statement = "-".join(tokens)
+        if tokens[0] in ENTITY_DECLARATION_STRINGS and len(tokens) >= 3 and tokens[1] not in entities:
+            entities[tokens[1]] = (tokens[0], tokens[1], tokens[2])
+        if phase == "initial":
+            initialState.append(statement)
+        elif phase == "final":
+            finalState.append(statement)
+        elif statement.startswith("!"):
+            actions.append(statement)
+        elif tokens[0] == "status" and tokens[-1] == "dead" and len(tokens) >= 3:
+            killedEntities.add(tokens[1])
+    return list(entities.values()), initialState, actions, finalState, killedEntities
+
+class TraceCorpus:
+    """
+    Local SQLite database of trace logs. Traces are added with ingest() or ingestDirectory(), and selected with a TraceFilter,
+    with the results of each query streamed from the database one trace at a time.
+    """
+
+    def __init__(self, path = "corpus.db"):
+        self.path = path                                # Path to the database file
+        self.connection = sqlite3.connect(path)
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version == 0:
+            self.connection.executescript(SCHEMA)
+            self.connection.execute("PRAGMA user_version = {}".format(CORPUS_SCHEMA_VERSION))
+        elif version != CORPUS_SCHEMA_VERSION:
+            self.connection.close()
+            raise ValueError("Trace corpus '{}' has schema version {}, but version {} is required. Delete it and ingest the traces again.".format(path, version, CORPUS_SCHEMA_VERSION))
+
+    def close(self):
+        """
+        Close the connection to the database.
+        """
+        self.connection.close()
+
+    def ingest(self, filePath):
+        """
+        Add a trace log in either the text or binary format to the corpus, replacing the trace previously ingested from the same path
+        if its contents have changed. Returns true if the trace was added, and false if it was already in the corpus unchanged.
+        """
+        filePath = os.path.abspath(filePath)
+        with open(filePath, "rb") as file:
+            fileHash = hashlib.sha256(file.read()).hexdigest()
+        row = self.connection.execute("SELECT id, hash FROM traces WHERE path = ?", (filePath,)).fetchone()
+        if row != None and row[1] == fileHash:
+            return False
+
+        statements = readTrace(filePath)
+        entities, initialState, actions, finalState, killedEntities = parseTrace(statements)
+        contents = zlib.compress("\n".join(["-".join(tokens) for tokens in statements]).encode("utf-8"))
+        with self.connection:
+            if row != None:
+                self.__removeTrace__(row[0])
+            traceId = self.connection.execute("INSERT INTO traces (path, hash, lines, actions, kills, contents) VALUES (?, ?, ?, ?, ?, ?)",
+                (filePath, fileHash, len(statements), len(actions), len(killedEntities), contents)).lastrowid
+            self.connection.executemany("INSERT INTO entities VALUES (?, ?, ?, ?, ?)",
+                [(traceId, kind, entityId, entityType, 1 if entityId in killedEntities else 0) for kind, entityId, entityType in entities])
+            self.connection.executemany("INSERT INTO atoms VALUES (?, ?, ?, ?)",
+                [(traceId, "initial", i, atom) for i, atom in enumerate(initialState)] + [(traceId, "final", i, atom) for i, atom in enumerate(finalState)])
+            self.connection.executemany("INSERT INTO actions VALUES (?, ?, ?, ?, ?)",
+                [(traceId, i, action.split("-")[0], action.split("-")[1] if "-" in action else "", action) for i, action in enumerate(actions)])
+        return True
+
+    def ingestDirectory(self, directory):
+        """
+        Add every trace log in a directory (and its subdirectories) to the corpus, and remove the traces previously ingested from the
+        directory whose files no longer exist. Returns a tuple of the number of traces added, unchanged and removed.
+        """
+        directory = os.path.abspath(directory)
+        added, unchanged = 0, 0
+        filePaths = set()
+        for (dirpath, _, filenames) in os.walk(directory):
+            for filename in filenames:
+                if filename.endswith(".log") or filename.endswith(BINARY_TRACE_EXTENSION):
+                    filePath = os.path.join(dirpath, filename)
+                    filePaths.add(filePath)
+                    if self.ingest(filePath):
+                        added += 1
+                    else:
+                        unchanged += 1
+
+        removed = 0
+        with self.connection:
+            prefix = os.path.join(directory, "")
+            for traceId, path in self.connection.execute("SELECT id, path FROM traces WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)).fetchall():
+                if path not in filePaths:
+                    self.__removeTrace__(traceId)
+                    removed += 1
+        return added, unchanged, removed
+
+    def __removeTrace__(self, traceId):
+        """
+        Internal method that removes a trace and everything stored for it from the corpus.
+        """
+        for table, column in [("entities", "trace_id"), ("atoms", "trace_id"), ("actions", "trace_id"), ("traces", "id")]:
+            self.connection.execute("DELETE FROM {} WHERE {} = ?".format(table, column), (traceId,))
+
+    def __buildQuery__(self, columns, traceFilter):
+        """
+        Internal method that returns a tuple of the SQL query selecting the columns given of each trace that meets the filter given,
+        ordered by id, and the parameters of the query.
+        """
+        conditions = ["traces.lines >= ?"]
+        parameters = [traceFilter.minLines]
+        if traceFilter.killType == None:
+            conditions.append("traces.kills >= ?")
+            parameters.append(traceFilter.minKills)
+        elif traceFilter.minKills > 0:
+            conditions.append("(SELECT COUNT(*) FROM entities WHERE entities.trace_id = traces.id AND entities.type = ? AND entities.killed = 1) >= ?")
+            parameters.extend([traceFilter.killType, traceFilter.minKills])
+        for action in traceFilter.actions:
+            conditions.append("EXISTS (SELECT 1 FROM actions WHERE actions.name = ? AND actions.trace_id = traces.id)")
+            parameters.append(action if action.startswith("!") else "!" + action)
+        for entityType in traceFilter.entityTypes:
+            conditions.append("EXISTS (SELECT 1 FROM entities WHERE entities.type = ? AND entities.trace_id = traces.id)")
+            parameters.append(entityType)
+        return "SELECT {} FROM traces WHERE {} ORDER BY traces.id".format(columns, " AND ".join(conditions)), parameters
+
+    def count(self, traceFilter = TraceFilter()):
+        """
+        Returns the number of traces that meet the filter given.
+        """
+        query, parameters = self.__buildQuery__("COUNT(*)", traceFilter)
+        return self.connection.execute(query, parameters).fetchone()[0]
+
+    def iterPaths(self, traceFilter = TraceFilter()):
+        """
+        Generator of the path of each trace that meets the filter given.
+        """
+        query, parameters = self.__buildQuery__("traces.path", traceFilter)
+        for (path,) in self.connection.execute(query, parameters):
+            yield path
+
+    def iterTraces(self, traceFilter = TraceFilter()):
+        """
+        Generator of a Trace for each trace that meets the filter given.
+        """
+        query, parameters = self.__buildQuery__("traces.id, traces.path", traceFilter)
+        for traceId, path in self.connection.execute(query, parameters):
+            entities = self.connection.execute("SELECT kind, entity, type FROM entities WHERE trace_id = ? ORDER BY rowid", (traceId,)).fetchall()
+            initialState = self.__getAtoms__(traceId, "initial")
+            finalState = self.__getAtoms__(traceId, "final")
+            actions = [statement for (statement,) in self.connection.execute("SELECT statement FROM actions WHERE trace_id = ? ORDER BY position", (traceId,))]
+            yield Trace(traceId, path, entities, initialState, actions, finalState)
+
+    def iterInitialStates(self, traceFilter = TraceFilter()):
+        """
+        Generator of the initial state of each trace that meets the filter given, as the list of atoms given to a planner.
+        """
+        query, parameters = self.__buildQuery__("traces.id", traceFilter)
+        for (traceId,) in self.connection.execute(query, parameters):
+            yield self.__getAtoms__(traceId, "initial")
+
+    def iterTraceContents(self, traceFilter = TraceFilter()):
+        """
+        Generator of a (path, contents) tuple for each trace that meets the filter given, where contents is the text of the trace log
+        as given to the learner.
+        """
+        query, parameters = self.__buildQuery__("traces.path, traces.contents", traceFilter)
+        for path, contents in self.connection.execute(query, parameters):
+            yield path, zlib.decompress(contents).decode("utf-8")
+
+    def exportTraces(self, directory, traceFilter = TraceFilter()):
+        """
+        Write the text of each trace that meets the filter given to a log file in the directory given, named after the file it was
+        ingested from. Returns the number of traces written.
+        """
+        if not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok = True)
+        count = 0
+        for path, contents in self.iterTraceContents(traceFilter):
+            count += 1
+            filename = "{}-{}.log".format(count, os.path.splitext(os.path.basename(path))[0])
+            with open(os.path.join(directory, filename), "w") as file:
+                file.write(contents)
+        return count
+
+    def __getAtoms__(self, traceId, phase):
+        """
+        Internal method that returns the list of atoms in either the "initial" or "final" state of a trace.
+        """
+        return [atom for (atom,) in self.connection.execute("SELECT atom FROM atoms WHERE trace_id = ? AND phase = ? ORDER BY position", (traceId, phase))]
+
+def getArguments(flag):
+    """
+    Returns a list of the values following each occurrence of a flag in the command line arguments.
+    """
+    values = []
+    for i in range(0, len(sys.argv) - 1):
+        if sys.argv[i] == flag:
+            values.append(sys.argv[i + 1])
+    return values
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ["ingest", "query"] or "-h" in sys.argv:
+        print("Usage: python TraceCorpus.py ingest [directory] [-c <corpus>]")
+        print("       python TraceCorpus.py query [filters] [-o <directory>] [-c <corpus>]")
+        print("-c <corpus> : Path to the corpus database (default corpus.db)")
+        print("ingest: Add each trace log in the directory (default cleaned_logs) to the corpus")
+        print("query: Print the path of each trace in the corpus that meets every filter given")
+        print("    -k <amt> : Trace must contain <amt> number of kills")
+        print("    -kt <type> : Only count kills of entities of <type> towards -k")
+        print("    -l <amt> : Trace must contain <amt> number of lines")
+        print("    -a <action> : Trace must contain <action> (ie. GIVEITEM). May be given more than once")
+        print("    -e <type> : Trace must declare an entity of <type> (ie. Zombie). May be given more than once")
+        print("    -o <directory> : Write each trace to a log file in <directory>, rather than printing its path")
+        return
+
+    corpusPaths = getArguments("-c")
+    corpus = TraceCorpus(corpusPaths[-1] if len(corpusPaths) > 0 else "corpus.db")
+    try:
+        if sys.argv[1] == "ingest":
+            directory = sys.argv[2] if len(sys.argv) > 2 and not sys.argv[2].startswith("-") else "cleaned_logs"
+            if not os.path.isdir(directory):
+                print("Error - Directory '{}' does not exist.".format(directory))
+                return
+            added, unchanged, removed = corpus.ingestDirectory(directory)
+            print("Traces added: {}".format(added))
+            print("Traces unchanged: {}".format(unchanged))
+            print("Traces removed: {}".format(removed))
+            return
+
+        try:
+            minKills = int(getArguments("-k")[-1]) if "-k" in sys.argv else 0
+            minLines = int(getArguments("-l")[-1]) if "-l" in sys.argv else 0
+        except (ValueError, IndexError):
+            print("Error - Invalid amount given for argument '-k' or '-l'")
+            return
+        killTypes = getArguments("-kt")
+        traceFilter = TraceFilter(minKills, minLines, tuple(getArguments("-a")), tuple(getArguments("-e")), killTypes[-1] if len(killTypes) > 0 else None)
+        outputDirectories = getArguments("-o")
+        if len(outputDirectories) > 0:
+            print("Traces written to '{}': {}".format(outputDirectories[-1], corpus.exportTraces(outputDirectories[-1], traceFilter)))
+        else:
+            for path in corpus.iterPaths(traceFilter):
+                print(path)
+            print("Traces matched: {}".format(corpus.count(traceFilter)))
+    finally:
+        corpus.close()
+
+if __name__ == "__main__":
+    main()
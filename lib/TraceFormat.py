@@ -0,0 +1,130 @@
+# ==============================================================================================
+# This file contains functionality for storing trace logs in a compact binary format, along with
+# a lossless converter to and from the text format written by the Logger. Every distinct token of
+# a trace (predicates, entity ids, action names...) is stored once in a string table, and each
+# statement is stored as a fixed-width record of indexes into that table. Convert traces with:
+#     python TraceFormat.py <to-binary | to-text> <inputFile> [outputFile]
+# ==============================================================================================
+import os
+import struct
+import sys
+
+BINARY_TRACE_EXTENSION = ".logb"    # The extension of trace logs stored in the binary format
+BINARY_TRACE_MAGIC = b"MTRC"        # The bytes every binary trace begins with
+BINARY_TRACE_VERSION = 1            # The version of the binary format, stored after the magic bytes
+
+MAX_RECORD_TOKENS = 4               # The most tokens that a single record can hold
+RAW_STATEMENT = 0xFF                # The token count of a record holding a statement with too many tokens, stored whole as a single string
+HEADER_FORMAT = struct.Struct("<4sBIII")                         # Magic bytes, version, size of the string table in bytes, number of strings, number of records
+RECORD_FORMAT = struct.Struct("<B{}I".format(MAX_RECORD_TOKENS)) # Token count, followed by the string index of each token (unused tokens are 0)
+
+def tokenizeStatement(statement):
+    """
+    Returns a tuple of the tokens in a statement of a text trace, which are separated by '-'. The empty statement separating
+    blocks of a trace is returned as an empty tuple.
+    """
+    if statement == "":
+        return ()
+    return tuple(statement.split("-"))
+
+def writeBinaryTrace(filePath, statements):
+    """
+    Write a list of text statements to a file in the binary trace format.
+    """
+    strings = []        # The string table, in the order each string first appeared
+    stringIndexes = {}  # A mapping of each string to its index in the string table
+    records = []
+    for statement in statements:
+        tokens = tokenizeStatement(statement)
+        count = len(tokens)
+        if count > MAX_RECORD_TOKENS:
+            tokens = (statement,)
+            count = RAW_STATEMENT
+        indexes = []
+        for token in tokens:
+            index = stringIndexes.get(token)
+            if index == None:
+                index = len(strings)
+                stringIndexes[token] = index
+                strings.append(token)
+            indexes.append(index)
+        records.append(RECORD_FORMAT.pack(count, *(indexes + [0] * (MAX_RECORD_TOKENS - len(indexes)))))
+
+    if any("\0" in string for string in strings):
+        raise ValueError("Trace statements cannot contain NUL characters")
+    stringTable = "\0".join(strings).encode("utf-8")
+    with open(filePath, "wb") as file:
+        file.write(HEADER_FORMAT.pack(BINARY_TRACE_MAGIC, BINARY_TRACE_VERSION, len(stringTable), len(strings), len(records)))
+        file.write(stringTable)
+        file.write(b"".join(records))
+
+def readBinaryTrace(filePath):
+    """
+    Read a file in the binary trace format, returning a list with a tuple of tokens for each statement (see tokenizeStatement).
+    Tokens are shared between statements, so equal tokens are the same string object.
+    """
+    with open(filePath, "rb") as file:
+        data = file.read()
+    magic, version, stringTableSize, stringCount, recordCount = HEADER_FORMAT.unpack_from(data, 0)
+    if magic != BINARY_TRACE_MAGIC or version != BINARY_TRACE_VERSION:
+        raise ValueError("'{}' is not a binary trace of version {}".format(filePath, BINARY_TRACE_VERSION))
+
+    offset = HEADER_FORMAT.size
+    strings = data[offset:offset + stringTableSize].decode("utf-8").split("\0") if stringCount > 0 else []
+    offset += stringTableSize
+
+    end = offset + recordCount * RECORD_FORMAT.size
+    statements = []
+    decodedRecords = {}     # A mapping of each distinct record to its tuple of tokens, as statements repeat often within a trace
+    for record in RECORD_FORMAT.iter_unpack(data[offset:end]):
+        tokens = decodedRecords.get(record)
+        if tokens == None:
+            count = record[0]
+            if count == RAW_STATEMENT:
+                tokens = tokenizeStatement(strings[record[1]])
+            else:
+                tokens = tuple([strings[index] for index in record[1:count + 1]])
+            decodedRecords[record] = tokens
+        statements.append(tokens)
+    return statements
+
+def readTrace(filePath):
+    """
+    Read a trace log in either the binary or the text format, returning a list with a tuple of tokens for each statement.
+    """
+    with open(filePath, "rb") as file:
+        isBinary = file.read(len(BINARY_TRACE_MAGIC)) == BINARY_TRACE_MAGIC
+    if isBinary:
+        return readBinaryTrace(filePath)
+    with open(filePath) as file:
+        return [tokenizeStatement(statement) for statement in file.read().split("\n")]
+
+def textToBinary(textFilePath, binaryFilePath):
+    """
+    Convert a trace log in the text format to the binary format.
+    """
+    with open(textFilePath) as file:
+        writeBinaryTrace(binaryFilePath, file.read().split("\n"))
+
+def binaryToText(binaryFilePath, textFilePath):
+    """
+    Convert a trace log in the binary format back to exactly the text it was converted from.
+    """
+    with open(textFilePath, "w") as file:
+        file.write("\n".join(["-".join(tokens) for tokens in readBinaryTrace(binaryFilePath)]))
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] not in ["to-binary", "to-text"]:
+        print("Usage: python TraceFormat.py <to-binary | to-text> <inputFile> [outputFile]")
+        exit(1)
+    mode, inputPath = sys.argv[1], sys.argv[2]
+    if mode == "to-binary":
+        outputPath = sys.argv[3] if len(sys.argv) > 3 else os.path.splitext(inputPath)[0] + BINARY_TRACE_EXTENSION
+        textToBinary(inputPath, outputPath)
+    else:
+        outputPath = sys.argv[3] if len(sys.argv) > 3 else os.path.splitext(inputPath)[0] + ".log"
+        binaryToText(inputPath, outputPath)
+    print("Trace has been saved to: {}".format(outputPath))
+
+if __name__ == "__main__":
+    main()
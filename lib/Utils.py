@@ -3,6 +3,9 @@
 # supporting companion agent actions.
 # ==============================================================================================
 import math
+import os
+import time
+from datetime import datetime
 from collections import namedtuple
 from enum import Enum
 
@@ -19,14 +22,18 @@ STRIKING_DISTANCE = 3
 GIVING_DISTANCE = 4
 
 # The size of the observation grid for an agent, as well as how many blocks are in each axis
-GRID_OBSERVATION_SIZE = 605
 GRID_OBSERVATION_X_LEN = 11
 GRID_OBSERVATION_Y_LEN = 5
 GRID_OBSERVATION_Z_LEN = 11
+GRID_OBSERVATION_SIZE = GRID_OBSERVATION_X_LEN * GRID_OBSERVATION_Y_LEN * GRID_OBSERVATION_Z_LEN
 GRID_OBSERVATION_X_HALF_LEN = int(GRID_OBSERVATION_X_LEN / 2)
 GRID_OBSERVATION_Y_HALF_LEN = int(GRID_OBSERVATION_Y_LEN / 2)
 GRID_OBSERVATION_Z_HALF_LEN = int(GRID_OBSERVATION_Z_LEN / 2)
 
+# Environment variables set by Run.py for each mission it runs in parallel
+CLIENTS_ENVIRONMENT_VARIABLE = "MALMO_CLIENTS"  # Comma-separated ip:port addresses of the Minecraft clients assigned to the mission
+RUN_ID_ENVIRONMENT_VARIABLE = "MALMO_RUN_ID"    # A unique id for the mission run, added to the name of each file it outputs
+
 # ==============================================================================================
 # Named tuples
 # ==============================================================================================
@@ -36,11 +43,49 @@ EntityInfo = namedtuple("EntityInfo", "id type position quantity")   # Informati
 Action = namedtuple("Action", "function args")                       # A function with a corresponding list of arguments
 Item = namedtuple("Item", "id type")                                 # An item with an associated id
 RecipeItem = namedtuple("RecipeItem", "type quantity")               # An item that is part of a recipe for crafting
+NearestEntity = namedtuple("NearestEntity", "entity distance")       # The nearest entity of a category to an agent, and its distance from the agent
 
 # ==============================================================================================
 # Functions
 # ==============================================================================================
 
+def getClientAddresses(defaultPorts):
+    """
+    Returns a list of (ip, port) tuples for the Minecraft clients that a mission should connect to. If the mission was
+    assigned clients by Run.py, those are used. Otherwise, returns localhost with each of the default ports given.
+    """
+    clients = os.environ.get(CLIENTS_ENVIRONMENT_VARIABLE)
+    if not clients:
+        return [("127.0.0.1", port) for port in defaultPorts]
+    addresses = []
+    for client in clients.split(","):
+        ip, port = client.rsplit(":", 1)
+        addresses.append((ip, int(port)))
+    return addresses
+
+__outputFileTime = None  # The time used in the suffix of every file output by the current mission, once one has been named
+
+def getOutputFileSuffix(runId = None):
+    """
+    Returns the suffix for the name of a file output by a mission, made up of the date and time, followed by the id of
+    the mission run given, or if none is given, the id assigned to it by Run.py (if any). The date and time are those at
+    which the first file of the mission was named, so that the log and performance files of a mission share the same suffix.
+    """
+    global __outputFileTime
+    if __outputFileTime == None:
+        __outputFileTime = time.time()
+    suffix = datetime.fromtimestamp(__outputFileTime).strftime('%m_%d_%Y_%H_%M_%S')
+    if runId == None:
+        runId = os.environ.get(RUN_ID_ENVIRONMENT_VARIABLE)
+    return suffix + "_" + runId if runId else suffix
+
+def resetOutputFileSuffix():
+    """
+    Forget the date and time used in the suffix of the files output by the current mission, so that another mission can be ran in the same process.
+    """
+    global __outputFileTime
+    __outputFileTime = None
+
 def isEntityInfoNamedTuple(x):
     t = type(x)
     b = t.__bases__
@@ -129,6 +174,14 @@ def numerifyId(string):
 # Classes
 # ==============================================================================================
 
+class Clock:
+    """
+    The source of time used by mission loops and agent actions. This is the system clock unless replaced, such as by the
+    offline MalmoSimulator, in which case waiting advances the simulated world instead of blocking.
+    """
+    now = time.time     # Function returning the current time in seconds
+    sleep = time.sleep  # Function pausing for a number of seconds
+
 class MathExt:
     """
     An extension of the math module to support vector operations and calculations within tolerance.
@@ -869,6 +922,17 @@ class MobType:
         Rabbit = "Rabbit"
 
 
+class EntityCategory(Enum):
+    """
+    Categories of nearby entities that an agent can query for the closest of. Values match the suffix of the corresponding
+    closest_XXX predicate in the trace log.
+    """
+    Mob = "mob"
+    PeacefulMob = "peaceful_mob"
+    HostileMob = "hostile_mob"
+    FoodMob = "food_mob"
+    FoodItem = "food_item"
+
 class TimeOfDay(Enum):
     Dawn = 0
     Noon = 6000
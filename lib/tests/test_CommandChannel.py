@@ -0,0 +1,91 @@
+# ==============================================================================================
+# Tests for the CommandChannel, which suppresses and coalesces the commands sent to an AgentHost.
+# Run with: python -m pytest lib/tests
+# ==============================================================================================
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from CommandChannel import CommandChannel
+
+class RecordingHost:
+    """
+    Stand-in for a Malmo AgentHost that records each command sent to it.
+    """
+
+    def __init__(self):
+        self.commands = []
+
+    def sendCommand(self, command):
+        self.commands.append(command)
+
+def test_unchanged_continuous_commands_are_suppressed():
+    host = RecordingHost()
+    channel = CommandChannel(host)
+    assert channel.send("move 1")
+    assert not channel.send("move 1.0")
+    assert channel.send("move 0")
+    assert host.commands == ["move 1", "move 0"]
+    assert channel.sentCount == 2 and channel.suppressedCount == 1
+
+def test_value_changed_and_changed_back_within_a_tick_is_not_sent():
+    host = RecordingHost()
+    channel = CommandChannel(host)
+    channel.send("turn 0")
+    channel.send("pitch 0")
+    channel.batching = True
+
+    channel.send("turn -0.25")
+    channel.send("pitch 0.0072")
+    channel.send("turn 0")
+    channel.send("pitch 0")
+    channel.flush()
+    assert host.commands == ["turn 0", "pitch 0"]
+
+    # The value held is still the one sent before the tick
+    assert not channel.send("turn 0")
+    channel.flush()
+    assert host.commands == ["turn 0", "pitch 0"]
+
+def test_only_the_last_value_of_each_continuous_command_is_sent_per_tick():
+    host = RecordingHost()
+    channel = CommandChannel(host)
+    channel.batching = True
+    channel.send("move 1")
+    channel.send("move 0.5")
+    channel.send("strafe 1")
+    channel.send("move 0.25")
+    assert host.commands == []
+    channel.flush()
+    assert host.commands == ["strafe 1", "move 0.25"]
+    assert channel.sentCount == 2 and channel.suppressedCount == 2
+
+    channel.send("move 0.25")
+    channel.flush()
+    assert host.commands == ["strafe 1", "move 0.25"]
+
+def test_discrete_commands_are_kept_in_order():
+    host = RecordingHost()
+    channel = CommandChannel(host)
+    channel.batching = True
+    channel.send("hotbar.1 1")
+    channel.send("hotbar.1 0")
+    channel.send("attack 1")
+    channel.send("hotbar.1 1")
+    channel.send("hotbar.1 0")
+    channel.flush()
+    assert host.commands == ["hotbar.1 1", "hotbar.1 0", "attack 1", "hotbar.1 1", "hotbar.1 0"]
+
+def test_reset_forgets_values_sent_and_waiting():
+    host = RecordingHost()
+    channel = CommandChannel(host)
+    channel.send("move 0")
+    channel.batching = True
+    channel.send("turn 1")
+    channel.reset()
+    channel.flush()
+    assert host.commands == ["move 0"]
+    assert channel.send("move 0")
+    channel.flush()
+    assert host.commands == ["move 0", "move 0"]
@@ -0,0 +1,67 @@
+# ==============================================================================================
+# Tests for running missions back to back in a single process with Run.py, using the offline
+# MalmoSimulator in place of Minecraft clients. Run with: python -m pytest lib/tests
+# ==============================================================================================
+import os
+import sys
+
+LIB_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, LIB_DIR)
+
+import MalmoSimulator
+MalmoSimulator.install()
+
+import Run
+from Agent import Agent
+
+def runWarmMission(missionName, run, commandsSent):
+    """
+    Run a mission in this process, as Run.py does with -w, recording the commands sent by the run in the list given.
+    Returns a RunResult.
+    """
+    missionFile = os.path.join(LIB_DIR, missionName)
+    with open(missionFile) as file:
+        code = compile(file.read(), missionFile, "exec")
+    commandsSent.append([])
+    return Run.runMissionInProcess(code, missionFile, run, [10000, 10001])
+
+def test_missions_run_back_to_back_in_process(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "argv", list(sys.argv))
+    commandsSent = []
+    firstCommandTimes = []
+    sendCommand = MalmoSimulator.AgentHost.sendCommand
+    def recordCommand(host, command, key = None):
+        if host.world != None and host.world.running:
+            if len(commandsSent[-1]) == 0:
+                firstCommandTimes.append(MalmoSimulator.simulatedClock.now())
+            commandsSent[-1].append(command)
+        sendCommand(host, command, key)
+    monkeypatch.setattr(MalmoSimulator.AgentHost, "sendCommand", recordCommand)
+
+    results = [runWarmMission("Task2.UT.py", 1, commandsSent), runWarmMission("Task2.UT.py", 2, commandsSent)]
+    secondAgents = list(Agent.agentList)
+    for agent in secondAgents:
+        agent.commands.send("move 0")   # Ensure each channel holds a value that must not outlive the mission
+    results.append(runWarmMission("Task2.UT.py", 3, commandsSent))
+
+    assert [result.exitCode for result in results] == [0, 0, 0]
+    assert all(len(result.logFiles) == 1 and len(result.performanceFiles) == 2 for result in results)
+    assert len(set(result.logFiles[0] for result in results)) == 3
+
+    # The simulator is seeded, so each run that starts from a clean slate logs the same trace
+    logs = []
+    for result in results:
+        with open(result.logFiles[0]) as file:
+            logs.append(file.read())
+    assert logs[1] == logs[0] and logs[2] == logs[0]
+
+    # Each run starts the simulated clock over, so every run sends exactly the same commands at the same times
+    assert len(commandsSent[0]) > 0
+    assert firstCommandTimes[1] == firstCommandTimes[0] and firstCommandTimes[2] == firstCommandTimes[0]
+    assert commandsSent[1] == commandsSent[0] and commandsSent[2] == commandsSent[0]
+
+    # Resetting for the third run forgot the commands held by the agents of the second
+    for agent in secondAgents:
+        assert agent.commands.send("move 0")
+    assert all(agent not in Agent.agentList for agent in secondAgents)